@@ -0,0 +1,6979 @@
+"""
+AMiner Open Platform API Client: the implementation behind aminer_client.py.
+
+Run the client through aminer_client.py (see its docstring for usage); that entry point
+imports this module, so Python caches its compiled bytecode in __pycache__ instead of
+recompiling ~7k lines on every run. `import aminer_client` returns this module.
+"""
+
+import argparse
+import codecs
+import contextlib
+import contextvars
+import importlib
+import itertools
+import heapq
+import json
+import math
+import os
+import socket
+import sys
+import threading
+import time
+import random
+import re
+import urllib.parse
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from functools import partial
+from typing import Any, Optional
+
+
+class _LazyModule:
+    """
+    Placeholder for a module that only some runs need, imported on first attribute
+    access (then it replaces the placeholder, bound as `alias`), to keep CLI startup short.
+    """
+
+    def __init__(self, name: str, alias: Optional[str] = None):
+        self._name = name
+        self._alias = alias or name
+
+    def __getattr__(self, attr: str) -> Any:
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+
+asyncio = _LazyModule("asyncio")                         # the async client
+csv = _LazyModule("csv")                                 # CSV batch input
+difflib = _LazyModule("difflib")                         # fuzzy org alias matching
+futures = _LazyModule("concurrent.futures", "futures")   # workflow and batch thread pools
+hashlib = _LazyModule("hashlib")                         # cache keys
+http_client = _LazyModule("http.client", "http_client")  # the transport (imports ssl too)
+sqlite3 = _LazyModule("sqlite3")                         # response cache and local entity store
+ssl = _LazyModule("ssl")                                 # TLS contexts, built on the first https request
+unicodedata = _LazyModule("unicodedata")                 # org name normalization
+
+# AMINER_BASE_URL lets the client target a local stub/mock gateway
+BASE_URL = os.getenv("AMINER_BASE_URL", "https://datacenter.aminer.cn/gateway/open_platform")
+
+TEST_TOKEN = ""  # Go to https://open.aminer.cn/open/board?tab=control to generate your own token
+
+# Per-attempt timeouts: establishing the connection (TCP + TLS), and waiting on the socket
+# for response bytes. A workflow_deadline() caps both with the time the workflow has left.
+CONNECT_TIMEOUT_SECONDS = 10
+READ_TIMEOUT_SECONDS = 30
+MAX_RETRIES = 3
+RETRYABLE_HTTP_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Keep-alive connection pool defaults (overridable via configure_transport / CLI)
+POOL_SIZE = 10                   # max idle connections kept open across all hosts
+POOL_MAX_PER_HOST = 10           # max concurrent connections to a single host
+POOL_IDLE_TIMEOUT_SECONDS = 60   # idle connections older than this are closed, not reused
+# Redirects followed per request (as urllib did: 301/302/303 become a bodyless GET)
+POOL_MAX_REDIRECTS = 5
+REDIRECT_HTTP_STATUS = {301, 302, 303, 307, 308}
+
+# Streamed responses (records parsed while the body arrives): socket read size, and how
+# many records are collected per local entity store write
+STREAM_CHUNK_BYTES = 64 * 1024
+STREAM_STORE_RECORDS = 500
+# orjson's import (~10ms) only pays off with a lot of JSON to handle: it is loaded for
+# response bodies of at least this size, harvests (PageIterator output) and batch runs
+ORJSON_MIN_BYTES = 1024 * 1024
+
+# Max concurrent API calls when a workflow fans out independent stages (1 = run serially)
+WORKFLOW_MAX_WORKERS = 5
+
+# Patents the patent workflows fetch per-patent details for (None = every listed patent)
+PATENT_DETAIL_LIMIT = 3
+
+# Scholar disambiguation: person_search candidates scored on free signals before the paid
+# profile calls. Confidence is the best candidate's score minus the runner-up's; below
+# the minimum the scholar workflows stop before any paid call (0 = always take the best).
+DISAMBIGUATION_CANDIDATES = 5
+DISAMBIGUATION_MIN_CONFIDENCE = 0.0
+DISAMBIGUATION_WEIGHTS = {"name": 0.3, "org": 0.35, "interests": 0.2, "rank": 0.15, "citations": 0.15}
+# Cache "path" of the decisions (see resolve_scholar); not a gateway endpoint
+DISAMBIGUATION_PATH = "/local/person/disambiguation"
+
+# Citation graph crawler limits (paper_relation expansion from seed papers)
+CRAWL_MAX_DEPTH = 2      # hops from the seeds; papers at this depth are kept as leaves
+CRAWL_MAX_NODES = 1000   # papers kept in the graph
+
+# Gateway path of each API wrapper
+API_PATHS = {
+    "paper_search": "/api/paper/search",
+    "paper_search_pro": "/api/paper/search/pro",
+    "paper_qa_search": "/api/paper/qa/search",
+    "paper_info": "/api/paper/info",
+    "paper_detail": "/api/paper/detail",
+    "paper_relation": "/api/paper/relation",
+    "paper_list_by_search_venue": "/api/paper/list/by/search/venue",
+    "paper_list_by_keywords": "/api/paper/list/citation/by/keywords",
+    "paper_detail_by_condition": "/api/paper/platform/allpubs/more/detail/by/ts/org/venue",
+    "person_search": "/api/person/search",
+    "person_detail": "/api/person/detail",
+    "person_figure": "/api/person/figure",
+    "person_paper_relation": "/api/person/paper/relation",
+    "person_patent_relation": "/api/person/patent/relation",
+    "person_project": "/api/project/person/v3/open",
+    "org_search": "/api/organization/search",
+    "org_detail": "/api/organization/detail",
+    "org_person_relation": "/api/organization/person/relation",
+    "org_paper_relation": "/api/organization/paper/relation",
+    "org_patent_relation": "/api/organization/patent/relation",
+    "org_disambiguate": "/api/organization/na",
+    "org_disambiguate_pro": "/api/organization/na/pro",
+    "venue_search": "/api/venue/search",
+    "venue_detail": "/api/venue/detail",
+    "venue_paper_relation": "/api/venue/paper/relation",
+    "patent_search": "/api/patent/search",
+    "patent_info": "/api/patent/info",
+    "patent_detail": "/api/patent/detail",
+}
+
+# Documented per-call price (CNY) of each endpoint, keyed by API path
+API_PRICES = {
+    "/api/paper/search": 0.0,                                       # paper_search
+    "/api/paper/search/pro": 0.01,                                  # paper_search_pro
+    "/api/paper/qa/search": 0.05,                                   # paper_qa_search
+    "/api/paper/info": 0.0,                                         # paper_info
+    "/api/paper/detail": 0.01,                                      # paper_detail
+    "/api/paper/relation": 0.10,                                    # paper_relation
+    "/api/paper/list/by/search/venue": 0.30,                        # paper_list_by_search_venue
+    "/api/paper/list/citation/by/keywords": 0.10,                   # paper_list_by_keywords
+    "/api/paper/platform/allpubs/more/detail/by/ts/org/venue": 0.20,  # paper_detail_by_condition
+    "/api/person/search": 0.0,                                      # person_search
+    "/api/person/detail": 1.00,                                     # person_detail
+    "/api/person/figure": 0.50,                                     # person_figure
+    "/api/person/paper/relation": 1.50,                             # person_paper_relation
+    "/api/person/patent/relation": 1.50,                            # person_patent_relation
+    "/api/project/person/v3/open": 3.00,                            # person_project
+    "/api/organization/search": 0.0,                                # org_search
+    "/api/organization/detail": 0.01,                               # org_detail
+    "/api/organization/person/relation": 0.50,                      # org_person_relation
+    "/api/organization/paper/relation": 0.10,                       # org_paper_relation
+    "/api/organization/patent/relation": 0.10,                      # org_patent_relation
+    "/api/organization/na": 0.01,                                   # org_disambiguate
+    "/api/organization/na/pro": 0.05,                               # org_disambiguate_pro
+    "/api/venue/search": 0.0,                                       # venue_search
+    "/api/venue/detail": 0.20,                                      # venue_detail
+    "/api/venue/paper/relation": 0.10,                              # venue_paper_relation
+    "/api/patent/search": 0.0,                                      # patent_search
+    "/api/patent/info": 0.0,                                        # patent_info
+    "/api/patent/detail": 0.01,                                     # patent_detail
+}
+
+# --budget planning: stage priority per API (1 = essential, 3 = optional; unlisted = 2).
+# When a workflow's stages do not all fit the remaining budget, higher numbers are
+# deferred first and skipped if the budget is still short once the rest have run.
+STAGE_PRIORITIES = {
+    "person_detail": 1,
+    "person_figure": 2,
+    "person_paper_relation": 2,
+    "person_patent_relation": 3,
+    "person_project": 3,
+    "paper_detail": 1,
+    "paper_relation": 2,
+    "org_detail": 1,
+    "org_person_relation": 2,
+    "org_paper_relation": 2,
+    "org_patent_relation": 3,
+    "venue_detail": 3,
+    "venue_paper_relation": 1,
+}
+# Free calls the workflows switch to when the paid one no longer fits the budget
+FREE_ALTERNATIVES = {
+    "paper_search_pro": "paper_search",
+    "patent_detail": "patent_info",
+    "org_disambiguate_pro": "org_search",
+}
+
+# Persistent response cache (SQLite). TTLs are per API path; unlisted paths use the default.
+CACHE_DIR = os.getenv("AMINER_CACHE_DIR") or os.path.expanduser("~/.cache/aminer")
+CACHE_PATH = os.path.join(CACHE_DIR, "responses.sqlite3")
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_DEFAULT_TTL_SECONDS = 24 * 3600
+CACHE_TTL_SECONDS = {
+    # Profile data changes slowly and is the most expensive to refetch
+    "/api/person/detail": 7 * 24 * 3600,
+    "/api/person/figure": 7 * 24 * 3600,
+    "/api/person/paper/relation": 7 * 24 * 3600,
+    "/api/person/patent/relation": 7 * 24 * 3600,
+    "/api/project/person/v3/open": 30 * 24 * 3600,
+    "/api/paper/detail": 30 * 24 * 3600,
+    "/api/paper/relation": 30 * 24 * 3600,
+    "/api/patent/detail": 30 * 24 * 3600,
+    "/api/organization/detail": 30 * 24 * 3600,
+    "/api/venue/detail": 30 * 24 * 3600,
+    DISAMBIGUATION_PATH: 7 * 24 * 3600,
+}
+# Eviction keeps an entry as if it had been used this many seconds later per CNY it cost
+CACHE_COST_WEIGHT_SECONDS = 24 * 3600
+
+# Local entity store (SQLite + FTS5) of every paper/scholar/org/venue/patent record returned
+STORE_PATH = os.path.join(CACHE_DIR, "entities.sqlite3")
+STORE_MAX_AGE_SECONDS = 30 * 24 * 3600   # --local_first refetches records older than this
+# Entity kind of the records in each endpoint's `data` (citations, portraits, projects and
+# disambiguation results are not entity records and are not stored)
+STORE_ENTITY_KINDS = {
+    "/api/paper/search": "paper",
+    "/api/paper/search/pro": "paper",
+    "/api/paper/qa/search": "paper",
+    "/api/paper/info": "paper",
+    "/api/paper/detail": "paper",
+    "/api/paper/list/by/search/venue": "paper",
+    "/api/paper/list/citation/by/keywords": "paper",
+    "/api/paper/platform/allpubs/more/detail/by/ts/org/venue": "paper",
+    "/api/person/paper/relation": "paper",
+    "/api/organization/paper/relation": "paper",
+    "/api/venue/paper/relation": "paper",
+    "/api/person/search": "person",
+    "/api/person/detail": "person",
+    "/api/organization/person/relation": "person",
+    "/api/organization/search": "org",
+    "/api/organization/detail": "org",
+    "/api/venue/search": "venue",
+    "/api/venue/detail": "venue",
+    "/api/patent/search": "patent",
+    "/api/patent/info": "patent",
+    "/api/patent/detail": "patent",
+    "/api/person/patent/relation": "patent",
+    "/api/organization/patent/relation": "patent",
+}
+
+# Local org alias index: org names seen in org_disambiguate_pro / org_search results, matched
+# after normalization (abbreviations below expanded). Fuzzy matching (character trigrams) is
+# off by default: similar names are often different orgs ("Beijing Institute of Technology" /
+# "Harbin Institute of Technology", "USTB" / "USTC"), so a fuzzy hit is only trusted when its
+# words match one to one, with typos allowed only in the structural words below
+ORG_ALIAS_PATH = os.path.join(CACHE_DIR, "org_aliases.sqlite3")
+ORG_ALIAS_MIN_SIMILARITY = 1.0    # sequence similarity (difflib ratio) a fuzzy match needs; 1 = exact only
+ORG_ALIAS_SHORTLIST = 8           # aliases sharing the most trigrams that are compared in full
+ORG_ALIAS_TYPO_SIMILARITY = 0.8   # how close a misspelled structural word must be
+ORG_ALIAS_STOPWORDS = {"of", "and", "for", "at", "in", "de"}
+ORG_ALIAS_STRUCTURAL_WORDS = {
+    "university", "institute", "college", "school", "academy", "department", "laboratory",
+    "laboratories", "center", "hospital", "faculty",
+}
+ORG_ALIAS_ABBREVIATIONS = {
+    "univ": "university", "uni": "university", "inst": "institute", "technol": "technology",
+    "natl": "national", "acad": "academy", "dept": "department", "lab": "laboratory",
+    "labs": "laboratories", "ctr": "center", "centre": "center", "coll": "college",
+    "hosp": "hospital", "intl": "international", "&": "and",
+}
+
+# Incremental venue sync: per-venue watermarks (SQLite). A venue's first sync without an
+# explicit year range covers the latest SYNC_INITIAL_YEARS years; every later sync re-sweeps
+# the SYNC_REOPEN_YEARS most recent synced years (papers are indexed late) plus newer ones.
+SYNC_STATE_PATH = os.path.join(CACHE_DIR, "venue_sync.sqlite3")
+SYNC_INITIAL_YEARS = 3
+SYNC_REOPEN_YEARS = 2
+
+# Optional warm daemon (--serve): the Unix socket it listens on (clients forward to it when
+# AMINER_DAEMON_SOCKET is set), and how long it stays up without a request
+DAEMON_SOCKET_PATH = os.getenv("AMINER_DAEMON_SOCKET") or os.path.join(CACHE_DIR, "daemon.sock")
+DAEMON_IDLE_TIMEOUT_SECONDS = 30 * 60
+
+# In-process memoization of identical calls (bounded LRU, shared by all workflows)
+MEMO_MAX_ENTRIES = 512
+MEMO_TTL_SECONDS = 300
+
+# Micro-batching of single-ID paper_info / org_detail lookups
+BATCH_WINDOW_SECONDS = 0.01   # how long the first lookup waits for others to join its batch
+BATCH_MAX_SIZE = 100          # IDs per bulk call; a full batch is sent immediately
+
+# Client-side rate limiting: token bucket (requests/second, burst) per endpoint class
+# ("free" = price 0 in API_PRICES, "paid" = everything else), shared by all threads
+RATE_LIMITS = {"free": (10.0, 20), "paid": (5.0, 10)}
+THROTTLE_HTTP_STATUS = {429, 503}
+# AIMD adaptive concurrency: +1/limit per success, x0.5 per throttled response (at most once per interval)
+RATE_MAX_CONCURRENCY = 16
+RATE_MIN_CONCURRENCY = 1
+RATE_DECREASE_INTERVAL_SECONDS = 1.0
+
+# Token pool: a comma-separated token list spreads calls across accounts, each under its own
+# rate limiter; a throttled or exhausted token is drained (not picked) for a while
+TOKEN_POOL_STRATEGY = "least_loaded"     # or "round_robin"
+TOKEN_THROTTLE_DRAIN_SECONDS = 30.0      # after a 429 (longer if its Retry-After says so)
+TOKEN_EXHAUSTED_DRAIN_SECONDS = 3600.0   # after a balance / quota error
+TOKEN_EXHAUSTED_HTTP_STATUS = {402}
+TOKEN_EXHAUSTED_PATTERN = re.compile(r"balance|insufficient|quota|余额|欠费|额度", re.IGNORECASE)
+
+# Hedged requests (opt-in, configure_hedging / --hedge): when a call has not answered after
+# the HEDGE_QUANTILE latency of its endpoint, an identical request is sent and the first
+# answer wins. Only free endpoints are hedged by default, since paid ones bill every copy.
+HEDGE_QUANTILE = 0.95
+HEDGE_WINDOW = 200                  # recent latencies kept per endpoint
+HEDGE_MIN_SAMPLES = 20              # below this, HEDGE_DEFAULT_DELAY_SECONDS is used
+HEDGE_DEFAULT_DELAY_SECONDS = 1.0
+HEDGE_MIN_DELAY_SECONDS = 0.05
+
+# Per-endpoint circuit breaker: when at least CIRCUIT_FAILURE_RATE of an endpoint's last
+# CIRCUIT_WINDOW network attempts (and at least CIRCUIT_MIN_CALLS) failed with a timeout,
+# connection error or one of CIRCUIT_FAILURE_STATUS, its calls fail fast for the cooldown
+CIRCUIT_FAILURE_RATE = 0.5
+CIRCUIT_MIN_CALLS = 5
+CIRCUIT_WINDOW = 20
+CIRCUIT_COOLDOWN_SECONDS = 30
+CIRCUIT_FAILURE_STATUS = {408, 500, 502, 503, 504}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Transport (keep-alive connection pool)
+# ──────────────────────────────────────────────────────────────────────────────
+
+# timings: seconds per network phase of the exchange (dns/connect/tls/ttfb/transfer), when measured
+_HTTPResponse = namedtuple("_HTTPResponse", ["status", "reason", "headers", "body", "timings"],
+                           defaults=(None,))
+
+
+def _stale_connection_errors() -> tuple:
+    """Errors that mean the server closed an idle keep-alive socket before we wrote to it."""
+    return (http_client.RemoteDisconnected, http_client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+
+class _TimedConnectionMixin:
+    """
+    connect() that records how long name resolution, the TCP connect and the TLS handshake
+    took, in `connect_timings` ({"dns", "connect", "tls"} seconds), for the request it opens.
+    """
+
+    connect_timings: Optional[dict] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = self._timed_create_connection
+
+    def _timed_create_connection(self, address, timeout=None, source_address=None):
+        host, port = address
+        start = time.perf_counter()
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        error = None
+        for *_, sockaddr in infos:
+            try:
+                sock = socket.create_connection(sockaddr[:2], timeout, source_address)
+                break
+            except OSError as e:
+                error = e
+        else:
+            raise error or OSError(f"getaddrinfo returned no addresses for {host}")
+        self.connect_timings = {"dns": resolved - start, "connect": time.perf_counter() - resolved,
+                                "tls": 0.0}
+        return sock
+
+
+_connection_classes: dict = {}  # scheme -> timed connection class
+
+
+def _timed_connection_class(scheme: str) -> type:
+    """
+    The http.client connection class for `scheme` with _TimedConnectionMixin, defined on the
+    first request (importing http.client and ssl is a large share of CLI startup).
+    """
+    cls = _connection_classes.get(scheme)
+    if cls is not None:
+        return cls
+    if scheme == "https":
+        class _TimedHTTPSConnection(_TimedConnectionMixin, http_client.HTTPSConnection):
+            def connect(self):
+                start = time.perf_counter()
+                super().connect()  # TCP connect (timed above), then the TLS handshake
+                timings = self.connect_timings
+                timings["tls"] = max(0.0, time.perf_counter() - start - timings["dns"] - timings["connect"])
+        cls = _TimedHTTPSConnection
+    else:
+        class _TimedHTTPConnection(_TimedConnectionMixin, http_client.HTTPConnection):
+            pass
+        cls = _TimedHTTPConnection
+    return _connection_classes.setdefault(scheme, cls)
+
+
+def _proxy_route(scheme: str, host: str) -> Optional[tuple]:
+    """
+    (proxy host, proxy port, Proxy-Authorization value or None) for requests to `host`,
+    chosen the way urllib chooses it (HTTPS_PROXY / HTTP_PROXY / NO_PROXY, or the system
+    settings); None for a direct connection.
+    """
+    if sys.platform not in ("darwin", "win32") and not any(k.lower().endswith("_proxy") for k in os.environ):
+        return None  # what urllib would find too, without importing urllib.request (slow)
+    import urllib.request
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    parts = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    auth = None
+    if parts.username is not None:
+        import base64
+        credentials = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+        auth = "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    return parts.hostname, parts.port or (443 if parts.scheme == "https" else 80), auth
+
+
+def _redirect_request(method: str, url: str, body: Optional[bytes], headers: Optional[dict],
+                      status: int, resp_headers) -> Optional[tuple]:
+    """
+    The (method, url, body, headers) a redirect response points to, or None. Like urllib,
+    301/302/303 are followed with a bodyless GET; 307/308 repeat the request. The
+    Authorization header is never sent on to another host.
+    """
+    location = resp_headers.get("Location") if status in REDIRECT_HTTP_STATUS and resp_headers else None
+    if not location:
+        return None
+    target = urllib.parse.urljoin(url, location)
+    if urllib.parse.urlsplit(target).scheme not in ("http", "https"):
+        return None
+    headers = dict(headers or {})
+    if status not in (307, 308) and method != "HEAD":
+        method, body = "GET", None
+        headers = {k: v for k, v in headers.items() if k.lower() not in ("content-type", "content-length")}
+    if urllib.parse.urlsplit(target).netloc != urllib.parse.urlsplit(url).netloc:
+        headers = {k: v for k, v in headers.items() if k.lower() != "authorization"}
+    return method, target, body, headers
+
+
+class ConnectionPool:
+    """
+    Thread-safe HTTP/1.1 keep-alive connection pool.
+
+    Idle connections are kept per (scheme, host, port) and handed back out to later
+    requests, so consecutive API calls skip the TCP + TLS handshake. At most
+    `max_per_host` requests run concurrently against one host; at most `pool_size`
+    idle connections are retained overall; connections idle for longer than
+    `idle_timeout` seconds are closed instead of reused. `connect_timeout` bounds
+    opening a connection, `read_timeout` each wait for response bytes.
+
+    Proxies are honored as urllib honors them (_proxy_route): https requests are tunneled
+    with CONNECT, http requests are sent to the proxy with the absolute URL. Redirects
+    are followed (at most POOL_MAX_REDIRECTS).
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE,
+                 max_per_host: int = POOL_MAX_PER_HOST,
+                 idle_timeout: float = POOL_IDLE_TIMEOUT_SECONDS,
+                 connect_timeout: float = CONNECT_TIMEOUT_SECONDS,
+                 read_timeout: float = READ_TIMEOUT_SECONDS):
+        self.pool_size = max(0, pool_size)
+        self.max_per_host = max(1, max_per_host)
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._idle: dict = {}        # key -> deque[(conn, last_used)]
+        self._idle_count = 0
+        self._host_slots: dict = {}  # key -> BoundedSemaphore
+        self._routes: dict = {}      # key -> _proxy_route() result
+        self._lock = threading.Lock()
+        self._ssl_context = None     # built on the first https connection (loading CA certs is slow)
+        self._stats = {"requests": 0, "connections_created": 0,
+                       "connections_reused": 0, "connections_discarded": 0}
+
+    def _tls_context(self) -> "ssl.SSLContext":
+        with self._lock:
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return self._ssl_context
+
+    def _route(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            if key not in self._routes:
+                self._routes[key] = _proxy_route(key[0], key[1])
+            return self._routes[key]
+
+    def _slot(self, key: tuple) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._host_slots.get(key)
+            if slot is None:
+                slot = self._host_slots[key] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def _checkout(self, key: tuple, timeout: float, connect_timeout: float, fresh: bool = False):
+        """Return (connection, reused) — an idle connection if one is still fresh, else a new one."""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle and not fresh:
+                conn, last_used = idle.pop()
+                self._idle_count -= 1
+                if now - last_used <= self.idle_timeout and conn.sock is not None:
+                    self._stats["connections_reused"] += 1
+                    conn.sock.settimeout(timeout)
+                    return conn, True
+                self._stats["connections_discarded"] += 1
+                conn.close()
+            self._stats["connections_created"] += 1
+
+        scheme, host, port = key
+        proxy = self._route(key)
+        address = (proxy[0], proxy[1]) if proxy else (host, port)
+        if scheme == "https":
+            conn = _timed_connection_class("https")(*address, timeout=connect_timeout, context=self._tls_context())
+            if proxy:
+                conn.set_tunnel(host, port, headers={"Proxy-Authorization": proxy[2]} if proxy[2] else None)
+        else:
+            conn = _timed_connection_class("http")(*address, timeout=connect_timeout)
+        return conn, False
+
+    def _checkin(self, key: tuple, conn, reusable: bool) -> None:
+        with self._lock:
+            if reusable and self._idle_count < self.pool_size:
+                self._idle.setdefault(key, deque()).append((conn, time.monotonic()))
+                self._idle_count += 1
+                return
+            self._stats["connections_discarded"] += 1
+        conn.close()
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[dict] = None,
+                timeout: Optional[float] = None,
+                connect_timeout: Optional[float] = None) -> _HTTPResponse:
+        """Send one request over a pooled connection and return the fully-read response."""
+        resp = self.open(method, url, body=body, headers=headers, timeout=timeout,
+                         connect_timeout=connect_timeout)
+        try:
+            data = resp.read()
+        finally:
+            resp.close()
+        return _HTTPResponse(resp.status, resp.reason, resp.headers, data, resp.timings)
+
+    def open(self, method: str, url: str, body: Optional[bytes] = None,
+             headers: Optional[dict] = None,
+             timeout: Optional[float] = None,
+             connect_timeout: Optional[float] = None) -> "_PooledResponse":
+        """
+        Send one request over a pooled connection and return the response with its body
+        unread, to be consumed incrementally with read(n). close() must be called: it hands
+        the connection back to the pool if the body was read to the end.
+
+        New connections are opened before the request is written, so the response's
+        timings split the handshake (dns/connect/tls) from the time to first byte, and
+        the handshake runs under `connect_timeout` while reads use `timeout` (both default
+        to the pool's settings). Redirects are followed; the response is the final one.
+        """
+        for _ in range(POOL_MAX_REDIRECTS):
+            resp = self._open_once(method, url, body, headers, timeout, connect_timeout)
+            redirect = _redirect_request(method, url, body, headers, resp.status, resp.headers)
+            if redirect is None:
+                return resp
+            with resp:
+                resp.read()  # drained, so the connection can be reused
+            method, url, body, headers = redirect
+        return self._open_once(method, url, body, headers, timeout, connect_timeout)
+
+    def _open_once(self, method: str, url: str, body: Optional[bytes], headers: Optional[dict],
+                   timeout: Optional[float], connect_timeout: Optional[float]) -> "_PooledResponse":
+        timeout = self.read_timeout if timeout is None else timeout
+        connect_timeout = self.connect_timeout if connect_timeout is None else connect_timeout
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "https"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        headers = headers or {}
+        proxy = self._route(key)
+        if proxy and scheme == "http":  # forwarded by the proxy, not tunneled
+            target = f"http://{parts.netloc}{target}"
+            if proxy[2]:
+                headers = {**headers, "Proxy-Authorization": proxy[2]}
+
+        with self._lock:
+            self._stats["requests"] += 1
+
+        slot = self._slot(key)
+        slot.acquire()
+        try:
+            fresh = False
+            while True:
+                conn, reused = self._checkout(key, timeout, connect_timeout, fresh=fresh)
+                try:
+                    if conn.sock is None:
+                        conn.connect()
+                        conn.sock.settimeout(timeout)
+                    sent = time.perf_counter()
+                    conn.request(method, target, body=body, headers=headers)
+                    resp = conn.getresponse()
+                    timings = dict(conn.connect_timings or {}, ttfb=time.perf_counter() - sent)
+                    conn.connect_timings = None
+                except _stale_connection_errors():
+                    conn.close()
+                    with self._lock:
+                        self._stats["connections_discarded"] += 1
+                    if reused and not fresh:
+                        # The server dropped the idle socket; retry once on a new connection
+                        fresh = True
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    with self._lock:
+                        self._stats["connections_discarded"] += 1
+                    raise
+                return _PooledResponse(self, key, conn, resp, slot, timings)
+        except BaseException:
+            slot.release()
+            raise
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle, self._idle_count = self._idle, {}, 0
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+    def stats(self) -> dict:
+        """Return request/connection counters plus the connection reuse rate."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle_connections"] = self._idle_count
+        requests = stats["connections_created"] + stats["connections_reused"]
+        stats["reuse_rate"] = round(stats["connections_reused"] / requests, 4) if requests else 0.0
+        return stats
+
+
+class _PooledResponse:
+    """Response of ConnectionPool.open(): status/reason/headers plus an incrementally readable body."""
+
+    def __init__(self, pool: ConnectionPool, key: tuple, conn, resp, slot, timings: dict):
+        self.status, self.reason, self.headers = resp.status, resp.reason, resp.headers
+        self._pool, self._key, self._conn, self._resp, self._slot = pool, key, conn, resp, slot
+        self._closed = False
+        self._timings = timings
+        self._received = self._last_read = time.perf_counter()
+        self.bytes_read = 0
+
+    @property
+    def timings(self) -> dict:
+        """Phase timings of the exchange; `transfer` runs from the headers to the latest read."""
+        return dict(self._timings, transfer=self._last_read - self._received)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        data = self._resp.read(amt)
+        self.bytes_read += len(data)
+        self._last_read = time.perf_counter()
+        return data
+
+    def close(self) -> None:
+        """Release the host slot; the connection is reused only if the body was fully read."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._pool._checkin(self._key, self._conn,
+                                reusable=self._resp.isclosed() and not self._resp.will_close)
+        finally:
+            self._slot.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_transport: Optional[ConnectionPool] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> ConnectionPool:
+    """Return the shared connection pool used by every API wrapper and workflow."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = ConnectionPool()
+    return _transport
+
+
+def configure_transport(pool_size: int = POOL_SIZE,
+                        max_per_host: int = POOL_MAX_PER_HOST,
+                        idle_timeout: float = POOL_IDLE_TIMEOUT_SECONDS,
+                        connect_timeout: float = CONNECT_TIMEOUT_SECONDS,
+                        read_timeout: float = READ_TIMEOUT_SECONDS) -> ConnectionPool:
+    """Replace the shared connection pool (closing the old one's idle connections)."""
+    global _transport
+    with _transport_lock:
+        old, _transport = _transport, ConnectionPool(pool_size, max_per_host, idle_timeout,
+                                                     connect_timeout, read_timeout)
+    if old is not None:
+        old.close()
+    return _transport
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Response Cache
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _request_key(method: str, path: str, params: Optional[dict] = None,
+                 body: Optional[dict] = None) -> str:
+    """Stable key for a call: None-valued params are dropped and dict keys sorted. Excludes the token."""
+    if params:
+        params = {k: v for k, v in params.items() if v is not None}
+    normalized = json.dumps([method.upper(), path, params or None, body or None],
+                            sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of successful API responses, keyed by _request_key (method,
+    API path, normalized params/body). The token is never part of the key or the stored data.
+
+    Entries expire after a per-path TTL. When the cache grows past `max_bytes`, the
+    entries with the lowest `last_access + price * CACHE_COST_WEIGHT_SECONDS` are evicted
+    first, so expensive responses (person_project, person_paper_relation, ...) outlive
+    cheap ones that were used equally recently.
+
+    mode: "use" (read + write), "refresh" (skip reads, overwrite) or "bypass" (no-op).
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES,
+                 ttls: Optional[dict] = None,
+                 default_ttl: float = CACHE_DEFAULT_TTL_SECONDS,
+                 mode: str = "use"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(CACHE_TTL_SECONDS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "expired": 0}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, path TEXT NOT NULL, body BLOB NOT NULL,"
+            " size INTEGER NOT NULL, cost REAL NOT NULL,"
+            " created REAL NOT NULL, last_access REAL NOT NULL)")
+
+    def ttl(self, path: str) -> float:
+        return self.ttls.get(path, self.default_ttl)
+
+    def get(self, key: str, path: str) -> Optional[Any]:
+        """Return the cached response, or None on a miss/expired entry (always None unless mode is "use")."""
+        if self.mode != "use":
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT body, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            if now - row[1] > self.ttl(path):
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, path: str, value: Any) -> None:
+        if self.mode == "bypass":
+            return
+        blob = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, path, body, size, cost, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, path, blob, len(blob), API_PRICES.get(path, 0.0), now, now))
+            self._stats["writes"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT key, size FROM responses ORDER BY last_access + cost * ? ASC",
+            (CACHE_COST_WEIGHT_SECONDS,))
+        victims = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._stats["evictions"] += len(victims)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        """Return hit/miss/write/eviction counters for this process plus the stored size."""
+        with self._lock:
+            stats = dict(self._stats)
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["entries"] = entries
+        stats["bytes"] = size
+        return stats
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Return the active response cache, or None when caching is disabled (the library default)."""
+    return _response_cache
+
+
+def configure_cache(path: Optional[str] = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES,
+                    ttls: Optional[dict] = None,
+                    default_ttl: float = CACHE_DEFAULT_TTL_SECONDS,
+                    mode: str = "use") -> Optional[ResponseCache]:
+    """Enable the persistent response cache for every wrapper and workflow; path=None disables it."""
+    global _response_cache
+    old, _response_cache = _response_cache, None
+    if old is not None:
+        old.close()
+    if path is not None:
+        _response_cache = ResponseCache(path, max_bytes, ttls, default_ttl, mode)
+    return _response_cache
+
+
+_fresh_responses = contextvars.ContextVar("_fresh_responses", default=False)
+
+
+@contextlib.contextmanager
+def fresh_responses():
+    """
+    Within the block (and the workflow threads it starts), calls skip the memo and response
+    cache reads and go to the network; fresh answers are still written back.
+    """
+    token = _fresh_responses.set(True)
+    try:
+        yield
+    finally:
+        _fresh_responses.reset(token)
+
+
+def _cache_lookup(key: str, path: str) -> Optional[Any]:
+    """Return the cached response for key, or None when caching is off, on a miss, or under fresh_responses()."""
+    cache = _response_cache
+    if cache is None or _fresh_responses.get():
+        return None
+    return cache.get(key, path)
+
+
+def _cacheable(result: Any, ok: bool) -> bool:
+    """Only 2xx responses the gateway did not flag as unsuccessful are cached or memoized."""
+    return ok and not (isinstance(result, dict) and result.get("success") is False)
+
+
+def _cache_store(key: str, path: str, result: Any) -> None:
+    cache = _response_cache
+    if cache is None or not _cacheable(result, True):
+        return
+    cache.put(key, path, result)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Local Entity Store
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Record fields holding the entity ID, most specific first
+_STORE_ID_FIELDS = {
+    "paper": ("_id", "id"),
+    "person": ("id", "person_id", "_id"),
+    "org": ("id", "org_id", "_id"),
+    "venue": ("id", "_id"),
+    "patent": ("patent_id", "id", "_id"),
+}
+
+# ID lookups --local_first answers from the store: path -> (kind, ID argument, APIs whose
+# stored records are complete enough to stand in for this one)
+_STORE_LOOKUPS = {
+    "/api/paper/detail": ("paper", "id", ("/api/paper/detail",)),
+    "/api/paper/info": ("paper", "ids", ("/api/paper/info", "/api/paper/detail")),
+    "/api/person/detail": ("person", "id", ("/api/person/detail",)),
+    "/api/organization/detail": ("org", "ids", ("/api/organization/detail",)),
+    "/api/venue/detail": ("venue", "id", ("/api/venue/detail",)),
+    "/api/patent/info": ("patent", "id", ("/api/patent/info", "/api/patent/detail")),
+    "/api/patent/detail": ("patent", "id", ("/api/patent/detail",)),
+}
+
+# Title searches --local_first answers from the full-text index: path -> (kind, query argument)
+_STORE_SEARCHES = {
+    "/api/paper/search": ("paper", "title"),
+    "/api/patent/search": ("patent", "query"),
+}
+
+_STORE_TEXT_COLUMNS = ("title", "authors", "orgs", "venue")
+
+
+def _texts(*values) -> list:
+    """Flatten strings, lists and {name, name_zh, ...} objects into a list of non-empty strings."""
+    out = []
+    for value in values:
+        if isinstance(value, str):
+            if value.strip():
+                out.append(value.strip())
+        elif isinstance(value, list):
+            out.extend(_texts(*value))
+        elif isinstance(value, dict):
+            out.extend(_texts(value.get("name"), value.get("name_en"), value.get("name_zh"),
+                              value.get("raw")))
+    return out
+
+
+def _entity_fields(kind: str, record: dict) -> tuple:
+    """Return the indexed (title, authors, orgs, venue, year) of a record; names count as titles."""
+    r = record
+    authors = orgs = venue = []
+    year = r.get("year")
+    if kind == "paper":
+        title = _texts(r.get("title"), r.get("title_zh"))
+        people = [a for a in r.get("authors") or [] if isinstance(a, dict)]
+        authors = _texts([a.get("name") for a in people], [a.get("name_zh") for a in people])
+        orgs = _texts([a.get("org") for a in people], [a.get("org_zh") for a in people])
+        venue = _texts(r.get("venue"), r.get("raw"))
+    elif kind == "person":
+        title = _texts(r.get("name"), r.get("name_zh"))
+        orgs = _texts(r.get("org"), r.get("org_zh"), r.get("orgs"), r.get("org_zhs"))
+    elif kind == "org":
+        title = _texts(r.get("name"), r.get("name_en"), r.get("name_zh"), r.get("org_name"),
+                       r.get("acronyms"), r.get("aliases"))
+    elif kind == "venue":
+        title = _texts(r.get("name"), r.get("name_en"), r.get("name_zh"))
+    else:
+        title = _texts(r.get("title"), r.get("title_zh"), r.get("en"))
+        authors = _texts(r.get("inventor"))
+        orgs = _texts(r.get("assignee"))
+        year = r.get("pub_date") or r.get("app_date")
+    year = str(year or "")[:4]
+    return (" | ".join(title), " | ".join(authors), " | ".join(orgs), " | ".join(venue),
+            int(year) if year.isdigit() else None)
+
+
+def _fts_terms(value: str) -> str:
+    """Quote every word of a free-text value as an FTS5 term (all terms must match)."""
+    return " ".join(f'"{term}"' for term in re.findall(r"\w+", value))
+
+
+class EntityStore:
+    """
+    Local SQLite store of every entity record (papers, scholars, orgs, venues, patents)
+    the wrappers return, deduplicated by (kind, ID) and indexed by title/name, author,
+    org, venue (SQLite FTS5 when available, LIKE otherwise) and year. Records returned by
+    several APIs are merged, and the time each API last returned them is kept so
+    stale records can be refetched. The token is never stored.
+
+    With local_first, ID lookups (paper/person/org/venue/patent details, paper_info,
+    patent_info) and title searches (paper_search, patent_search, first page) are answered
+    from the store when every record is present and younger than max_age.
+    """
+
+    def __init__(self, path: str = STORE_PATH, max_age: float = STORE_MAX_AGE_SECONDS,
+                 local_first: bool = False):
+        self.path = path
+        self.max_age = max_age
+        self.local_first = local_first
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entities ("
+            " kind TEXT NOT NULL, id TEXT NOT NULL, record TEXT NOT NULL,"
+            " title TEXT, authors TEXT, orgs TEXT, venue TEXT, year INTEGER,"
+            " sources TEXT NOT NULL, updated REAL NOT NULL, PRIMARY KEY (kind, id))")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entities_year ON entities (kind, year)")
+        # Whether each API returns `data` as a list, so local answers keep the same shape
+        self._db.execute("CREATE TABLE IF NOT EXISTS shapes (path TEXT PRIMARY KEY, is_list INTEGER NOT NULL)")
+        try:
+            self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(title, authors, orgs, venue)")
+            self.fts = True
+        except sqlite3.OperationalError:  # SQLite built without FTS5
+            self.fts = False
+
+    def record(self, path: str, response: Any) -> int:
+        """Store the entity records of one successful response; returns how many were written."""
+        kind = STORE_ENTITY_KINDS.get(path)
+        data = response.get("data") if isinstance(response, dict) else None
+        if kind is None or not isinstance(data, (list, dict)):
+            return 0
+        now = time.time()
+        written = 0
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("INSERT OR REPLACE INTO shapes (path, is_list) VALUES (?, ?)",
+                                 (path, int(isinstance(data, list))))
+                for record in data if isinstance(data, list) else [data]:
+                    if isinstance(record, dict):
+                        written += self._upsert_locked(kind, record, path, now)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._stats["writes"] += written
+        return written
+
+    def _upsert_locked(self, kind: str, record: dict, path: str, now: float) -> int:
+        entity_id = next((record[f] for f in _STORE_ID_FIELDS[kind]
+                          if isinstance(record.get(f), str) and record[f]), None)
+        if entity_id is None:
+            return 0
+        row = self._db.execute("SELECT rowid, record, sources FROM entities WHERE kind = ? AND id = ?",
+                               (kind, entity_id)).fetchone()
+        merged, sources = ({}, {}) if row is None else (json.loads(row[1]), json.loads(row[2]))
+        merged.update({k: v for k, v in record.items() if v not in (None, "", [], {})})
+        sources[path] = now
+        fields = _entity_fields(kind, merged)
+        values = (json.dumps(merged, ensure_ascii=False), *fields, json.dumps(sources), now)
+        if row is None:
+            rowid = self._db.execute(
+                "INSERT INTO entities (record, title, authors, orgs, venue, year, sources, updated, kind, id)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", values + (kind, entity_id)).lastrowid
+        else:
+            rowid = row[0]
+            self._db.execute(
+                "UPDATE entities SET record = ?, title = ?, authors = ?, orgs = ?, venue = ?, year = ?,"
+                " sources = ?, updated = ? WHERE rowid = ?", values + (rowid,))
+            if self.fts:
+                self._db.execute("DELETE FROM entities_fts WHERE rowid = ?", (rowid,))
+        if self.fts:
+            self._db.execute("INSERT INTO entities_fts (rowid, title, authors, orgs, venue) VALUES (?, ?, ?, ?, ?)",
+                             (rowid, *fields[:4]))
+        return 1
+
+    def get(self, kind: str, entity_id: str, sources: Optional[tuple] = None,
+            max_age: Optional[float] = None) -> Optional[dict]:
+        """
+        Return the stored record, or None when it is missing or, with `sources`, when none
+        of those APIs returned it within max_age seconds.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT record, sources FROM entities WHERE kind = ? AND id = ?",
+                                   (kind, entity_id)).fetchone()
+        if row is None:
+            return None
+        if sources is not None:
+            fetched = json.loads(row[1])
+            newest = max((fetched.get(p, 0) for p in sources), default=0)
+            if not newest or (max_age is not None and time.time() - newest > max_age):
+                return None
+        return json.loads(row[0])
+
+    def search(self, text: str = None, title: str = None, author: str = None, org: str = None,
+               venue: str = None, year: Optional[int] = None, kind: str = None,
+               limit: int = 20, max_age: Optional[float] = None) -> list:
+        """
+        Query the index; every given filter must match (text searches all indexed columns).
+        Returns [{"kind", "id", "record"}], best full-text matches first.
+        """
+        filters = list(zip(_STORE_TEXT_COLUMNS, (title, author, org, venue)))
+        where, args = [], []
+        use_fts = self.fts and any(_fts_terms(v or "") for v in (text, title, author, org, venue))
+        if use_fts:
+            match = [f"{col} : ({_fts_terms(v)})" for col, v in filters if v and _fts_terms(v)]
+            if text and _fts_terms(text):
+                match.append(f"({_fts_terms(text)})")
+            sql = ("SELECT e.kind, e.id, e.record FROM entities_fts f JOIN entities e ON e.rowid = f.rowid"
+                   " WHERE entities_fts MATCH ?")
+            args.append(" AND ".join(match))
+        else:
+            sql = "SELECT e.kind, e.id, e.record FROM entities e WHERE 1 = 1"
+            for col, value in filters:
+                for term in re.findall(r"\w+", value or ""):
+                    where.append(f"e.{col} LIKE ?")
+                    args.append(f"%{term}%")
+            for term in re.findall(r"\w+", text or ""):
+                where.append("(" + " OR ".join(f"e.{col} LIKE ?" for col in _STORE_TEXT_COLUMNS) + ")")
+                args.extend([f"%{term}%"] * len(_STORE_TEXT_COLUMNS))
+        if kind:
+            where.append("e.kind = ?")
+            args.append(kind)
+        if year is not None:
+            where.append("e.year = ?")
+            args.append(year)
+        if max_age is not None:
+            where.append("e.updated >= ?")
+            args.append(time.time() - max_age)
+        sql += "".join(f" AND {clause}" for clause in where)
+        sql += " ORDER BY f.rank" if use_fts else " ORDER BY e.updated DESC"
+        sql += " LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [{"kind": k, "id": i, "record": json.loads(r)} for k, i, r in rows]
+
+    def answer(self, path: str, params: Optional[dict], body: Optional[dict]) -> Optional[dict]:
+        """Build a --local_first response for this call from the store, or None to go to the network."""
+        args = {**(params or {}), **(body or {})}
+        if path in _STORE_LOOKUPS:
+            kind, field, sources = _STORE_LOOKUPS[path]
+            value = args.get(field)
+            ids = value if isinstance(value, list) else [value]
+            if not ids or not all(isinstance(i, str) and i for i in ids):
+                return None
+            records = [self.get(kind, i, sources, self.max_age) for i in ids]
+            if any(r is None for r in records):
+                data = None
+            elif field == "ids" or self._is_list(path, sources):
+                data = records
+            else:
+                data = records[0]
+        elif path in _STORE_SEARCHES and not args.get("page"):
+            kind, field = _STORE_SEARCHES[path]
+            if not args.get(field):
+                return None
+            hits = self.search(title=args[field], kind=kind, limit=int(args.get("size") or 10),
+                               max_age=self.max_age)
+            data = [hit["record"] for hit in hits] or None
+        else:
+            return None
+
+        with self._lock:
+            self._stats["misses" if data is None else "hits"] += 1
+        if data is None:
+            return None
+        result = {"code": 200, "success": True, "msg": "", "data": data, "local": True}
+        if isinstance(data, list):
+            result["total"] = len(data)
+        return result
+
+    def _is_list(self, path: str, sources: tuple) -> bool:
+        with self._lock:
+            shapes = dict(self._db.execute("SELECT path, is_list FROM shapes").fetchall())
+        for p in (path, *sources):
+            if p in shapes:
+                return bool(shapes[p])
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        """Return local-answer hits/misses and records written in this process, plus the stored count."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entities"] = self._db.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+        return stats
+
+
+_entity_store: Optional[EntityStore] = None
+
+
+def get_store() -> Optional[EntityStore]:
+    """Return the active entity store, or None when it is disabled (the library default)."""
+    return _entity_store
+
+
+def configure_store(path: Optional[str] = STORE_PATH, max_age: float = STORE_MAX_AGE_SECONDS,
+                    local_first: bool = False) -> Optional[EntityStore]:
+    """Record every returned entity in a local store (path=None disables it); see EntityStore."""
+    global _entity_store
+    old, _entity_store = _entity_store, None
+    if old is not None:
+        old.close()
+    if path is not None:
+        _entity_store = EntityStore(path, max_age, local_first)
+    return _entity_store
+
+
+def _store_answer(path: str, params: Optional[dict], body: Optional[dict]) -> Optional[dict]:
+    store = _entity_store
+    if store is None or not store.local_first:
+        return None
+    return store.answer(path, params, body)
+
+
+def _store_record(path: str, result: Any) -> None:
+    store = _entity_store
+    if store is not None and _cacheable(result, True):
+        store.record(path, result)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Org Alias Index
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _normalize_org(name: Any) -> str:
+    """Case-, width- and punctuation-folded org name with common abbreviations expanded."""
+    text = unicodedata.normalize("NFKC", str(name or "")).lower()
+    return " ".join(ORG_ALIAS_ABBREVIATIONS.get(w, w) for w in re.findall(r"\w+|&", text) if w != "the")
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _same_org_words(key: str, alias: str) -> bool:
+    """
+    Whether two normalized names have the same words in the same order (stopwords aside),
+    allowing a typo only in structural words ("universty"), never in the distinguishing
+    ones: "beijing" / "harbin", "ustb" / "ustc" and an extra "social" all differ.
+    """
+    words = [w for w in key.split() if w not in ORG_ALIAS_STOPWORDS]
+    other = [w for w in alias.split() if w not in ORG_ALIAS_STOPWORDS]
+    return len(words) == len(other) and all(
+        a == b or (b in ORG_ALIAS_STRUCTURAL_WORDS and
+                   difflib.SequenceMatcher(None, a, b).ratio() >= ORG_ALIAS_TYPO_SIMILARITY)
+        for a, b in zip(words, other))
+
+
+class OrgAliasIndex:
+    """
+    Persistent map from org name variants to org IDs, learned from every org_disambiguate_pro
+    and org_search response: the query string and the canonical names returned both become
+    aliases of the resolved ID (a disambiguation result is never overridden by a search one).
+
+    Lookups run in memory: the normalized name (_normalize_org: "Tsinghua Univ." and
+    "TSINGHUA UNIVERSITY" are the same key). With `min_similarity` below 1, a name without
+    an exact key falls back to the most similar alias (difflib ratio) among those sharing
+    the most character trigrams; that match is trusted ("tokens") only if _same_org_words
+    holds, and is otherwise returned as a "candidate" that the caller must confirm (the
+    workflows check that a free org_search returns its ID). Backed by SQLite, so later runs
+    and other processes start with everything learned so far.
+    """
+
+    def __init__(self, path: str = ORG_ALIAS_PATH, min_similarity: float = ORG_ALIAS_MIN_SIMILARITY):
+        self.path = path
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._aliases: dict = {}   # normalized alias -> (org_id, name, source)
+        self._grams: dict = {}     # trigram -> set of normalized aliases
+        self._stats = {"hits": 0, "fuzzy_hits": 0, "candidates": 0, "misses": 0, "learned": 0}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS org_aliases ("
+            " alias TEXT PRIMARY KEY, org_id TEXT NOT NULL, name TEXT, source TEXT NOT NULL,"
+            " updated REAL NOT NULL)")
+        for alias, org_id, name, source in self._db.execute(
+                "SELECT alias, org_id, name, source FROM org_aliases"):
+            self._index_locked(alias, (org_id, name, source))
+
+    def _index_locked(self, alias: str, entry: tuple) -> None:
+        if alias not in self._aliases:
+            for gram in _trigrams(alias):
+                self._grams.setdefault(gram, set()).add(alias)
+        self._aliases[alias] = entry
+
+    def lookup(self, name: str) -> Optional[dict]:
+        """
+        {"org_id", "name", "alias", "similarity", "match"} of the best matching alias, or None;
+        "match" is "exact", "tokens" (a trusted fuzzy match) or "candidate" (unconfirmed).
+        """
+        query = _normalize_org(name)
+        if not query:
+            return None
+        with self._lock:
+            key, similarity, match = query, 1.0, "exact"
+            entry = self._aliases.get(key)
+            if entry is None and self.min_similarity < 1.0:
+                key, similarity = self._fuzzy_locked(query)
+                entry = self._aliases.get(key)
+                match = "tokens" if entry is not None and _same_org_words(query, key) else "candidate"
+            self._stats["misses" if entry is None else {"exact": "hits", "tokens": "fuzzy_hits",
+                                                         "candidate": "candidates"}[match]] += 1
+        if entry is None:
+            return None
+        return {"org_id": entry[0], "name": entry[1], "alias": key, "similarity": round(similarity, 3),
+                "match": match}
+
+    def _fuzzy_locked(self, key: str) -> tuple:
+        grams = _trigrams(key)
+        shared: dict = {}
+        for gram in grams:
+            for alias in self._grams.get(gram, ()):
+                shared[alias] = shared.get(alias, 0) + 1
+        # Trigrams only shortlist: they ignore word order ("Washington University" shares
+        # nearly all of them with "University of Washington"), the sequence ratio does not
+        shortlist = heapq.nlargest(ORG_ALIAS_SHORTLIST, shared,
+                                   key=lambda a: 2 * shared[a] / (len(grams) + len(_trigrams(a))))
+        best, best_score = None, 0.0
+        for alias in shortlist:
+            score = difflib.SequenceMatcher(None, key, alias).ratio()
+            if score > best_score:
+                best, best_score = alias, score
+        return (best, best_score) if best_score >= self.min_similarity else (None, 0.0)
+
+    def learn(self, alias: str, org_id: str, name: Optional[str] = None, source: str = "search") -> None:
+        """Map `alias` to `org_id` ("disambiguation" sources take precedence over "search")."""
+        key = _normalize_org(alias)
+        if not key or not org_id:
+            return
+        with self._lock:
+            old = self._aliases.get(key)
+            if old is not None and (old[0] == org_id or (old[2] == "disambiguation" and source == "search")):
+                return
+            self._index_locked(key, (org_id, name, source))
+            self._db.execute(
+                "INSERT OR REPLACE INTO org_aliases (alias, org_id, name, source, updated) VALUES (?, ?, ?, ?, ?)",
+                (key, org_id, name, source, time.time()))
+            self._stats["learned"] += 1
+
+    def learn_response(self, path: str, body: dict, result: dict) -> None:
+        """Learn the aliases an org_disambiguate_pro / org_search response establishes."""
+        data = result.get("data")
+        records = data if isinstance(data, list) else [data] if isinstance(data, dict) else []
+        if path == API_PATHS["org_disambiguate_pro"]:
+            org_id = _org_id_from_disambiguation(result)
+            if org_id and body.get("org"):
+                self.learn(body["org"], org_id, records[0].get("一级") or records[0].get("二级"), "disambiguation")
+            for record in records:
+                for level in ("一级", "二级"):
+                    if record.get(level) and record.get(level + "ID"):
+                        self.learn(record[level], record[level + "ID"], record[level], "disambiguation")
+        elif path == API_PATHS["org_search"]:
+            records = [r for r in records if isinstance(r, dict) and r.get("org_id")]
+            for record in records:
+                if record.get("org_name"):
+                    self.learn(record["org_name"], record["org_id"], record["org_name"])
+            queries = body.get("orgs") or []
+            if len(queries) == 1 and records:  # several queries: which result answers which is unknown
+                self.learn(queries[0], records[0]["org_id"], records[0].get("org_name"))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "aliases": len(self._aliases)}
+
+
+_org_alias_index: Optional[OrgAliasIndex] = None
+
+
+def get_org_alias_index() -> Optional[OrgAliasIndex]:
+    """Return the active org alias index, or None when it is disabled (the library default)."""
+    return _org_alias_index
+
+
+def configure_org_aliases(path: Optional[str] = ORG_ALIAS_PATH,
+                          min_similarity: float = ORG_ALIAS_MIN_SIMILARITY) -> Optional[OrgAliasIndex]:
+    """Learn org aliases from every org disambiguation/search response; path=None disables the index."""
+    global _org_alias_index
+    old, _org_alias_index = _org_alias_index, None
+    if old is not None:
+        old.close()
+    if path is not None:
+        _org_alias_index = OrgAliasIndex(path, min_similarity)
+    return _org_alias_index
+
+
+def _learn_org_aliases(path: str, body: Optional[dict], result: Any) -> None:
+    index = _org_alias_index
+    if index is not None and path in (API_PATHS["org_disambiguate_pro"], API_PATHS["org_search"]) \
+            and isinstance(result, dict) and _cacheable(result, True):
+        index.learn_response(path, body or {}, result)
+
+
+def _org_alias_lookup(org: str) -> Optional[dict]:
+    index = _org_alias_index
+    match = index.lookup(org) if index is not None else None
+    if match is not None:
+        print(f"      Alias index: {match['name'] or match['alias']} "
+              f"(similarity={match['similarity']}, {match['match']}), ID={match['org_id']}", file=sys.stderr)
+    return match
+
+
+def _search_confirms(search_r: Any, org_id: Optional[str]) -> bool:
+    """Whether an org_search response lists `org_id` (confirming an alias candidate)."""
+    data = search_r.get("data") if isinstance(search_r, dict) else None
+    return bool(org_id) and isinstance(data, list) and any(
+        isinstance(r, dict) and r.get("org_id") == org_id for r in data)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# In-Process Memoization (single-flight)
+# ──────────────────────────────────────────────────────────────────────────────
+
+class _Flight:
+    """One in-flight call that concurrent identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.frozen: Optional[str] = None
+        self.ok = False
+        self.error: Optional[BaseException] = None
+
+
+class RequestMemo:
+    """
+    In-memory layer underneath every wrapper once configure_memo() enables it (the CLI
+    does; library calls are not memoized by default): a bounded LRU of successful responses
+    plus single-flight coalescing, so concurrent identical requests share one HTTP call.
+
+    Values are kept JSON-serialized and every caller gets its own decoded copy, so a
+    workflow that annotates a response dict cannot leak into other callers.
+    """
+
+    def __init__(self, max_entries: int = MEMO_MAX_ENTRIES, ttl: float = MEMO_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (stored_at, frozen_json)
+        self._inflight: dict = {}                   # key -> _Flight
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    @staticmethod
+    def _freeze(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    def _get_locked(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put_locked(self, key: str, frozen: str) -> None:
+        self._entries[key] = (time.monotonic(), frozen)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the memoized response, or None (callers count the outcome via record())."""
+        with self._lock:
+            frozen = self._get_locked(key)
+        return None if frozen is None else json.loads(frozen)
+
+    def record(self, event: str) -> None:
+        """Count a "hits" / "misses" / "coalesced" event observed outside call()."""
+        with self._lock:
+            self._stats[event] += 1
+
+    def put(self, key: str, value: Any) -> None:
+        frozen = self._freeze(value)
+        with self._lock:
+            self._put_locked(key, frozen)
+
+    def call(self, key: str, fetch) -> tuple:
+        """
+        Return fetch()'s (result, ok) for key. A fresh memoized result is returned
+        directly; if an identical call is already running, wait for it and share its result.
+        """
+        with self._lock:
+            frozen = self._get_locked(key)
+            if frozen is not None:
+                self._stats["hits"] += 1
+                return json.loads(frozen), True
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return json.loads(flight.frozen), flight.ok
+
+        try:
+            result, ok = fetch()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+            raise
+        flight.frozen, flight.ok = self._freeze(result), ok
+        with self._lock:
+            del self._inflight[key]
+            if _cacheable(result, ok):
+                self._put_locked(key, flight.frozen)
+        flight.done.set()
+        return result, ok
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+
+_request_memo: Optional[RequestMemo] = None
+
+
+def get_memo() -> Optional[RequestMemo]:
+    """Return the in-process memo layer, or None when it is disabled (the library default)."""
+    return _request_memo
+
+
+def configure_memo(max_entries: int = MEMO_MAX_ENTRIES,
+                   ttl: float = MEMO_TTL_SECONDS) -> Optional[RequestMemo]:
+    """Enable (or replace) the in-process memo layer; max_entries <= 0 disables memoization and coalescing."""
+    global _request_memo
+    _request_memo = RequestMemo(max_entries, ttl) if max_entries > 0 else None
+    return _request_memo
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Rate Limiting (token bucket + AIMD concurrency)
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _endpoint_class(path: str) -> str:
+    return "free" if API_PRICES.get(path, 0.0) == 0.0 else "paid"
+
+
+def _retry_after_seconds(resp: Optional[_HTTPResponse]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    value = resp.headers.get("Retry-After") if resp is not None and resp.headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens/second up to `burst` tokens."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take one token (possibly going into debt); return how long to wait before using it."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Process-wide limiter shared by every request thread (and the async client) once
+    configure_rate_limiter() enables it; the CLI does unless --no_rate_limit is given.
+
+    - A token bucket per endpoint class caps the request rate.
+    - AIMD adaptive concurrency caps requests in flight: the limit grows by 1/limit
+      per successful response and halves on a 429/503, so parallel callers back off
+      together instead of each hammering the gateway on its own schedule.
+    - A Retry-After header pauses every caller until the gateway says to resume.
+    """
+
+    def __init__(self, rates: Optional[dict] = None,
+                 max_concurrency: int = RATE_MAX_CONCURRENCY,
+                 min_concurrency: int = RATE_MIN_CONCURRENCY):
+        self.rates = rates = RATE_LIMITS if rates is None else rates
+        self._buckets = {cls: TokenBucket(rate, burst)
+                         for cls, (rate, burst) in rates.items() if rate}
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters: list = []  # (loop, future) of coroutines waiting for a slot
+        self._stats = {"throttled": 0, "decreases": 0, "retry_after_pauses": 0, "wait_seconds": 0.0}
+
+    def reserve(self, path: str) -> float:
+        """Take a rate token for `path`; return how long the caller must wait before sending."""
+        with self._cond:
+            wait = max(0.0, self._paused_until - time.monotonic())
+            bucket = self._buckets.get(_endpoint_class(path))
+            if bucket is not None:
+                wait = max(wait, bucket.reserve())
+            self._stats["wait_seconds"] += wait
+            return wait
+
+    async def enter_async(self) -> None:
+        """Take a concurrency slot without blocking the event loop (the async client's acquire)."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._in_flight < max(1, int(self.limit)):
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter  # resolved by the next release()
+
+    def acquire(self, path: str) -> None:
+        """Block until `path` may be sent: rate token, Retry-After pause and a concurrency slot."""
+        wait = self.reserve(path)
+        if wait > 0:
+            time.sleep(wait)
+        with self._cond:
+            while self._in_flight >= max(1, int(self.limit)):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, resp: Optional[_HTTPResponse]) -> None:
+        """Return the concurrency slot and adapt the limit to the response (None = network error)."""
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if resp is not None and resp.status in THROTTLE_HTTP_STATUS:
+                self._stats["throttled"] += 1
+                if now - self._last_decrease >= RATE_DECREASE_INTERVAL_SECONDS:
+                    self.limit = max(float(self.min_concurrency), self.limit / 2)
+                    self._last_decrease = now
+                    self._stats["decreases"] += 1
+                retry_after = _retry_after_seconds(resp)
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+                    self._stats["retry_after_pauses"] += 1
+            elif resp is not None and 200 <= resp.status < 300:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            with contextlib.suppress(RuntimeError):  # that loop has closed
+                loop.call_soon_threadsafe(_wake_waiter, waiter)
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["concurrency_limit"] = round(self.limit, 2)
+            stats["in_flight"] = self._in_flight
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
+
+
+def _wake_waiter(waiter) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Return the shared rate limiter, or None when client-side limiting is disabled (the library default)."""
+    return _rate_limiter
+
+
+def configure_rate_limiter(rates: Optional[dict] = None,
+                           max_concurrency: int = RATE_MAX_CONCURRENCY,
+                           min_concurrency: int = RATE_MIN_CONCURRENCY,
+                           enabled: bool = True) -> Optional[RateLimiter]:
+    """Enable (or replace) the shared rate limiter; rates maps endpoint class -> (requests/second, burst)."""
+    global _rate_limiter
+    _rate_limiter = RateLimiter(rates, max_concurrency, min_concurrency) if enabled else None
+    with _token_pools_lock:
+        _token_pools.clear()  # their per-token limiters copy the shared one
+    return _rate_limiter
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Token Pool (several accounts behind one client)
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _quota_exhausted(resp: Optional[_HTTPResponse], result: Any) -> bool:
+    """Whether an attempt failed because the token's balance or quota is used up."""
+    if resp is not None and resp.status in TOKEN_EXHAUSTED_HTTP_STATUS:
+        return True
+    if not isinstance(result, dict) or result.get("success") is not False:
+        return False
+    return bool(TOKEN_EXHAUSTED_PATTERN.search(f"{result.get('msg')} {result.get('error')}"))
+
+
+class _TokenSlot:
+    """One token of a TokenPool with its limiter and counters; repr never shows the token."""
+
+    def __init__(self, label: str, token: str, limiter: Optional[RateLimiter]):
+        self.label = label
+        self.token = token
+        self.limiter = limiter
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.exhausted = 0
+        self.drained_until = 0.0
+
+    def __repr__(self) -> str:
+        return f"<token {self.label}>"
+
+    def headers(self, headers: dict) -> dict:
+        return {**headers, "Authorization": self.token}
+
+
+class TokenPool:
+    """
+    Several API tokens (accounts) serving one client. Each network attempt leases a token:
+    the least loaded one (in flight relative to its adaptive concurrency limit, then fewest
+    requests so far) or the next in round-robin order. Each token sends under its own copy
+    of the shared RateLimiter, so request rates, AIMD backoff and Retry-After pauses are
+    per account and throughput grows with the number of tokens.
+
+    A 429 drains the token for TOKEN_THROTTLE_DRAIN_SECONDS (or its longer Retry-After), a
+    balance/quota error for TOKEN_EXHAUSTED_DRAIN_SECONDS; drained tokens are skipped while
+    any other is live, and the failed attempt is retried at once on another token. Tokens
+    are identified by position (#1, #2, ...) only, never in clear.
+    """
+
+    def __init__(self, tokens: list, strategy: str = TOKEN_POOL_STRATEGY,
+                 limiter: Optional[RateLimiter] = None):
+        if strategy not in ("least_loaded", "round_robin"):
+            raise ValueError(f"unknown token pool strategy: {strategy}")
+        self.strategy = strategy
+        self._slots = [
+            _TokenSlot(f"#{i}", token, None if limiter is None else
+                       RateLimiter(limiter.rates, limiter.max_concurrency, limiter.min_concurrency))
+            for i, token in enumerate(tokens, 1)
+        ]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def acquire(self) -> _TokenSlot:
+        """Lease a token for one attempt; every lease must be given back with release()."""
+        with self._lock:
+            now = time.monotonic()
+            live = [slot for slot in self._slots if slot.drained_until <= now]
+            if not live:  # everything drained: the one that recovers first
+                live = [min(self._slots, key=lambda slot: slot.drained_until)]
+            if self.strategy == "round_robin":
+                slot = live[self._next % len(live)]
+                self._next += 1
+            else:
+                slot = min(live, key=lambda s: (s.in_flight / (s.limiter.limit if s.limiter else 1.0),
+                                                s.requests))
+            slot.in_flight += 1
+            slot.requests += 1
+            return slot
+
+    def release(self, slot: _TokenSlot, resp: Optional[_HTTPResponse], result: Any = None) -> bool:
+        """Return a lease; True when the attempt drained its token and another token is live."""
+        with self._lock:
+            slot.in_flight -= 1
+            now = time.monotonic()
+            if resp is not None and resp.status == 429:
+                slot.throttled += 1
+                drain = max(TOKEN_THROTTLE_DRAIN_SECONDS, _retry_after_seconds(resp) or 0.0)
+            elif _quota_exhausted(resp, result):
+                slot.exhausted += 1
+                drain = TOKEN_EXHAUSTED_DRAIN_SECONDS
+            else:
+                return False
+            slot.drained_until = max(slot.drained_until, now + drain)
+            return any(other.drained_until <= now for other in self._slots)
+
+    def stats(self) -> list:
+        with self._lock:
+            now = time.monotonic()
+            return [{"token": slot.label, "requests": slot.requests, "in_flight": slot.in_flight,
+                     "throttled": slot.throttled, "exhausted": slot.exhausted,
+                     "drained_seconds": round(max(0.0, slot.drained_until - now), 1)}
+                    for slot in self._slots]
+
+
+_token_pools: dict = {}   # comma-separated token string -> TokenPool
+_token_pool_strategy = TOKEN_POOL_STRATEGY
+_token_pools_lock = threading.Lock()
+
+
+def get_token_pool(token: str) -> Optional[TokenPool]:
+    """
+    The TokenPool serving `token` when it lists several comma-separated tokens (created on
+    first use, then shared by every call made with the same list), else None.
+    """
+    if "," not in token:
+        return None
+    with _token_pools_lock:
+        pool = _token_pools.get(token)
+        if pool is None:
+            tokens = list(dict.fromkeys(t.strip() for t in token.split(",") if t.strip()))
+            pool = _token_pools[token] = TokenPool(tokens, _token_pool_strategy, _rate_limiter)
+        return pool
+
+
+def configure_token_pool(strategy: str = TOKEN_POOL_STRATEGY) -> None:
+    """Set how pooled tokens are picked ("least_loaded" or "round_robin"); existing pools are dropped."""
+    global _token_pool_strategy
+    if strategy not in ("least_loaded", "round_robin"):
+        raise ValueError(f"unknown token pool strategy: {strategy}")
+    with _token_pools_lock:
+        _token_pool_strategy = strategy
+        _token_pools.clear()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Tail Latency (workflow deadlines + hedged requests)
+# ──────────────────────────────────────────────────────────────────────────────
+
+# time.monotonic() by which the current workflow must finish (None = no deadline)
+_deadline = contextvars.ContextVar("_deadline", default=None)
+
+
+@contextlib.contextmanager
+def workflow_deadline(seconds: Optional[float]):
+    """
+    Bound every API call made inside the block, including those of workflow stages on
+    worker threads, to `seconds` of wall time: connect/read timeouts are capped by the
+    time left, retries that would not finish in time are dropped, and calls started
+    after the deadline fail fast with {"msg": "deadline_exceeded"}. A nested deadline
+    never extends the outer one; None leaves the current deadline in place.
+
+        with workflow_deadline(20):
+            profile = workflow_scholar_profile(token, "Andrew Ng")
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    reset_token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(reset_token)
+
+
+def _time_left() -> Optional[float]:
+    """Seconds until the current workflow deadline, or None when there is none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _attempt_timeouts(transport) -> Optional[tuple]:
+    """(read_timeout, connect_timeout) for the next attempt, capped by the deadline; None once it has passed."""
+    read, connect = transport.read_timeout, transport.connect_timeout
+    left = _time_left()
+    if left is None:
+        return read, connect
+    if left <= 0:
+        return None
+    return min(read, left), min(connect, left)
+
+
+def _deadline_result() -> dict:
+    return _error_result(-1, "deadline_exceeded", "workflow deadline reached", False)
+
+
+def _map_in_context(pool: "futures.ThreadPoolExecutor", fn, items) -> list:
+    """
+    pool.map(fn, items) with each call run in a copy of the caller's context: worker
+    threads do not inherit contextvars, and the workflow deadline is one.
+    """
+    futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def _start_thread(fn) -> "futures.Future":
+    """Run fn() on a new daemon thread (so a stalled loser never delays exit); returns its Future."""
+    future = futures.Future()
+
+    def run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+    threading.Thread(target=run, name="aminer-hedge", daemon=True).start()
+    return future
+
+
+class RequestHedger:
+    """
+    Hedged requests against slow tails: when an attempt on a hedged endpoint has not
+    answered after the `quantile` latency recently seen on that endpoint (`default_delay`
+    until HEDGE_MIN_SAMPLES calls have been timed), an identical request is sent and the
+    first 2xx answer wins. In the blocking client the losing copy finishes in the
+    background and is discarded; the async client cancels it. Each copy passes the rate
+    limiter on its own. `paths` are the endpoints that may be hedged: by default the free
+    ones (plus the paid ones with include_paid, which bills every copy sent: under a cost
+    budget the copy's price is reserved too, and a paid call is not hedged without room for it).
+    """
+
+    def __init__(self, quantile: float = HEDGE_QUANTILE, paths: Optional[list] = None,
+                 include_paid: bool = False,
+                 default_delay: float = HEDGE_DEFAULT_DELAY_SECONDS,
+                 min_delay: float = HEDGE_MIN_DELAY_SECONDS,
+                 window: int = HEDGE_WINDOW):
+        if paths is None:
+            paths = [path for path, price in API_PRICES.items() if include_paid or price == 0.0]
+        self.paths = frozenset(paths)
+        self.quantile = quantile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.window = window
+        self._latencies: dict = {}  # path -> deque of recent 2xx latencies (seconds)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hedged": 0, "hedge_wins": 0}
+
+    def delay(self, path: str) -> float:
+        """How long an attempt on `path` may run before it is hedged."""
+        with self._lock:
+            samples = sorted(self._latencies.get(path, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return self.default_delay
+        return max(self.min_delay, _percentile(samples, self.quantile))
+
+    def _count(self, event: str) -> None:
+        with self._lock:
+            self._stats[event] += 1
+
+    def _observe(self, path: str, resp, start: float) -> None:
+        if 200 <= resp.status < 300:
+            with self._lock:
+                window = self._latencies.get(path)
+                if window is None:
+                    window = self._latencies[path] = deque(maxlen=self.window)
+                window.append(time.perf_counter() - start)
+
+    def _timed(self, path: str, send) -> _HTTPResponse:
+        start = time.perf_counter()
+        resp = send()
+        self._observe(path, resp, start)
+        return resp
+
+    @staticmethod
+    def _winner(done, fallback) -> tuple:
+        """(2xx response, its future) among finished copies, else (None, last non-2xx response or error)."""
+        for future in done:
+            if future.exception() is not None:
+                fallback = fallback if fallback is not None else future.exception()
+                continue
+            resp = future.result()
+            if 200 <= resp.status < 300:
+                return resp, future
+            fallback = resp
+        return None, fallback
+
+    @staticmethod
+    def _copy_budget(path: str) -> Optional["CostBudget"]:
+        """The cost budget a hedge copy of `path` is billed against (None for free calls or no budget)."""
+        budget = _cost_budget
+        return budget if budget is not None and API_PRICES.get(path, 0.0) else None
+
+    @staticmethod
+    def _settle_copy(budget: "CostBudget", path: str, copy) -> None:
+        # A copy cancelled in flight may still have been answered (and billed)
+        billed = copy.cancelled() or (copy.exception() is None and 200 <= copy.result().status < 300)
+        budget.settle(path, billed)
+
+    def request(self, path: str, send) -> _HTTPResponse:
+        """Return send()'s response, hedged with a second send() if the first is slow; raises if both fail."""
+        self._count("requests")
+        primary = _start_thread(partial(self._timed, path, send))
+        done, _ = futures.wait([primary], timeout=self.delay(path))
+        budget = self._copy_budget(path)
+        if done or (budget is not None and not budget.reserve(path)):
+            return primary.result()
+        self._count("hedged")
+        copy = _start_thread(partial(self._timed, path, send))
+        if budget is not None:
+            copy.add_done_callback(partial(self._settle_copy, budget, path))
+        pending, fallback = {primary, copy}, None
+        while pending:
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            resp, outcome = self._winner(done, fallback)
+            if resp is not None:
+                if outcome is not primary:
+                    self._count("hedge_wins")
+                return resp
+            fallback = outcome
+        if isinstance(fallback, BaseException):
+            raise fallback
+        return fallback
+
+    async def _timed_async(self, path: str, send) -> _HTTPResponse:
+        start = time.perf_counter()
+        resp = await send()
+        self._observe(path, resp, start)
+        return resp
+
+    async def request_async(self, path: str, send) -> _HTTPResponse:
+        """Async request(): send is a coroutine function; the slower copy is cancelled."""
+        self._count("requests")
+        primary = asyncio.ensure_future(self._timed_async(path, send))
+        done, _ = await asyncio.wait([primary], timeout=self.delay(path))
+        budget = self._copy_budget(path)
+        if done or (budget is not None and not budget.reserve(path)):
+            return await primary
+        self._count("hedged")
+        copy = asyncio.ensure_future(self._timed_async(path, send))
+        if budget is not None:
+            copy.add_done_callback(partial(self._settle_copy, budget, path))
+        pending, fallback = {primary, copy}, None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                resp, outcome = self._winner(done, fallback)
+                if resp is not None:
+                    if outcome is not primary:
+                        self._count("hedge_wins")
+                    return resp
+                fallback = outcome
+        finally:
+            for task in pending:
+                task.cancel()
+        if isinstance(fallback, BaseException):
+            raise fallback
+        return fallback
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            paths = list(self._latencies)
+        stats["hedge_rate"] = round(stats["hedged"] / stats["requests"], 4) if stats["requests"] else 0.0
+        stats["delay_ms"] = {path: round(self.delay(path) * 1000, 1) for path in paths}
+        return stats
+
+
+_hedger: Optional[RequestHedger] = None
+
+
+def get_hedger() -> Optional[RequestHedger]:
+    """Return the shared request hedger, or None when hedging is off (the default)."""
+    return _hedger
+
+
+def configure_hedging(enabled: bool = True, quantile: float = HEDGE_QUANTILE,
+                      include_paid: bool = False, paths: Optional[list] = None) -> Optional[RequestHedger]:
+    """Turn hedged requests on (for the free endpoints, or `paths`) or off."""
+    global _hedger
+    _hedger = RequestHedger(quantile, paths, include_paid) if enabled else None
+    return _hedger
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Circuit Breaker (per endpoint: closed / open / half-open)
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _backend_failure(resp: Optional[_HTTPResponse], retryable: bool) -> bool:
+    """
+    Whether an attempt counts against its endpoint's circuit: timeouts, connection errors
+    and 408/5xx do; throttling, client errors and timeouts forced by the workflow
+    deadline do not.
+    """
+    if resp is not None:
+        return resp.status in CIRCUIT_FAILURE_STATUS
+    if not retryable:
+        return False
+    left = _time_left()
+    return left is None or left > 0
+
+
+class _Circuit:
+    """State of one endpoint's circuit."""
+
+    def __init__(self, window: int):
+        self.state = "closed"
+        self.outcomes = deque(maxlen=window)  # True = failed attempt, while closed
+        self.opened_at = 0.0
+        self.trial_started: Optional[float] = None  # half-open trial attempt in flight
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker shared by every request thread (and the async client),
+    so a backend route that is down stops costing each caller MAX_RETRIES attempts.
+
+    - closed: calls go through; the last `window` network attempts are tracked.
+    - open: once `min_calls` of them are tracked and at least `failure_rate` failed
+      (see _backend_failure), every call and retry to the endpoint fails fast with
+      {"msg": "circuit_open"} for `cooldown` seconds.
+    - half-open: after the cooldown one trial attempt goes through; success closes the
+      circuit, failure opens it for another cooldown. A trial that never reports back
+      is replaced after a cooldown, so the circuit cannot stay half-open for good.
+    """
+
+    def __init__(self, failure_rate: float = CIRCUIT_FAILURE_RATE,
+                 min_calls: int = CIRCUIT_MIN_CALLS,
+                 window: int = CIRCUIT_WINDOW,
+                 cooldown: float = CIRCUIT_COOLDOWN_SECONDS):
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.window = max(self.min_calls, window)
+        self.cooldown = cooldown
+        self._circuits: dict = {}  # path -> _Circuit
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "rejected": 0}
+
+    def allow(self, path: str) -> bool:
+        """Whether an attempt on `path` may be sent now (False = fail fast)."""
+        with self._lock:
+            circuit = self._circuits.get(path)
+            if circuit is None or circuit.state == "closed":
+                return True
+            now = time.monotonic()
+            if circuit.state == "open" and now - circuit.opened_at >= self.cooldown:
+                circuit.state, circuit.trial_started = "half_open", None
+            if circuit.state == "half_open" and (circuit.trial_started is None or
+                                                 now - circuit.trial_started >= self.cooldown):
+                circuit.trial_started = now
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record(self, path: str, failed: bool) -> None:
+        """Account the outcome of an attempt allow() let through."""
+        with self._lock:
+            circuit = self._circuits.get(path)
+            if circuit is None:
+                circuit = self._circuits[path] = _Circuit(self.window)
+            if circuit.state == "half_open":
+                if failed:
+                    self._open_locked(path, circuit, "trial call failed")
+                else:
+                    circuit.state, circuit.trial_started = "closed", None
+                    circuit.outcomes.clear()
+                    print(f"[Circuit] {path} closed", file=sys.stderr)
+                return
+            if circuit.state == "open":
+                return  # a straggler sent before the circuit opened
+            circuit.outcomes.append(failed)
+            failures = sum(circuit.outcomes)
+            if len(circuit.outcomes) >= self.min_calls and \
+                    failures >= self.failure_rate * len(circuit.outcomes):
+                self._open_locked(path, circuit, f"{failures}/{len(circuit.outcomes)} attempts failed")
+
+    def _open_locked(self, path: str, circuit: _Circuit, reason: str) -> None:
+        circuit.state, circuit.opened_at, circuit.trial_started = "open", time.monotonic(), None
+        circuit.outcomes.clear()
+        self._stats["opened"] += 1
+        print(f"[Circuit] {path} open for {self.cooldown:g}s ({reason})", file=sys.stderr)
+
+    def rejection(self, path: str) -> dict:
+        """The fail-fast result of a call allow() refused."""
+        with self._lock:
+            circuit = self._circuits.get(path)
+            wait = max(0.0, self.cooldown - (time.monotonic() - circuit.opened_at)) if circuit else 0.0
+        return _error_result(-1, "circuit_open",
+                             f"{path} is failing; calls resume in {wait:.0f}s", True)
+
+    def state(self, path: str) -> str:
+        with self._lock:
+            circuit = self._circuits.get(path)
+            return circuit.state if circuit is not None else "closed"
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open"] = sorted(path for path, circuit in self._circuits.items()
+                                   if circuit.state != "closed")
+        return stats
+
+
+_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """Return the shared circuit breaker, or None when it is disabled (the library default)."""
+    return _circuit_breaker
+
+
+def configure_circuit_breaker(failure_rate: float = CIRCUIT_FAILURE_RATE,
+                              min_calls: int = CIRCUIT_MIN_CALLS,
+                              window: int = CIRCUIT_WINDOW,
+                              cooldown: float = CIRCUIT_COOLDOWN_SECONDS,
+                              enabled: bool = True) -> Optional[CircuitBreaker]:
+    """Enable (or replace) the shared circuit breaker (all circuits start closed)."""
+    global _circuit_breaker
+    _circuit_breaker = CircuitBreaker(failure_rate, min_calls, window, cooldown) if enabled else None
+    return _circuit_breaker
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Instrumentation (per-call records, hooks, stats)
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Network phases timed per attempt; a reused keep-alive connection spends nothing on the first three
+TIMING_PHASES = ("dns", "connect", "tls", "ttfb", "transfer")
+
+
+class CallRecord:
+    """
+    One API call as seen by the call hooks: where the answer came from ("memo", "cache",
+    "store" or "network"; "budget" / "circuit" when it was refused without being sent), the summed phase timings and response bytes of every network
+    attempt, the final HTTP status and the documented price. Never holds the token.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.method, self.path = method.upper(), path
+        self.source = "memo"  # _fetch overwrites this when the call gets past the memo
+        self.streamed = False
+        self.attempts = 0
+        self.status: Optional[int] = None
+        self.bytes = 0
+        self.timings = dict.fromkeys(TIMING_PHASES, 0.0)
+        self.ok = False
+        self.error: Optional[str] = None
+        self.duration = 0.0
+        self._start = time.perf_counter()
+
+    @property
+    def price(self) -> float:
+        return API_PRICES.get(self.path, 0.0)
+
+    @property
+    def cost(self) -> float:
+        """The documented price if the gateway answered the call successfully, else 0."""
+        return self.price if self.source == "network" and self.ok else 0.0
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def add_attempt(self, resp=None) -> None:
+        """Account one network attempt: an _HTTPResponse, a _PooledResponse, or None on error."""
+        self.attempts += 1
+        self.status = resp.status if resp is not None else None
+        if resp is None:
+            return
+        self.bytes += len(resp.body) if isinstance(resp, _HTTPResponse) else resp.bytes_read
+        for phase, seconds in (resp.timings or {}).items():
+            self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    def finish(self, result: Any, ok: bool) -> None:
+        self.duration = time.perf_counter() - self._start
+        self.ok = ok
+        if not ok:
+            self.error = result.get("msg") if isinstance(result, dict) else "unexpected_response"
+
+    def to_dict(self) -> dict:
+        return {
+            "method": self.method, "path": self.path, "source": self.source,
+            "streamed": self.streamed, "ok": self.ok, "status": self.status, "error": self.error,
+            "attempts": self.attempts, "retries": self.retries, "bytes": self.bytes,
+            "duration_ms": round(self.duration * 1000, 3),
+            "timings_ms": {k: round(v * 1000, 3) for k, v in self.timings.items()},
+            "price": self.price, "cost": self.cost,
+        }
+
+
+_call_hooks: list = []
+
+
+def add_call_hook(hook) -> Any:
+    """
+    Register hook(CallRecord), called once per API call (from the calling thread) when it
+    completes. Returns the hook, so it can be used as a decorator.
+    """
+    _call_hooks.append(hook)
+    return hook
+
+
+def remove_call_hook(hook) -> None:
+    if hook in _call_hooks:
+        _call_hooks.remove(hook)
+
+
+def _new_call_record(method: str, path: str) -> Optional[CallRecord]:
+    """A CallRecord for a call about to start, or None when no hook would receive it."""
+    return CallRecord(method, path) if _call_hooks else None
+
+
+def _emit_call(call: Optional[CallRecord], result: Any, ok: bool) -> None:
+    if call is None:
+        return
+    call.finish(result, ok)
+    for hook in list(_call_hooks):
+        try:
+            hook(call)
+        except Exception as e:
+            print(f"[Hook failed] {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def _percentile(values: list, q: float) -> float:
+    """Percentile of an already sorted, non-empty list (nearest index, no interpolation)."""
+    return values[int(q * (len(values) - 1) + 0.5)]
+
+
+class CallStats:
+    """
+    Call hook aggregating CallRecords per API path: calls by source, errors, retries,
+    response bytes and billed cost, plus p50/p95/max latency and the mean of each
+    network phase over the calls that reached the gateway.
+
+        stats = add_call_hook(CallStats())
+        ...
+        print(stats.summary())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths: dict = {}  # path -> counters + network latencies (seconds)
+
+    def __call__(self, call: CallRecord) -> None:
+        with self._lock:
+            entry = self._paths.get(call.path)
+            if entry is None:
+                entry = self._paths[call.path] = {
+                    "calls": 0, "sources": dict.fromkeys(("network", "cache", "store", "memo"), 0),
+                    "errors": 0, "retries": 0, "bytes": 0, "cost": 0.0,
+                    "latencies": [], "phases": dict.fromkeys(TIMING_PHASES, 0.0),
+                }
+            entry["calls"] += 1
+            entry["sources"][call.source] = entry["sources"].get(call.source, 0) + 1
+            entry["errors"] += 0 if call.ok else 1
+            entry["retries"] += call.retries
+            entry["bytes"] += call.bytes
+            entry["cost"] += call.cost
+            if call.source == "network":
+                entry["latencies"].append(call.duration)
+                for phase, seconds in call.timings.items():
+                    entry["phases"][phase] = entry["phases"].get(phase, 0.0) + seconds
+
+    @staticmethod
+    def _summarize(entry: dict) -> dict:
+        latencies = sorted(entry["latencies"])
+        summary = {k: entry[k] for k in ("calls", "errors", "retries", "bytes")}
+        summary.update(entry["sources"])
+        summary["cost"] = round(entry["cost"], 2)
+        if latencies:
+            summary["latency_ms"] = {"p50": round(_percentile(latencies, 0.50) * 1000, 1),
+                                     "p95": round(_percentile(latencies, 0.95) * 1000, 1),
+                                     "max": round(latencies[-1] * 1000, 1)}
+            summary["phases_ms"] = {k: round(v / len(latencies) * 1000, 1)
+                                    for k, v in entry["phases"].items()}
+        return summary
+
+    def summary(self) -> dict:
+        """{"total": {...}, "endpoints": {path: {...}}} with the counters described above."""
+        with self._lock:
+            entries = {path: {**e, "sources": dict(e["sources"]), "latencies": list(e["latencies"]),
+                              "phases": dict(e["phases"])} for path, e in self._paths.items()}
+        total = {"calls": 0, "sources": {}, "errors": 0, "retries": 0, "bytes": 0, "cost": 0.0,
+                 "latencies": [], "phases": dict.fromkeys(TIMING_PHASES, 0.0)}
+        for entry in entries.values():
+            for k in ("calls", "errors", "retries", "bytes", "cost"):
+                total[k] += entry[k]
+            for k, v in entry["sources"].items():
+                total["sources"][k] = total["sources"].get(k, 0) + v
+            total["latencies"].extend(entry["latencies"])
+            for k, v in entry["phases"].items():
+                total["phases"][k] = total["phases"].get(k, 0.0) + v
+        return {"total": self._summarize(total),
+                "endpoints": {path: self._summarize(e) for path, e in sorted(entries.items())}}
+
+    def report(self) -> list:
+        """Summary as printable lines: the run total first, then one line per endpoint."""
+        summary = self.summary()
+        lines = []
+        for name, s in [("total", summary["total"])] + list(summary["endpoints"].items()):
+            if not s["calls"]:
+                continue
+            line = (f"{name} calls={s['calls']} network={s.get('network', 0)} cache={s.get('cache', 0)} "
+                    f"store={s.get('store', 0)} memo={s.get('memo', 0)} errors={s['errors']} "
+                    f"retries={s['retries']} bytes={s['bytes']} cost={s['cost']:.2f}")
+            line += "".join(f" {source}={s[source]}" for source in ("budget", "circuit") if s.get(source))
+            if "latency_ms" in s:
+                lat, ph = s["latency_ms"], s["phases_ms"]
+                line += (f" p50={lat['p50']}ms p95={lat['p95']}ms max={lat['max']}ms "
+                         + " ".join(f"{k}={v}ms" for k, v in ph.items()))
+            lines.append(line)
+        return lines
+
+
+def prometheus_hook(registry=None, namespace: str = "aminer") -> Any:
+    """
+    Call hook exporting to prometheus_client (optional dependency): call/retry/byte/cost
+    counters labelled by API path, and a latency histogram per path and network phase.
+    `registry` defaults to prometheus_client's global REGISTRY.
+    """
+    try:
+        import prometheus_client
+    except ImportError:
+        raise ImportError("prometheus_hook requires prometheus_client "
+                          "(pip install prometheus-client)") from None
+    kwargs = {} if registry is None else {"registry": registry}
+    calls = prometheus_client.Counter(f"{namespace}_calls_total", "AMiner API calls",
+                                      ["path", "source", "outcome"], **kwargs)
+    retries = prometheus_client.Counter(f"{namespace}_retries_total", "AMiner API retries",
+                                        ["path"], **kwargs)
+    received = prometheus_client.Counter(f"{namespace}_response_bytes_total",
+                                         "AMiner API response bytes", ["path"], **kwargs)
+    cost = prometheus_client.Counter(f"{namespace}_cost_total",
+                                     "Documented price (CNY) of successful AMiner API calls",
+                                     ["path"], **kwargs)
+    seconds = prometheus_client.Histogram(f"{namespace}_request_seconds",
+                                          "AMiner API network time by phase", ["path", "phase"],
+                                          **kwargs)
+
+    def hook(call: CallRecord) -> None:
+        calls.labels(call.path, call.source, "ok" if call.ok else "error").inc()
+        if call.source != "network":
+            return
+        retries.labels(call.path).inc(call.retries)
+        received.labels(call.path).inc(call.bytes)
+        cost.labels(call.path).inc(call.cost)
+        seconds.labels(call.path, "total").observe(call.duration)
+        for phase, value in call.timings.items():
+            if value:
+                seconds.labels(call.path, phase).observe(value)
+
+    return hook
+
+
+def otel_hook(meter=None) -> Any:
+    """
+    Call hook recording OpenTelemetry metrics (optional dependency): counters for calls,
+    retries, response bytes and cost, and a duration histogram per path and network phase.
+    `meter` defaults to the global MeterProvider's "aminer_client" meter.
+    """
+    try:
+        from opentelemetry import metrics
+    except ImportError:
+        raise ImportError("otel_hook requires opentelemetry-api (pip install opentelemetry-api)") from None
+    meter = meter or metrics.get_meter("aminer_client")
+    calls = meter.create_counter("aminer.calls", unit="1", description="AMiner API calls")
+    retries = meter.create_counter("aminer.retries", unit="1", description="AMiner API retries")
+    received = meter.create_counter("aminer.response.size", unit="By",
+                                    description="AMiner API response bytes")
+    cost = meter.create_counter("aminer.cost", unit="CNY",
+                                description="Documented price of successful AMiner API calls")
+    duration = meter.create_histogram("aminer.request.duration", unit="s",
+                                      description="AMiner API network time by phase")
+
+    def hook(call: CallRecord) -> None:
+        calls.add(1, {"path": call.path, "source": call.source, "ok": call.ok})
+        if call.source != "network":
+            return
+        retries.add(call.retries, {"path": call.path})
+        received.add(call.bytes, {"path": call.path})
+        cost.add(call.cost, {"path": call.path})
+        duration.record(call.duration, {"path": call.path, "phase": "total"})
+        for phase, value in call.timings.items():
+            if value:
+                duration.record(value, {"path": call.path, "phase": phase})
+
+    return hook
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Cost Budget
+# ──────────────────────────────────────────────────────────────────────────────
+
+_API_NAMES = {path: name for name, path in API_PATHS.items()}
+
+
+class CostBudget:
+    """
+    Spend cap (CNY, at the documented API_PRICES) for every call made while it is configured.
+
+    A paid call reserves its price before it is sent and is refused with a
+    "budget_exceeded" error when that would pass the cap; responses served from the
+    memo, cache or local store cost nothing, and failed calls are refunded. Workflows
+    also consult the budget up front: concurrent stages run in STAGE_PRIORITIES order
+    with what does not fit deferred (then skipped if still unaffordable), and paid calls
+    with a FREE_ALTERNATIVES entry are swapped for the free one. report() lists the
+    spend per API and everything that was skipped or substituted.
+    """
+
+    def __init__(self, limit: float, priorities: Optional[dict] = None):
+        self.limit = float(limit)
+        self.priorities = {**STAGE_PRIORITIES, **(priorities or {})}
+        self._spent = 0.0
+        self._reserved = 0.0
+        self._calls: dict = {}        # api -> {"calls", "cost"}
+        self._skipped: dict = {}      # api -> {"count", "price", "priority"}
+        self._substituted: dict = {}  # (api, alternative) -> count
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def price(api: str) -> float:
+        return API_PRICES.get(API_PATHS.get(api, api), 0.0)
+
+    def priority(self, api: str) -> int:
+        return self.priorities.get(api, 2)
+
+    def remaining(self) -> float:
+        with self._lock:
+            return self.limit - self._spent - self._reserved
+
+    def affordable(self, api: str, count: int = 1) -> bool:
+        return self.price(api) * count <= self.remaining() + 1e-9
+
+    def affordable_count(self, api: str, wanted: int) -> int:
+        """How many of `wanted` calls to `api` fit in what is left."""
+        price = self.price(api)
+        return wanted if price == 0 else max(0, min(wanted, int((self.remaining() + 1e-9) // price)))
+
+    def reserve(self, path: str) -> bool:
+        """Set aside the price of one call to `path`; False if it does not fit."""
+        price = API_PRICES.get(path, 0.0)
+        if price == 0:
+            return True
+        with self._lock:
+            if self._spent + self._reserved + price > self.limit + 1e-9:
+                return False
+            self._reserved += price
+            return True
+
+    def settle(self, path: str, ok: bool) -> None:
+        """Turn a reservation into spend (successful call) or release it (failed call)."""
+        price = API_PRICES.get(path, 0.0)
+        if price == 0:
+            return
+        api = _API_NAMES.get(path, path)
+        with self._lock:
+            self._reserved -= price
+            if ok:
+                self._spent += price
+                entry = self._calls.setdefault(api, {"calls": 0, "cost": 0.0})
+                entry["calls"] += 1
+                entry["cost"] += price
+
+    def skip(self, api: str, count: int = 1) -> dict:
+        """Record `count` calls to `api` as skipped; returns the error dict they resolve to."""
+        api = _API_NAMES.get(api, api)
+        price = self.price(api)
+        with self._lock:
+            entry = self._skipped.setdefault(api, {"count": 0, "price": price,
+                                                   "priority": self.priority(api)})
+            entry["count"] += count
+            left = self.limit - self._spent - self._reserved
+        return _error_result(-1, "budget_exceeded",
+                             f"{api} costs {price:.2f}; {max(0.0, left):.2f} of the "
+                             f"{self.limit:.2f} budget left", False)
+
+    def substitute(self, api: str, count: int = 1) -> str:
+        """Record that `count` calls to `api` were replaced by its free alternative; returns its name."""
+        alternative = FREE_ALTERNATIVES[api]
+        with self._lock:
+            key = (api, alternative)
+            self._substituted[key] = self._substituted.get(key, 0) + count
+        return alternative
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "spent": round(self._spent, 2),
+                "remaining": round(self.limit - self._spent - self._reserved, 2),
+                "calls": {api: {"calls": e["calls"], "cost": round(e["cost"], 2)}
+                          for api, e in sorted(self._calls.items())},
+                "skipped": [{"api": api, **e} for api, e in sorted(self._skipped.items())],
+                "substituted": [{"api": api, "alternative": alt, "count": n}
+                                for (api, alt), n in sorted(self._substituted.items())],
+            }
+
+
+_cost_budget: Optional[CostBudget] = None
+
+
+def get_budget() -> Optional[CostBudget]:
+    """Return the active cost budget, or None when spending is not capped."""
+    return _cost_budget
+
+
+def configure_budget(limit: Optional[float], priorities: Optional[dict] = None) -> Optional[CostBudget]:
+    """Cap the spend of every following call at `limit` CNY (None removes the cap)."""
+    global _cost_budget
+    _cost_budget = CostBudget(limit, priorities) if limit is not None else None
+    return _cost_budget
+
+
+def _use_free_alternative(api: str, then: tuple = ()) -> bool:
+    """
+    True (and recorded) when a budget is set and the paid `api` no longer fits it once
+    the priority-1 calls among `then` (the stages the workflow runs next) are set aside,
+    so a paid lookup step never starves the essential stages it leads to.
+    """
+    budget = _cost_budget
+    if budget is None:
+        return False
+    essential = sum(budget.price(stage) for stage in then if budget.priority(stage) <= 1)
+    if budget.price(api) + essential <= budget.remaining() + 1e-9:
+        return False
+    alternative = budget.substitute(api)
+    print(f"      Budget: using free {alternative} instead of {api}", file=sys.stderr)
+    return True
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Core HTTP Utilities
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _error_result(code: int, msg: str, error: Any, retryable: bool) -> dict:
+    """Build the error structure returned by _request instead of raising."""
+    return {
+        "code": code,
+        "success": False,
+        "msg": msg,
+        "error": error,
+        "retryable": retryable,
+    }
+
+
+def _prepare_request(token: str, method: str, path: str,
+                     params: Optional[dict] = None,
+                     body: Optional[dict] = None,
+                     base_url: Optional[str] = None) -> tuple:
+    """Build (method, url, headers, body_bytes) for an API call."""
+    url = (base_url or BASE_URL) + path
+    headers = {
+        "Authorization": token,
+        "X-Platform": "openclaw",
+        "Content-Type": "application/json;charset=utf-8",
+    }
+
+    if method.upper() == "GET" and params:
+        query = urllib.parse.urlencode(
+            {k: (json.dumps(v) if isinstance(v, (list, dict)) else v)
+             for k, v in params.items() if v is not None}
+        )
+        url = f"{url}?{query}"
+
+    data = json.dumps(body).encode("utf-8") if body else None
+    return method.upper(), url, headers, data
+
+
+_orjson = None  # the orjson module once resolved, False when it is not installed
+
+
+def _orjson_module():
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+            _orjson = orjson
+        except ImportError:
+            _orjson = False
+    return _orjson
+
+
+def _loads(body: bytes) -> Any:
+    """Parse a response body; orjson (when installed) parses large bodies without a str copy."""
+    backend = _orjson_module() if len(body) >= ORJSON_MIN_BYTES else _orjson
+    return backend.loads(body) if backend else json.loads(body)
+
+
+def _attempt_outcome(resp: Optional[_HTTPResponse] = None,
+                     error: Optional[BaseException] = None) -> tuple:
+    """
+    Map one attempt's HTTP response (or the exception it raised) to
+    (result, ok, retryable), logging failures to stderr.
+    Shared by the blocking and asyncio request paths so both retry the same way.
+    """
+    if error is not None:
+        if isinstance(error, TimeoutError):
+            print(f"[Request timeout] {error}", file=sys.stderr)
+            return _error_result(-1, "timeout", str(error), True), False, True
+        if isinstance(error, (OSError, http_client.HTTPException)):
+            reason = str(error) or type(error).__name__
+            print(f"[Request failed] {reason}", file=sys.stderr)
+            return _error_result(-1, "network_error", reason, True), False, True
+        print(f"[Request failed] {error}", file=sys.stderr)
+        return _error_result(-1, "unknown_error", str(error), False), False, False
+
+    if 200 <= resp.status < 300:
+        try:
+            return _loads(resp.body), True, False
+        except Exception as e:
+            print(f"[Request failed] {e}", file=sys.stderr)
+            return _error_result(-1, "unknown_error", str(e), False), False, False
+
+    try:
+        err = json.loads(resp.body)
+    except Exception:
+        err = resp.body.decode("utf-8", errors="replace")
+    retryable = resp.status in RETRYABLE_HTTP_STATUS
+    print(f"[HTTP {resp.status}] {resp.reason}: {err}", file=sys.stderr)
+    return _error_result(resp.status, str(resp.reason), err, retryable), False, retryable
+
+
+def _retry_backoff(attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+    """
+    Exponential backoff with jitter before retry number `attempt` (1s -> 2s -> 4s ...),
+    stretched to the gateway's Retry-After when that is longer. None when the workflow
+    deadline would pass before the retry could be sent.
+    """
+    backoff = (2 ** (attempt - 1)) + random.uniform(0, 0.3)
+    if retry_after is not None:
+        backoff = max(backoff, retry_after)
+    left = _time_left()
+    if left is not None and backoff >= left:
+        return None
+    print(f"[Retry] attempt={attempt}/{MAX_RETRIES} wait={backoff:.2f}s", file=sys.stderr)
+    return backoff
+
+
+class _CapturedRequest(Exception):
+    """Raised by _request in capture mode to hand a wrapper's prepared call to _describe_call."""
+
+    def __init__(self, method: str, path: str, params: Optional[dict], body: Optional[dict]):
+        super().__init__(method, path)
+        self.method, self.path, self.params, self.body = method, path, params, body
+
+
+_capture_requests = contextvars.ContextVar("_capture_requests", default=False)
+
+
+def _capture_call(call, name: str = "call") -> tuple:
+    """Return the (method, path, params, body) that call() would send, without sending it."""
+    reset_token = _capture_requests.set(True)
+    try:
+        call()
+    except _CapturedRequest as captured:
+        return captured.method, captured.path, captured.params, captured.body
+    finally:
+        _capture_requests.reset(reset_token)
+    raise RuntimeError(f"{name} did not issue an API request")
+
+
+def _describe_call(fn, *args, **kwargs) -> tuple:
+    """Return the (method, path, params, body) an API wrapper would send, without sending it."""
+    return _capture_call(partial(fn, "", *args, **kwargs), fn.__name__)
+
+
+def _request(token: str, method: str, path: str,
+             params: Optional[dict] = None,
+             body: Optional[dict] = None) -> Any:
+    """
+    Send an HTTP request over the shared connection pool and return the parsed JSON data
+    (with retries). Identical calls are served from the in-process memo (or share one
+    in-flight request), then from the response cache when one is configured and fresh.
+    Every completed call is reported to the registered call hooks as a CallRecord.
+    """
+    if _capture_requests.get():
+        raise _CapturedRequest(method, path, params, body)
+
+    memo = None if _fresh_responses.get() else _request_memo
+    # Only the memo and the response cache look calls up by key (hashing it loads hashlib)
+    key = _request_key(method, path, params, body) if memo is not None or _response_cache is not None else None
+    call = _new_call_record(method, path)
+    fetch = partial(_fetch, token, key, method, path, params, body, call)
+    result, ok = memo.call(key, fetch) if memo is not None else fetch()
+    _emit_call(call, result, ok)
+    _export_response(path, result)
+    return result
+
+
+def _fetch(token: str, key: Optional[str], method: str, path: str,
+           params: Optional[dict], body: Optional[dict],
+           call: Optional[CallRecord] = None) -> tuple:
+    """
+    Local store (--local_first), then the response cache, then the network; returns (result, ok).
+    Network calls are refused without being sent when they would exceed the cost budget.
+    """
+    local = _local_answer(key, path, params, body, call)
+    if local is not None:
+        return local, True
+
+    budget = _cost_budget
+    if budget is not None and not budget.reserve(path):
+        if call is not None:
+            call.source = "budget"
+        return budget.skip(path), False
+    if call is not None:
+        call.source = "network"
+    ok = False
+    try:
+        result, ok = _send_request(token, method, path, params, body, call)
+    finally:
+        if budget is not None:
+            budget.settle(path, ok)
+    if ok:
+        _persist_response(key, path, body, result)
+    return result, ok
+
+
+def _local_files_configured() -> bool:
+    """Whether a response cache, entity store or org alias index (SQLite files) is in use."""
+    return _response_cache is not None or _entity_store is not None or _org_alias_index is not None
+
+
+def _local_answer(key: Optional[str], path: str, params: Optional[dict], body: Optional[dict],
+                  call: Optional[CallRecord]) -> Optional[Any]:
+    """The response the local store (--local_first) or the response cache has for this call, or None."""
+    local = _store_answer(path, params, body)
+    if local is not None:
+        if call is not None:
+            call.source = "store"
+        return local
+    cached = _cache_lookup(key, path)
+    if cached is not None and call is not None:
+        call.source = "cache"
+    return cached
+
+
+def _persist_response(key: Optional[str], path: str, body: Optional[dict], result: Any) -> None:
+    """Write a successful response to the response cache, the entity store and the org alias index."""
+    _cache_store(key, path, result)
+    _store_record(path, result)
+    _learn_org_aliases(path, body, result)
+
+
+def _send_attempt(transport: ConnectionPool, limiter: Optional[RateLimiter], path: str,
+                  method: str, url: str, data: Optional[bytes], headers: dict,
+                  timeout: float, connect_timeout: float) -> _HTTPResponse:
+    """One network attempt under the rate limiter; returns the response or raises."""
+    resp = None
+    if limiter is not None:
+        limiter.acquire(path)
+    try:
+        resp = transport.request(method, url, body=data, headers=headers,
+                                 timeout=timeout, connect_timeout=connect_timeout)
+        return resp
+    finally:
+        if limiter is not None:
+            limiter.release(resp)
+
+
+def _send_request(token: str, method: str, path: str,
+                  params: Optional[dict] = None,
+                  body: Optional[dict] = None,
+                  call: Optional[CallRecord] = None) -> tuple:
+    """
+    Run the retry loop for one call over the network; returns (result, ok). Attempts are
+    added to `call`, slow ones are hedged when configure_hedging() is on, and no attempt
+    or backoff is started that the workflow deadline leaves no time for. While the
+    endpoint's circuit is open, the call (or its remaining retries) fails fast. With several
+    comma-separated tokens, each attempt goes out under a token leased from their TokenPool.
+    """
+    method, url, headers, data = _prepare_request(token, method, path, params, body)
+    transport = get_transport()
+    limiter = _rate_limiter
+    hedger = _hedger if _hedger is not None and path in _hedger.paths else None
+    breaker = _circuit_breaker
+    pool = get_token_pool(token)
+
+    attempt = 1
+    switches = 0  # immediate resends on another token after one was drained; not attempts
+    while True:
+        timeouts = _attempt_timeouts(transport)
+        if timeouts is None:
+            return _deadline_result(), False
+        if breaker is not None and not breaker.allow(path):
+            if call is not None and attempt == 1 and not switches:
+                call.source = "circuit"
+            return breaker.rejection(path), False
+        slot = pool.acquire() if pool is not None else None
+        send = partial(_send_attempt, transport, limiter if slot is None else slot.limiter, path, method,
+                       url, data, headers if slot is None else slot.headers(headers), *timeouts)
+        resp = None
+        try:
+            resp = hedger.request(path, send) if hedger is not None else send()
+            result, ok, retryable = _attempt_outcome(resp)
+        except Exception as e:
+            result, ok, retryable = _attempt_outcome(error=e)
+        if breaker is not None:
+            breaker.record(path, _backend_failure(resp, retryable))
+        if call is not None:
+            call.add_attempt(resp)
+        if slot is not None and pool.release(slot, resp, result) and switches < len(pool):
+            switches += 1
+            continue  # that token is drained; resend at once on another one
+        if ok or not retryable or attempt >= MAX_RETRIES:
+            return result, ok
+        backoff = _retry_backoff(attempt, _retry_after_seconds(resp))
+        if backoff is None:
+            return _deadline_result(), False
+        time.sleep(backoff)
+        attempt += 1
+
+
+class _JSONStreamReader:
+    """
+    Incremental parser for a response body shaped {..., "data": [record, ...], ...}.
+
+    The body is read in STREAM_CHUNK_BYTES chunks and decoded chunk by chunk, and each
+    element of the `field` array is yielded as soon as it has been parsed, so neither the
+    raw body, its decoded text nor the full record list is ever held at once. The other
+    top-level members are collected into `meta` as they are passed.
+    """
+
+    _WHITESPACE = " \t\r\n"
+    _DELIMITERS = ",]}" + _WHITESPACE
+
+    def __init__(self, read, field: str = "data", chunk_size: int = STREAM_CHUNK_BYTES):
+        self._read = read
+        self.field = field
+        self.chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.meta: dict = {}
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the unconsumed text; False once the body is exhausted."""
+        if self._eof:
+            return False
+        chunk = self._read(self.chunk_size)
+        self._eof = not chunk
+        self._buf = self._buf[self._pos:] + self._decoder.decode(chunk, final=self._eof)
+        self._pos = 0
+        return not self._eof
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character ('' at the end of the body)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in self._WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        c = self._peek()
+        if not c or c not in chars:
+            raise ValueError(f"malformed JSON response: expected one of {chars!r}, got {c!r}")
+        self._pos += 1
+        return c
+
+    def _value(self) -> Any:
+        first = self._peek()
+        number = first == "-" or first.isdigit()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+                # A number cut at a chunk boundary also decodes ("1." + "5e-07" as 1, "1.5" +
+                # "e-07" as 1.5), so it is only complete once a delimiter follows it
+                if self._eof or (end < len(self._buf) and
+                                 (not number or self._buf[end] in self._DELIMITERS)):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def __iter__(self):
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == self.field and self._peek() == "[":
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(",]") == "]":
+                            break
+            else:
+                self.meta[key] = self._value()
+            if self._expect(",}") == "}":
+                return
+
+
+class StreamedResponse:
+    """
+    The `data` records of one API call, yielded while the response body is still arriving.
+
+    `meta` holds the other top-level fields (code, success, total, ...) once they have been
+    read, and `error` the error dict if the call or the stream failed part-way. Iterate to
+    the end or call close() so the connection goes back to the pool (and the call hooks
+    receive the call's CallRecord).
+    """
+
+    def __init__(self, path: str, resp: Optional[_PooledResponse] = None, result: Any = None,
+                 call: Optional[CallRecord] = None):
+        self.path = path
+        self._resp = resp
+        self._result = result  # complete response (cache hit or failed call) when not streaming
+        self._call = call
+        self.meta: dict = {}
+        self.error: Optional[dict] = None
+
+    def __iter__(self):
+        exporter = _export_sink.get()
+        records = self._iter_records()
+        try:
+            for record in records:
+                if exporter is not None:
+                    exporter.add_record(self.path, record)
+                yield record
+        finally:
+            records.close()
+
+    def _iter_records(self):
+        if self._resp is None:
+            yield from self._iter_result()
+            return
+        reader = _JSONStreamReader(self._resp.read)
+        self.meta = reader.meta
+        pending = []  # records awaiting a local entity store write
+        try:
+            for record in reader:
+                if _entity_store is not None:
+                    pending.append(record)
+                    if len(pending) >= STREAM_STORE_RECORDS:
+                        _store_record(self.path, {"data": pending})
+                        pending = []
+                yield record
+            if self.meta.get("success") is False:
+                self.error = dict(self.meta)
+        except Exception as e:
+            network = isinstance(e, (OSError, http_client.HTTPException))
+            print(f"[Stream failed] {e}", file=sys.stderr)
+            self.error = _error_result(-1, "network_error" if network else "unknown_error", str(e), network)
+        finally:
+            self.close()
+            if pending and self.error is None:
+                _store_record(self.path, {"data": pending})
+
+    def _iter_result(self):
+        result = self._result
+        records = result.get("data") if isinstance(result, dict) else None
+        if isinstance(result, dict):
+            self.meta = {k: v for k, v in result.items() if k != "data"}
+        if not isinstance(result, dict) or result.get("success") is False or \
+                (records is not None and not isinstance(records, list)):
+            self.error = result if isinstance(result, dict) else {"msg": "unexpected_response", "error": result}
+            return
+        yield from records or []
+
+    def close(self) -> None:
+        if self._resp is not None:
+            self._resp.close()
+            call, self._call = self._call, None
+            if call is not None:
+                call.add_attempt(self._resp)
+                _emit_call(call, self.error, self.error is None)
+
+
+def _stream_request(token: str, method: str, path: str,
+                    params: Optional[dict] = None,
+                    body: Optional[dict] = None) -> StreamedResponse:
+    """
+    Like _request, but returns a StreamedResponse whose records are parsed straight off
+    the socket. Served from the response cache when fresh; streamed bodies themselves skip
+    the cache and the in-process memo, since storing them would mean holding them whole.
+    Retries (same rules as _send_request) apply until a 2xx response starts streaming;
+    streams are never hedged, but do honour the workflow deadline and the circuit breaker.
+    """
+    call = _new_call_record(method, path)
+    if call is not None:
+        call.source, call.streamed = "cache", True
+    cached = _cache_lookup(_request_key(method, path, params, body), path)
+    if cached is not None:
+        _emit_call(call, cached, True)
+        return StreamedResponse(path, result=cached)
+    budget = _cost_budget
+    if budget is not None and not budget.reserve(path):
+        if call is not None:
+            call.source = "budget"
+        result = budget.skip(path)
+        _emit_call(call, result, False)
+        return StreamedResponse(path, result=result)
+    if call is not None:
+        call.source = "network"
+
+    method, url, headers, data = _prepare_request(token, method, path, params, body)
+    transport = get_transport()
+    breaker = _circuit_breaker
+    pool = get_token_pool(token)
+
+    attempt = 1
+    switches = 0  # immediate resends on another token after one was drained; not attempts
+    while True:
+        timeouts = _attempt_timeouts(transport)
+        if timeouts is None:
+            result = _deadline_result()
+            break
+        if breaker is not None and not breaker.allow(path):
+            if call is not None and attempt == 1 and not switches:
+                call.source = "circuit"
+            result = breaker.rejection(path)
+            break
+        resp = stream = None
+        slot = pool.acquire() if pool is not None else None
+        limiter = _rate_limiter if slot is None else slot.limiter
+        if limiter is not None:
+            limiter.acquire(path)
+        try:
+            opened = transport.open(method, url, body=data,
+                                    headers=headers if slot is None else slot.headers(headers),
+                                    timeout=timeouts[0], connect_timeout=timeouts[1])
+            if 200 <= opened.status < 300:
+                resp = stream = opened
+            else:
+                with opened:
+                    resp = _HTTPResponse(opened.status, opened.reason, opened.headers, opened.read())
+                result, _, retryable = _attempt_outcome(resp)
+        except Exception as e:
+            result, _, retryable = _attempt_outcome(error=e)
+        finally:
+            if limiter is not None:
+                limiter.release(resp)
+        drained = slot is not None and pool.release(slot, resp, None if stream is not None else result)
+        if breaker is not None:
+            breaker.record(path, stream is None and _backend_failure(resp, retryable))
+        if stream is not None:
+            if budget is not None:
+                budget.settle(path, True)  # billed once the gateway answers 2xx
+            return StreamedResponse(path, stream, call=call)  # its last attempt is added on close
+        if call is not None:
+            call.add_attempt(resp)
+        if drained and switches < len(pool):
+            switches += 1
+            continue  # that token is drained; resend at once on another one
+        if not retryable or attempt >= MAX_RETRIES:
+            break
+        backoff = _retry_backoff(attempt, _retry_after_seconds(resp))
+        if backoff is None:
+            result = _deadline_result()
+            break
+        time.sleep(backoff)
+        attempt += 1
+
+    if budget is not None:
+        budget.settle(path, False)
+    _emit_call(call, result, False)
+    return StreamedResponse(path, result=result)
+
+
+def _page_streamer(token: str, fetch_page):
+    """Turn a PageIterator fetch_page(cursor) into one returning the page as a StreamedResponse."""
+    def stream_page(cursor: int) -> StreamedResponse:
+        return _stream_request(token, *_capture_call(partial(fetch_page, cursor), "fetch_page"))
+    return stream_page
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Paper APIs
+# ──────────────────────────────────────────────────────────────────────────────
+
+def paper_search(token: str, title: str, page: int = 0, size: int = 10) -> Any:
+    """Paper Search (Free): search by title; returns ID/title/DOI."""
+    return _request(token, "GET", "/api/paper/search",
+                    params={"title": title, "page": page, "size": size})
+
+
+def paper_search_pro(token: str, title: str = None, keyword: str = None,
+                     abstract: str = None, author: str = None,
+                     org: str = None, venue: str = None,
+                     order: str = None, page: int = 0, size: int = 10) -> Any:
+    """Paper Search Pro (¥0.01/call): multi-condition search."""
+    params = {"page": page, "size": size}
+    for k, v in [("title", title), ("keyword", keyword), ("abstract", abstract),
+                 ("author", author), ("org", org), ("venue", venue), ("order", order)]:
+        if v is not None:
+            params[k] = v
+    return _request(token, "GET", "/api/paper/search/pro", params=params)
+
+
+def paper_qa_search(token: str, query: str = None,
+                    use_topic: bool = False,
+                    topic_high: str = None, topic_middle: str = None, topic_low: str = None,
+                    title: list = None, doi: str = None, year: list = None,
+                    sci_flag: bool = False, n_citation_flag: bool = False,
+                    force_citation_sort: bool = False, force_year_sort: bool = False,
+                    author_terms: list = None, org_terms: list = None,
+                    author_id: list = None, org_id: list = None, venue_ids: list = None,
+                    size: int = 10, offset: int = 0) -> Any:
+    """Paper QA Search (¥0.05/call): AI-powered Q&A; supports natural language and structured keywords."""
+    body: dict = {"use_topic": use_topic, "size": size, "offset": offset}
+    if query:
+        body["query"] = query
+    if topic_high:
+        body["topic_high"] = topic_high
+    if topic_middle:
+        body["topic_middle"] = topic_middle
+    if topic_low:
+        body["topic_low"] = topic_low
+    if title:
+        body["title"] = title
+    if doi:
+        body["doi"] = doi
+    if year:
+        body["year"] = year
+    if sci_flag:
+        body["sci_flag"] = True
+    if n_citation_flag:
+        body["n_citation_flag"] = True
+    if force_citation_sort:
+        body["force_citation_sort"] = True
+    if force_year_sort:
+        body["force_year_sort"] = True
+    if author_terms:
+        body["author_terms"] = author_terms
+    if org_terms:
+        body["org_terms"] = org_terms
+    if author_id:
+        body["author_id"] = author_id
+    if org_id:
+        body["org_id"] = org_id
+    if venue_ids:
+        body["venue_ids"] = venue_ids
+    return _request(token, "POST", "/api/paper/qa/search", body=body)
+
+
+def paper_info(token: str, ids: list) -> Any:
+    """Paper Info (Free): batch-retrieve basic information by ID."""
+    return _request(token, "POST", "/api/paper/info", body={"ids": ids})
+
+
+def paper_detail(token: str, paper_id: str) -> Any:
+    """Paper Details (¥0.01/call): retrieve complete paper information."""
+    return _request(token, "GET", "/api/paper/detail", params={"id": paper_id})
+
+
+def paper_relation(token: str, paper_id: str) -> Any:
+    """Paper Citations (¥0.10/call): retrieve papers cited by this paper."""
+    return _request(token, "GET", "/api/paper/relation", params={"id": paper_id})
+
+
+def paper_list_by_search_venue(token: str, keyword: str = None, venue: str = None,
+                                author: str = None, order: str = None,
+                                page: int = 0, size: int = 10) -> Any:
+    """Paper Search by Venue (¥0.30/call): retrieve complete paper info by keyword/journal/author."""
+    params = {"page": page, "size": size}
+    for k, v in [("keyword", keyword), ("venue", venue), ("author", author), ("order", order)]:
+        if v is not None:
+            params[k] = v
+    return _request(token, "GET", "/api/paper/list/by/search/venue", params=params)
+
+
+def paper_list_by_keywords(token: str, keywords: list, page: int = 0, size: int = 10) -> Any:
+    """Paper Batch Query (¥0.10/call): retrieve paper abstracts and info via multiple keywords."""
+    params = {"page": page, "size": size, "keywords": json.dumps(keywords, ensure_ascii=False)}
+    return _request(token, "GET", "/api/paper/list/citation/by/keywords", params=params)
+
+
+def paper_detail_by_condition(token: str, year: int, venue_id: str = None) -> Any:
+    """Paper Details by Year and Venue (¥0.20/call): year and venue_id must both be provided; providing only year returns null."""
+    params: dict = {"year": year}
+    if venue_id:
+        params["venue_id"] = venue_id
+    return _request(token, "GET",
+                    "/api/paper/platform/allpubs/more/detail/by/ts/org/venue",
+                    params=params)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Scholar APIs
+# ──────────────────────────────────────────────────────────────────────────────
+
+def person_search(token: str, name: str = None, org: str = None,
+                  org_id: list = None, offset: int = 0, size: int = 5) -> Any:
+    """Scholar Search (Free): search for scholars by name/institution."""
+    body: dict = {"offset": offset, "size": size}
+    if name:
+        body["name"] = name
+    if org:
+        body["org"] = org
+    if org_id:
+        body["org_id"] = org_id
+    return _request(token, "POST", "/api/person/search", body=body)
+
+
+def person_detail(token: str, person_id: str) -> Any:
+    """Scholar Details (¥1.00/call): retrieve complete personal information."""
+    return _request(token, "GET", "/api/person/detail", params={"id": person_id})
+
+
+def person_figure(token: str, person_id: str) -> Any:
+    """Scholar Portrait (¥0.50/call): retrieve research interests, domains, and structured history."""
+    return _request(token, "GET", "/api/person/figure", params={"id": person_id})
+
+
+def person_paper_relation(token: str, person_id: str) -> Any:
+    """Scholar Papers (¥1.50/call): retrieve list of papers published by a scholar."""
+    return _request(token, "GET", "/api/person/paper/relation", params={"id": person_id})
+
+
+def person_patent_relation(token: str, person_id: str) -> Any:
+    """Scholar Patents (¥1.50/call): retrieve a scholar's patent list."""
+    return _request(token, "GET", "/api/person/patent/relation", params={"id": person_id})
+
+
+def person_project(token: str, person_id: str) -> Any:
+    """Scholar Projects (¥3.00/call): retrieve research projects (funding amount/dates/source)."""
+    return _request(token, "GET", "/api/project/person/v3/open", params={"id": person_id})
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Institution APIs
+# ──────────────────────────────────────────────────────────────────────────────
+
+def org_search(token: str, orgs: list) -> Any:
+    """Org Search (Free): search for institutions by name keyword."""
+    return _request(token, "POST", "/api/organization/search", body={"orgs": orgs})
+
+
+def org_detail(token: str, ids: list) -> Any:
+    """Org Details (¥0.01/call): retrieve institution details by ID."""
+    return _request(token, "POST", "/api/organization/detail", body={"ids": ids})
+
+
+def org_person_relation(token: str, org_id: str, offset: int = 0) -> Any:
+    """Org Scholars (¥0.50/call): retrieve affiliated scholars (10 per call)."""
+    return _request(token, "GET", "/api/organization/person/relation",
+                    params={"org_id": org_id, "offset": offset})
+
+
+def org_paper_relation(token: str, org_id: str, offset: int = 0) -> Any:
+    """Org Papers (¥0.10/call): retrieve papers published by institution scholars (10 per call)."""
+    return _request(token, "GET", "/api/organization/paper/relation",
+                    params={"org_id": org_id, "offset": offset})
+
+
+def org_patent_relation(token: str, org_id: str,
+                        page: int = 1, page_size: int = 100) -> Any:
+    """Org Patents (¥0.10/call): retrieve institution patent list with pagination (max page_size 10,000)."""
+    return _request(token, "GET", "/api/organization/patent/relation",
+                    params={"id": org_id, "page": page, "page_size": page_size})
+
+
+def org_disambiguate(token: str, org: str) -> Any:
+    """Org Disambiguation (¥0.01/call): retrieve the normalized institution name."""
+    return _request(token, "POST", "/api/organization/na", body={"org": org})
+
+
+def org_disambiguate_pro(token: str, org: str) -> Any:
+    """Org Disambiguation Pro (¥0.05/call): extract primary and secondary institution IDs."""
+    return _request(token, "POST", "/api/organization/na/pro", body={"org": org})
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Journal APIs
+# ──────────────────────────────────────────────────────────────────────────────
+
+def venue_search(token: str, name: str) -> Any:
+    """Venue Search (Free): search for journal ID and standard name by name."""
+    return _request(token, "POST", "/api/venue/search", body={"name": name})
+
+
+def venue_detail(token: str, venue_id: str) -> Any:
+    """Venue Details (¥0.20/call): retrieve ISSN, abbreviation, type, etc."""
+    return _request(token, "POST", "/api/venue/detail", body={"id": venue_id})
+
+
+def venue_paper_relation(token: str, venue_id: str, offset: int = 0,
+                         limit: int = 20, year: Optional[int] = None) -> Any:
+    """Venue Papers (¥0.10/call): retrieve journal paper list (supports year filtering)."""
+    body: dict = {"id": venue_id, "offset": offset, "limit": limit}
+    if year is not None:
+        body["year"] = year
+    return _request(token, "POST", "/api/venue/paper/relation", body=body)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Patent APIs
+# ──────────────────────────────────────────────────────────────────────────────
+
+def patent_search(token: str, query: str, page: int = 0, size: int = 10) -> Any:
+    """Patent Search (Free): search patents by name/keyword."""
+    return _request(token, "POST", "/api/patent/search",
+                    body={"query": query, "page": page, "size": size})
+
+
+def patent_info(token: str, patent_id: str) -> Any:
+    """Patent Info (Free): retrieve basic patent information (title/patent number/inventor)."""
+    return _request(token, "GET", "/api/patent/info", params={"id": patent_id})
+
+
+def patent_detail(token: str, patent_id: str) -> Any:
+    """Patent Details (¥0.01/call): retrieve complete patent information (abstract/filing date/IPC, etc.)."""
+    return _request(token, "GET", "/api/patent/detail", params={"id": patent_id})
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Request Batching (DataLoader-style)
+# ──────────────────────────────────────────────────────────────────────────────
+
+class BatchLoader:
+    """
+    Collects single-ID lookups issued by concurrent callers and sends them as one bulk
+    call: the first lookup waits up to `window` seconds for others to join (a batch of
+    `max_batch_size` IDs is sent at once), then each caller gets a response shaped like
+    fetch_many([its_id]) containing only its own record.
+
+    fetch_many(ids) must be a bulk wrapper such as org_detail with the token bound.
+    Records are matched back by `id_fields`; IDs the bulk response can't be mapped for
+    are re-fetched individually, so callers never silently lose a record.
+    """
+
+    def __init__(self, fetch_many, id_fields: tuple = ("_id", "id"),
+                 max_batch_size: int = BATCH_MAX_SIZE, window: float = BATCH_WINDOW_SECONDS):
+        self._fetch_many = fetch_many
+        self.id_fields = id_fields
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = window
+        self._lock = threading.Lock()
+        self._batch: dict = {}  # id -> [Future, ...] waiting in the open batch
+        self._timer = None  # flushes the open batch once its window has passed
+        self._stats = {"lookups": 0, "bulk_calls": 0, "fallback_calls": 0}
+
+    def load(self, item_id: str) -> Any:
+        """Return the response for one ID (blocks until its batch has been fetched)."""
+        future = futures.Future()
+        with self._lock:
+            self._stats["lookups"] += 1
+            self._batch.setdefault(item_id, []).append(future)
+            batch = None
+            if len(self._batch) >= self.max_batch_size:
+                batch = self._take_batch_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, contextvars.copy_context().run,
+                                              (self._flush, self._batch))
+                self._timer.daemon = True
+                self._timer.start()
+        if batch is not None:
+            self._dispatch(batch)
+        return future.result()
+
+    def _take_batch_locked(self) -> dict:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, {}
+        return batch
+
+    def _flush(self, batch: dict) -> None:
+        with self._lock:
+            if batch is not self._batch:
+                return  # already sent because it filled up; its timer fired anyway
+            self._take_batch_locked()
+        if batch:
+            self._dispatch(batch)
+
+    def _record_id(self, record: Any) -> Optional[str]:
+        if isinstance(record, dict):
+            for field in self.id_fields:
+                if record.get(field):
+                    return record[field]
+        return None
+
+    def _split(self, ids: list, resp: Any) -> dict:
+        """id -> its own response cut from a bulk response; IDs with no record in it are left out."""
+        if len(ids) == 1 or not (isinstance(resp, dict) and isinstance(resp.get("data"), list)):
+            # Single ID or an error response: every caller gets the response as-is
+            return dict.fromkeys(ids, resp)
+        by_id = {}
+        for record in resp["data"]:
+            record_id = self._record_id(record)
+            if record_id is not None:
+                by_id.setdefault(record_id, record)
+        responses = {}
+        for item_id in ids:
+            record = by_id.get(item_id)
+            if record is not None:
+                single = {k: v for k, v in resp.items() if k not in ("data", "total")}
+                single.update({"data": [record], "total": 1})
+                responses[item_id] = single
+        return responses
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _dispatch(self, batch: dict) -> None:
+        try:
+            self._count("bulk_calls")
+            responses = self._split(list(batch), self._fetch_many(list(batch)))
+            for item_id, waiters in batch.items():
+                if item_id not in responses:
+                    self._count("fallback_calls")
+                    responses[item_id] = self._fetch_many([item_id])
+                for waiter in waiters:
+                    waiter.set_result(responses[item_id])
+        except BaseException as e:
+            _fail_waiters(batch, e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+class AsyncBatchLoader(BatchLoader):
+    """
+    BatchLoader for coroutines on one event loop: fetch_many is a coroutine function
+    (e.g. AsyncAMinerClient.org_detail) and load() is awaited instead of blocking.
+    """
+
+    def __init__(self, fetch_many, id_fields: tuple = ("_id", "id"),
+                 max_batch_size: int = BATCH_MAX_SIZE, window: float = BATCH_WINDOW_SECONDS):
+        super().__init__(fetch_many, id_fields, max_batch_size, window)
+        self._tasks: set = set()  # batches being fetched
+
+    async def load(self, item_id: str) -> Any:
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._count("lookups")
+        self._batch.setdefault(item_id, []).append(waiter)
+        if len(self._batch) >= self.max_batch_size:
+            self._start(self._take_batch_locked())
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush, self._batch)
+        return await waiter
+
+    def _flush(self, batch: dict) -> None:
+        if batch is self._batch:
+            self._start(self._take_batch_locked())
+
+    def _start(self, batch: dict) -> None:
+        # A task of its own, so one cancelled caller does not abort the fetch the others wait on
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: dict) -> None:
+        try:
+            self._count("bulk_calls")
+            responses = self._split(list(batch), await self._fetch_many(list(batch)))
+            for item_id, waiters in batch.items():
+                if item_id not in responses:
+                    self._count("fallback_calls")
+                    responses[item_id] = await self._fetch_many([item_id])
+                for waiter in waiters:
+                    if not waiter.done():  # its caller may have been cancelled
+                        waiter.set_result(responses[item_id])
+        except BaseException as e:
+            _fail_waiters(batch, e)
+            if not isinstance(e, Exception):
+                raise
+
+
+def _fail_waiters(batch: dict, error: BaseException) -> None:
+    for waiters in batch.values():
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_exception(error)
+
+
+_batch_loaders: dict = {}  # (api name, token) -> BatchLoader
+_batch_loaders_lock = threading.Lock()
+
+
+def _batch_loader(name: str, token: str, fetch_many, id_fields: tuple) -> BatchLoader:
+    key = (name, token)
+    with _batch_loaders_lock:
+        loader = _batch_loaders.get(key)
+        if loader is None:
+            loader = _batch_loaders[key] = BatchLoader(partial(fetch_many, token), id_fields)
+        return loader
+
+
+def org_detail_batched(token: str, org_id: str) -> Any:
+    """Org Details (¥0.01/call) for one ID; concurrent lookups are merged into one org_detail call."""
+    return _batch_loader("org_detail", token, org_detail, ("id", "_id")).load(org_id)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Paginated Iterators
+# ──────────────────────────────────────────────────────────────────────────────
+
+class PageIterator:
+    """
+    Lazily walks every page of a paginated endpoint and yields one record at a time,
+    so a full harvest never has to be held in memory.
+
+    - max_items / max_cost stop the walk once that many records were yielded or before
+      a page fetch would push the spend (pages x documented price) past the cap.
+    - prefetch=True fetches the next page on a background thread while the current
+      page is being consumed.
+    - checkpoint is a JSON file path: progress is saved after each consumed page (and on
+      early stop), and an existing checkpoint resumes where the previous run left off.
+    - stream_page(cursor) -> StreamedResponse, when given, is used instead of fetch_page:
+      records are yielded while each page is still downloading and a page is never held
+      whole in memory (prefetch does not apply).
+
+    After iteration, `cursor` is the next offset/page to fetch, `items`/`cost` what this
+    run consumed, `total` the server-reported total, `done` whether the end was reached and
+    `error` the failing response if a page request failed.
+    """
+
+    def __init__(self, fetch_page, cursor: int, page_size: int, path: str,
+                 advance=None, max_items: Optional[int] = None,
+                 max_cost: Optional[float] = None, prefetch: bool = False,
+                 checkpoint: Optional[str] = None, stream_page=None):
+        self._fetch_page = fetch_page
+        self._stream_page = stream_page
+        self._advance = advance or _offset_advance
+        self.page_size = page_size
+        self.price = API_PRICES.get(path, 0.0)
+        self.max_items = max_items
+        self.max_cost = max_cost
+        self.prefetch = prefetch
+        self.checkpoint = checkpoint
+        self.cursor = cursor
+        self.skip = 0  # records of the page at `cursor` already yielded by a previous run
+        self.items = 0
+        self.cost = 0.0
+        self.total: Optional[int] = None
+        self.done = False
+        self.error: Optional[dict] = None
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.cursor = saved.get("cursor", cursor)
+            self.skip = saved.get("skip", 0)
+            self.done = saved.get("done", False)
+
+    def _save_checkpoint(self) -> None:
+        if not self.checkpoint:
+            return
+        tmp = f"{self.checkpoint}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"cursor": self.cursor, "skip": self.skip, "done": self.done,
+                       "items": self.items, "cost": round(self.cost, 4), "total": self.total}, f)
+        os.replace(tmp, self.checkpoint)
+
+    def _can_afford_page(self) -> bool:
+        return self.max_cost is None or self.cost + self.price <= self.max_cost + 1e-9
+
+    def _has_more(self, n_records: int) -> tuple:
+        """(next_cursor, more) after a page of n_records at the current cursor."""
+        next_cursor = self._advance(self.cursor, n_records)
+        more = n_records >= self.page_size and n_records > 0
+        if more and self.total is not None and self._advance is _offset_advance:
+            more = next_cursor < self.total
+        return next_cursor, more
+
+    def __iter__(self):
+        if self._stream_page is not None:
+            yield from self._iter_streamed()
+            return
+        executor = futures.ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        pending = None
+        try:
+            while not self.done:
+                if self.max_items is not None and self.items >= self.max_items:
+                    break
+                if pending is None:
+                    if not self._can_afford_page():
+                        print(f"[Pagination] stopping at cursor={self.cursor}: max_cost={self.max_cost} reached",
+                              file=sys.stderr)
+                        break
+                    self.cost += self.price
+                    resp = self._fetch_page(self.cursor)
+                else:
+                    resp = pending.result()
+                    pending = None
+
+                records = resp.get("data") if isinstance(resp, dict) else None
+                if not isinstance(resp, dict) or resp.get("success") is False or \
+                        (records is not None and not isinstance(records, list)):
+                    self.error = resp if isinstance(resp, dict) else {"msg": "unexpected_response", "error": resp}
+                    print(f"[Pagination] stopping at cursor={self.cursor}: {self.error.get('msg')}",
+                          file=sys.stderr)
+                    break
+                records = records or []
+                if resp.get("total") is not None:
+                    self.total = resp["total"]
+
+                next_cursor, more = self._has_more(len(records))
+                wants_more = self.max_items is None or self.items + len(records) - self.skip < self.max_items
+                if more and wants_more and executor is not None and self._can_afford_page():
+                    self.cost += self.price
+                    pending = executor.submit(contextvars.copy_context().run, self._fetch_page, next_cursor)
+
+                for index in range(self.skip, len(records)):
+                    if self.max_items is not None and self.items >= self.max_items:
+                        self.skip = index
+                        self._save_checkpoint()
+                        return
+                    self.items += 1
+                    yield records[index]
+
+                self.cursor, self.skip = next_cursor, 0
+                self.done = not more
+                self._save_checkpoint()
+        finally:
+            if pending is not None:
+                pending.cancel()  # a fetch already running still completes; it is just not consumed
+                self.cost -= self.price
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _iter_streamed(self):
+        while not self.done:
+            if self.max_items is not None and self.items >= self.max_items:
+                break
+            if not self._can_afford_page():
+                print(f"[Pagination] stopping at cursor={self.cursor}: max_cost={self.max_cost} reached",
+                      file=sys.stderr)
+                break
+            self.cost += self.price
+            page = self._stream_page(self.cursor)
+            n_records = 0
+            try:
+                for record in page:
+                    n_records += 1
+                    if n_records <= self.skip:
+                        continue
+                    if self.max_items is not None and self.items >= self.max_items:
+                        self.skip = n_records - 1
+                        self._save_checkpoint()
+                        return
+                    self.items += 1
+                    yield record
+            finally:
+                page.close()
+
+            if page.error is not None:
+                self.error = page.error
+                print(f"[Pagination] stopping at cursor={self.cursor}: {self.error.get('msg')}",
+                      file=sys.stderr)
+                break
+            if page.meta.get("total") is not None:
+                self.total = page.meta["total"]
+            self.cursor, more = self._has_more(n_records)
+            self.skip, self.done = 0, not more
+            self._save_checkpoint()
+
+    def state(self) -> dict:
+        """Iteration summary (suitable for JSON output next to the yielded records)."""
+        return {"next_cursor": self.cursor, "items": self.items, "cost": round(self.cost, 4),
+                "total": self.total, "done": self.done, "error": self.error}
+
+
+def _offset_advance(cursor: int, n_records: int) -> int:
+    return cursor + n_records
+
+
+def _page_advance(cursor: int, n_records: int) -> int:
+    return cursor + 1
+
+
+def iter_org_person_relation(token: str, org_id: str, offset: int = 0,
+                             max_items: Optional[int] = None, max_cost: Optional[float] = None,
+                             prefetch: bool = False, checkpoint: Optional[str] = None,
+                             stream: bool = False) -> PageIterator:
+    """Iterate every affiliated scholar of an institution (¥0.50 per 10-record page)."""
+    fetch = lambda cursor: org_person_relation(token, org_id, offset=cursor)
+    return PageIterator(fetch, offset, 10, "/api/organization/person/relation", _offset_advance,
+                        max_items, max_cost, prefetch, checkpoint,
+                        _page_streamer(token, fetch) if stream else None)
+
+
+def iter_org_paper_relation(token: str, org_id: str, offset: int = 0,
+                            max_items: Optional[int] = None, max_cost: Optional[float] = None,
+                            prefetch: bool = False, checkpoint: Optional[str] = None,
+                            stream: bool = False) -> PageIterator:
+    """Iterate every paper by an institution's scholars (¥0.10 per 10-record page)."""
+    fetch = lambda cursor: org_paper_relation(token, org_id, offset=cursor)
+    return PageIterator(fetch, offset, 10, "/api/organization/paper/relation", _offset_advance,
+                        max_items, max_cost, prefetch, checkpoint,
+                        _page_streamer(token, fetch) if stream else None)
+
+
+def iter_venue_paper_relation(token: str, venue_id: str, year: Optional[int] = None,
+                              offset: int = 0, limit: int = 20,
+                              max_items: Optional[int] = None, max_cost: Optional[float] = None,
+                              prefetch: bool = False, checkpoint: Optional[str] = None,
+                              stream: bool = False) -> PageIterator:
+    """Iterate every paper of a journal, optionally for one year (¥0.10 per `limit`-record page)."""
+    fetch = lambda cursor: venue_paper_relation(token, venue_id, offset=cursor, limit=limit, year=year)
+    return PageIterator(fetch, offset, limit, "/api/venue/paper/relation", _offset_advance,
+                        max_items, max_cost, prefetch, checkpoint,
+                        _page_streamer(token, fetch) if stream else None)
+
+
+def iter_org_patent_relation(token: str, org_id: str, page: int = 1, page_size: int = 1000,
+                             max_items: Optional[int] = None, max_cost: Optional[float] = None,
+                             prefetch: bool = False, checkpoint: Optional[str] = None,
+                             stream: bool = False) -> PageIterator:
+    """
+    Iterate every patent of an institution (¥0.10 per page; page_size up to 10,000).
+    stream=True parses each page's records off the socket instead of loading the page whole.
+    """
+    fetch = lambda cursor: org_patent_relation(token, org_id, page=cursor, page_size=page_size)
+    return PageIterator(fetch, page, page_size, "/api/organization/patent/relation", _page_advance,
+                        max_items, max_cost, prefetch, checkpoint,
+                        _page_streamer(token, fetch) if stream else None)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Citation Graph Crawler
+# ──────────────────────────────────────────────────────────────────────────────
+
+class CitationGraph:
+    """
+    Citation graph with papers numbered 0..n-1 in discovery order. Node attributes and
+    edges are flat parallel arrays rather than nested dicts, so graphs of many thousands
+    of papers stay compact; csr() builds the compressed adjacency on demand.
+
+    An edge src -> dst means paper `src` cites paper `dst`.
+    """
+
+    def __init__(self):
+        self.ids: list = []          # index -> paper ID
+        self.index: dict = {}        # paper ID -> index (also the crawler's visited set)
+        self.depth = array("i")      # hops from the nearest seed
+        self.n_citation = array("i")
+        self.titles: list = []
+        self.info: dict = {}         # index -> paper_info record
+        self.src = array("i")
+        self.dst = array("i")
+        self.stats: dict = {}        # crawl summary, filled in by CitationCrawler
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.src)
+
+    def add_node(self, paper_id: str, depth: int, n_citation: Any = 0, title: str = None) -> tuple:
+        """Return (index, created); a known paper keeps its index and its smallest depth."""
+        idx = self.index.get(paper_id)
+        if idx is not None:
+            if depth < self.depth[idx]:
+                self.depth[idx] = depth
+            return idx, False
+        idx = len(self.ids)
+        self.index[paper_id] = idx
+        self.ids.append(paper_id)
+        self.depth.append(depth)
+        self.n_citation.append(n_citation if isinstance(n_citation, int) else 0)
+        self.titles.append(title)
+        return idx, True
+
+    def add_edge(self, src: int, dst: int) -> None:
+        self.src.append(src)
+        self.dst.append(dst)
+
+    def csr(self) -> tuple:
+        """(offsets, targets): the papers cited by node i are targets[offsets[i]:offsets[i + 1]]."""
+        offsets = array("i", [0]) * (len(self.ids) + 1)
+        for s in self.src:
+            offsets[s + 1] += 1
+        for i in range(len(self.ids)):
+            offsets[i + 1] += offsets[i]
+        targets = array("i", [0]) * len(self.src)
+        fill = offsets[:-1]
+        for s, d in zip(self.src, self.dst):
+            targets[fill[s]] = d
+            fill[s] += 1
+        return offsets, targets
+
+    def edges(self, by_id: bool = True):
+        """Yield (citing, cited) pairs as paper IDs (or node indices)."""
+        for s, d in zip(self.src, self.dst):
+            yield (self.ids[s], self.ids[d]) if by_id else (s, d)
+
+    def write_edge_list(self, path: str, by_id: bool = True) -> None:
+        """Write one tab-separated `citing<TAB>cited` line per edge."""
+        with open(path, "w", encoding="utf-8") as f:
+            for s, d in self.edges(by_id):
+                f.write(f"{s}\t{d}\n")
+
+    def to_dict(self) -> dict:
+        """JSON form: node records by index and edges as [src, dst] index pairs."""
+        nodes = []
+        for i, paper_id in enumerate(self.ids):
+            node = {"index": i, "id": paper_id, "depth": self.depth[i],
+                    "n_citation": self.n_citation[i], "title": self.titles[i]}
+            if i in self.info:
+                node["info"] = self.info[i]
+                node["title"] = node["title"] or self.info[i].get("title")
+            nodes.append(node)
+        return {"nodes": nodes, "edges": [[s, d] for s, d in zip(self.src, self.dst)],
+                "stats": self.stats}
+
+
+class CitationCrawler:
+    """
+    Expands a citation graph from seed papers with paper_relation (¥0.10 per expanded
+    paper), then fills node metadata with paper_info in BATCH_MAX_SIZE-ID chunks (free).
+
+    - strategy "bfs" expands hop by hop; "priority" always expands the most-cited known
+      paper next (n_citation as reported by paper_relation)
+    - each paper is expanded at most once; papers at max_depth are kept as leaves
+    - at most max_workers requests are in flight; max_nodes caps the graph size and
+      max_cost stops expansion before the spend (expansions x price) would exceed it
+
+    `stats()` reports nodes/edges, expanded/failed papers, cost and why the crawl
+    stopped ("exhausted", "max_nodes" or "max_cost"). Calls go through the module-level
+    wrappers with `token`, or through `call(api, *args)` when given (the async client).
+    """
+
+    def __init__(self, token: str, max_depth: int = CRAWL_MAX_DEPTH, max_nodes: int = CRAWL_MAX_NODES,
+                 strategy: str = "bfs", max_workers: int = WORKFLOW_MAX_WORKERS,
+                 max_cost: Optional[float] = None, fetch_info: bool = True, call=None):
+        if strategy not in ("bfs", "priority"):
+            raise ValueError(f"strategy must be 'bfs' or 'priority', got {strategy!r}")
+        self.token = token
+        self._call = call or (lambda api, *args: globals()[api](token, *args))
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.strategy = strategy
+        self.max_workers = max(1, max_workers)
+        self.max_cost = max_cost
+        self.fetch_info = fetch_info
+        self.price = API_PRICES["/api/paper/relation"]
+        self.graph = CitationGraph()
+        self.expanded = 0
+        self.failed = 0
+        self.cost = 0.0
+        self.stopped: Optional[str] = None
+        self._frontier: list = []
+        self._queued: set = set()
+
+    def _push(self, idx: int) -> None:
+        g = self.graph
+        if idx in self._queued or g.depth[idx] >= self.max_depth:
+            return
+        self._queued.add(idx)
+        key = (-g.n_citation[idx],) if self.strategy == "priority" else ()
+        heapq.heappush(self._frontier, key + (g.depth[idx], idx))
+
+    def _can_expand(self) -> bool:
+        if len(self.graph) >= self.max_nodes:
+            self.stopped = "max_nodes"
+        elif self.max_cost is not None and self.cost + self.price > self.max_cost + 1e-9:
+            self.stopped = "max_cost"
+        return self.stopped is None
+
+    def _expand(self, idx: int, resp: Any) -> None:
+        if not isinstance(resp, dict) or resp.get("success") is False or \
+                not isinstance(resp.get("data"), list):
+            self.failed += 1
+            return
+        self.expanded += 1
+        g = self.graph
+        depth = g.depth[idx] + 1
+        for cited in _cited_papers(resp):
+            cited_id = (cited.get("_id") or cited.get("id")) if isinstance(cited, dict) else None
+            if not cited_id:
+                continue
+            if cited_id not in g.index and len(g) >= self.max_nodes:
+                self.stopped = "max_nodes"
+                continue
+            cited_idx, _ = g.add_node(cited_id, depth, cited.get("n_citation"), cited.get("title"))
+            g.add_edge(idx, cited_idx)
+            self._push(cited_idx)
+
+    def _fill_info(self, pool: "futures.ThreadPoolExecutor") -> None:
+        g = self.graph
+        chunks = [g.ids[i:i + BATCH_MAX_SIZE] for i in range(0, len(g), BATCH_MAX_SIZE)]
+        for resp in _map_in_context(pool, partial(self._call, "paper_info"), chunks):
+            if not isinstance(resp, dict) or not isinstance(resp.get("data"), list):
+                continue
+            for record in resp["data"]:
+                if isinstance(record, dict):
+                    idx = g.index.get(record.get("_id") or record.get("id"))
+                    if idx is not None:
+                        g.info[idx] = record
+
+    def crawl(self, seeds: list) -> CitationGraph:
+        """Crawl from `seeds` (paper IDs or search records with _id/id) and return the graph."""
+        g = self.graph
+        for seed in seeds:
+            record = seed if isinstance(seed, dict) else {"_id": seed}
+            paper_id = record.get("_id") or record.get("id")
+            if paper_id:
+                idx, _ = g.add_node(paper_id, 0, record.get("n_citation"), record.get("title"))
+                self._push(idx)
+
+        in_flight = {}
+        with futures.ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                while self._frontier and len(in_flight) < self.max_workers and self._can_expand():
+                    idx = heapq.heappop(self._frontier)[-1]
+                    self.cost += self.price
+                    in_flight[pool.submit(contextvars.copy_context().run,
+                                          self._call, "paper_relation", g.ids[idx])] = idx
+                if not in_flight:
+                    break
+                done, _ = futures.wait(in_flight, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    idx = in_flight.pop(future)
+                    try:
+                        resp = future.result()
+                    except Exception as e:
+                        resp = _error_result(-1, "request_failed", str(e), True)
+                    self._expand(idx, resp)
+            self.stopped = self.stopped or "exhausted"
+            if self.fetch_info and len(g):
+                self._fill_info(pool)
+
+        g.stats = self.stats()
+        return g
+
+    def stats(self) -> dict:
+        return {"nodes": len(self.graph), "edges": self.graph.num_edges, "expanded": self.expanded,
+                "failed": self.failed, "cost": round(self.cost, 4), "stopped": self.stopped,
+                "strategy": self.strategy, "max_depth": self.max_depth}
+
+
+def crawl_citation_graph(token: str, seeds: Any, max_depth: int = CRAWL_MAX_DEPTH,
+                         max_nodes: int = CRAWL_MAX_NODES, strategy: str = "bfs",
+                         max_workers: int = WORKFLOW_MAX_WORKERS, max_cost: Optional[float] = None,
+                         fetch_info: bool = True, call=None) -> CitationGraph:
+    """Crawl the k-hop reference graph of one or more seed papers (see CitationCrawler)."""
+    if not isinstance(seeds, (list, tuple)):
+        seeds = [seeds]
+    crawler = CitationCrawler(token, max_depth=max_depth, max_nodes=max_nodes, strategy=strategy,
+                              max_workers=max_workers, max_cost=max_cost, fetch_info=fetch_info,
+                              call=call)
+    return crawler.crawl(list(seeds))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Workflow Steps
+# ──────────────────────────────────────────────────────────────────────────────
+#
+# Every workflow is written once, as a generator of the calls it needs: it yields a
+# request and is sent back the result. _run_steps drives it with the module-level
+# wrappers (threads for concurrent groups) and AsyncAMinerClient._run_steps drives the
+# same generator on the event loop, so budget planning and substitution, fallbacks
+# and result shapes cannot drift between the two clients.
+
+_Call = namedtuple("_Call", "api args kwargs")     # the wrapper named `api`, minus the token
+_Gather = namedtuple("_Gather", "items fresh", defaults=(False,))
+# ^ [(progress label or None, _Call)] run concurrently; `fresh` runs them under fresh_responses()
+_Threaded = namedtuple("_Threaded", "fn")
+# ^ fn(call) run on a worker thread, where call(api, *args, **kwargs) makes one blocking call
+
+
+def _call(api: str, *args, **kwargs) -> _Call:
+    return _Call(api, args, kwargs)
+
+
+def _call_api(call: _Call) -> str:
+    """Priced API name of a call (org_detail for org_detail_batched)."""
+    return call.api[:-len("_batched")] if call.api.endswith("_batched") else call.api
+
+
+def _plan_stages(apis: list, budget: CostBudget) -> tuple:
+    """
+    Split stage indices into (run now together, deferred): STAGE_PRIORITIES order, cheaper
+    first within a priority, as many as fit the remaining budget.
+    """
+    order = sorted(range(len(apis)), key=lambda i: (budget.priority(apis[i]), budget.price(apis[i])))
+    first, deferred, planned = [], [], 0.0
+    remaining = budget.remaining()
+    for i in order:
+        price = budget.price(apis[i])
+        if planned + price <= remaining + 1e-9:
+            first.append(i)
+            planned += price
+        else:
+            deferred.append(i)
+    return first, deferred
+
+
+def _stage_steps(stages: list):
+    """
+    Run independent workflow stages, [(progress label, _Call)], concurrently; returns
+    their results in stage order.
+
+    Under a cost budget the stages are planned first (_plan_stages): the ones that fit
+    run together, the deferred ones then run one at a time once the first group's actual
+    spend is known (memo/cache hits are free), or are skipped if they still do not fit;
+    a skipped stage's result is the budget_exceeded error dict.
+    """
+    budget = _cost_budget
+    if budget is None:
+        return (yield _Gather(stages))
+    apis = [_call_api(call) for _, call in stages]
+    first, deferred = _plan_stages(apis, budget)
+    results = [None] * len(stages)
+    for i, result in zip(first, (yield _Gather([stages[i] for i in first]))):
+        results[i] = result
+    for i in deferred:
+        label, _ = stages[i]
+        if budget.affordable(apis[i]):
+            results[i] = (yield _Gather([stages[i]]))[0]
+        else:
+            print(f"{label.split(' ', 1)[0]} Skipped {apis[i]} (budget)\n", end="", file=sys.stderr)
+            results[i] = budget.skip(apis[i])
+    return results
+
+
+def _run_steps(token: str, steps, max_workers: int = WORKFLOW_MAX_WORKERS) -> Any:
+    """Drive a workflow step generator with the blocking module-level wrappers; returns its result."""
+    def call(api, *args, **kwargs):
+        return globals()[api](token, *args, **kwargs)
+
+    def run(item):
+        label, request = item
+        if label:
+            print(f"{label}\n", end="", file=sys.stderr)  # single write so concurrent labels don't interleave
+        return call(request.api, *request.args, **request.kwargs)
+
+    def gather(items: list) -> list:
+        if max_workers <= 1 or len(items) <= 1:
+            return [run(item) for item in items]
+        with futures.ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+            return _map_in_context(pool, run, items)
+
+    def perform(request):
+        if isinstance(request, _Call):
+            return run((None, request))
+        if isinstance(request, _Gather):
+            with fresh_responses() if request.fresh else contextlib.nullcontext():
+                return gather(request.items)
+        return request.fn(call)
+
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(perform(request))
+    except StopIteration as done:
+        return done.value
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Scholar Disambiguation
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _tokens(text: Any) -> set:
+    return set(re.findall(r"\w+", str(text or "").lower()))
+
+
+def _overlap(a: set, b: set) -> float:
+    """Jaccard similarity of two token sets (0 when either is empty)."""
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _interest_terms(interests: Any) -> set:
+    """Tokens of an interests list: plain strings or person_search's {"t": term, "w": weight} dicts."""
+    if isinstance(interests, str):
+        interests = interests.split(",")
+    terms = set()
+    for item in interests or []:
+        terms |= _tokens(item.get("t") if isinstance(item, dict) else item)
+    return terms
+
+
+def _score_candidates(candidates: list, name: str, org: Optional[str], interests: Any,
+                      org_ids: dict) -> list:
+    """
+    Score person_search candidates in [0, 1], best first, as (score, signals, candidate):
+    name match, org match (same org ID as the hinted org, else the org names' overlap),
+    share of the hinted interests among the candidate's, search rank (1 / position), and
+    log-scaled citations relative to the most cited candidate. Signals without a hint are
+    left out of the weighting, and so are citations when neither org nor interests is
+    hinted: the search order already reflects relevance, so without hints the top result
+    keeps its place unless its name matches worse.
+    """
+    query = _tokens(name)
+    hint_org_id = org_ids.get(org) if org else None
+    hint_terms = _interest_terms(interests)
+    top_citations = max((c.get("n_citation") or 0 for c in candidates), default=0)
+    scored = []
+    for position, candidate in enumerate(candidates):
+        signals = {"name": max(_overlap(query, _tokens(candidate.get(k))) for k in ("name", "name_zh"))}
+        if org:
+            candidate_org_id = candidate.get("org_id") or org_ids.get(candidate.get("org"))
+            same_id = bool(hint_org_id) and candidate_org_id == hint_org_id
+            signals["org"] = 1.0 if same_id else max(_overlap(_tokens(org), _tokens(candidate.get(k)))
+                                                     for k in ("org", "org_zh"))
+        if hint_terms:
+            signals["interests"] = len(hint_terms & _interest_terms(candidate.get("interests"))) / len(hint_terms)
+        signals["rank"] = 1.0 / (1 + position)
+        if org or hint_terms:
+            citations = candidate.get("n_citation") or 0
+            signals["citations"] = math.log1p(citations) / math.log1p(top_citations) if top_citations else 0.0
+        weight = sum(DISAMBIGUATION_WEIGHTS[k] for k in signals)
+        score = sum(DISAMBIGUATION_WEIGHTS[k] * v for k, v in signals.items()) / weight
+        scored.append((round(score, 4), {k: round(v, 3) for k, v in signals.items()}, candidate))
+    scored.sort(key=lambda s: -s[0])
+    return scored
+
+
+def _decision_key(name: str, org: Optional[str], interests: Any) -> str:
+    hints = {"name": " ".join(sorted(_tokens(name))), "org": " ".join(sorted(_tokens(org))),
+             "interests": sorted(_interest_terms(interests))}
+    return _request_key("LOCAL", DISAMBIGUATION_PATH, body=hints)
+
+
+def _cached_decision(key: str) -> Optional[dict]:
+    """A decision made earlier in this process (memo) or in an earlier run (response cache)."""
+    memo = None if _fresh_responses.get() else _request_memo
+    decision = memo.get(key) if memo is not None else None
+    if decision is None:
+        decision = _cache_lookup(key, DISAMBIGUATION_PATH)
+        if decision is not None and memo is not None:
+            memo.put(key, decision)
+    return None if decision is None else {**decision, "cached": True}
+
+
+def _org_names_to_resolve(candidates: list, org: Optional[str]) -> list:
+    """The hinted org plus candidate orgs person_search returned without an org_id."""
+    if not org:
+        return []
+    names = [org] + [c.get("org") for c in candidates if c.get("org") and not c.get("org_id")]
+    return list(dict.fromkeys(names))
+
+
+def _org_ids_from_aliases(names: list) -> tuple:
+    """
+    Split `names` into ({name: org_id} the org alias index knows, {name: alias candidate's
+    org_id or None} still to search); a candidate is kept only if the search returns it.
+    """
+    index = _org_alias_index
+    matches = {n: index.lookup(n) for n in names} if index is not None else {}
+    org_ids = {n: m["org_id"] for n, m in matches.items() if m is not None and m["match"] != "candidate"}
+    return org_ids, {n: (matches.get(n) or {}).get("org_id") for n in names if n not in org_ids}
+
+
+def _decide(key: str, name: str, org: Optional[str], interests: Any,
+            candidates: list, org_ids: dict) -> dict:
+    scored = _score_candidates(candidates, name, org, interests, org_ids)
+    runner_up = scored[1][0] if len(scored) > 1 else 0.0
+    decision = {
+        "selected": scored[0][2],
+        "confidence": round(scored[0][0] - runner_up, 4),
+        "candidates": [candidate for _, _, candidate in scored],
+        "scores": [{"id": c.get("id") or c.get("_id"), "name": c.get("name"), "org": c.get("org"),
+                    "score": score, "signals": signals} for score, signals, c in scored],
+    }
+    if _request_memo is not None:
+        _request_memo.put(key, decision)
+    _cache_store(key, DISAMBIGUATION_PATH, decision)
+    return {**decision, "cached": False}
+
+
+def resolve_scholar(token: str, name: str, org: Optional[str] = None, interests: Any = None,
+                    size: int = DISAMBIGUATION_CANDIDATES,
+                    max_workers: int = WORKFLOW_MAX_WORKERS) -> dict:
+    """
+    Pick the scholar `name` refers to among the top `size` person_search results, using
+    free signals only: name, the hinted `org` (resolved to IDs by the org alias index, else
+    with concurrent free org_search calls), the hinted `interests` (list or comma-separated),
+    search rank and, when org or interests are hinted, citations.
+
+    Returns {"selected", "confidence", "candidates" (best first), "scores", "cached"}, or
+    {"error"} when the search finds nobody. Decisions are memoized and kept in the
+    response cache (7 days), so a repeated name and hints resolve without any call.
+    """
+    return _run_steps(token, _resolve_scholar_steps(name, org, interests, size), max_workers)
+
+
+def _resolve_scholar_steps(name: str, org: Optional[str], interests: Any,
+                           size: int = DISAMBIGUATION_CANDIDATES):
+    key = _decision_key(name, org, interests)
+    decision = _cached_decision(key)
+    if decision is not None:
+        return decision
+    search_result = yield _call("person_search", name=name, size=size)
+    if not search_result or not search_result.get("data"):
+        return {"error": f"Scholar not found: {name}"}
+    candidates = search_result["data"]
+    org_ids, unresolved = _org_ids_from_aliases(_org_names_to_resolve(candidates, org))
+    if unresolved:
+        names = list(unresolved)
+        found = yield _Gather([(None, _call("org_search", [n])) for n in names])
+        org_ids.update((n, unresolved[n] if _search_confirms(r, unresolved[n]) else _org_id_from_search(r))
+                       for n, r in zip(names, found))
+    return _decide(key, name, org, interests, candidates, org_ids)
+
+
+def _ambiguous_scholar(decision: dict, name: str, min_confidence: float) -> Optional[dict]:
+    """The workflows' result when the decision is below min_confidence (no paid call is made), else None."""
+    if decision["confidence"] >= min_confidence:
+        return None
+    print(f"      Ambiguous: confidence {decision['confidence']} < {min_confidence}; "
+          f"stopping before paid calls", file=sys.stderr)
+    return {"error": f"Ambiguous scholar name: {name} (confidence {decision['confidence']}); "
+                     f"add --org or --interests to tell the candidates apart",
+            "candidates": decision["scores"]}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Combined Workflows
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _selected_scholar(decision: dict) -> tuple:
+    """Report the disambiguation decision; returns (scholar, person_id)."""
+    scholar = decision["selected"]
+    person_id = scholar.get("id") or scholar.get("_id")
+    print(f"      Found: {scholar.get('name')} ({scholar.get('org')}), ID={person_id}, "
+          f"confidence={decision['confidence']}{' (cached)' if decision['cached'] else ''}", file=sys.stderr)
+    return scholar, person_id
+
+
+def _disambiguation_summary(decision: dict) -> dict:
+    return {"confidence": decision["confidence"], "cached": decision["cached"],
+            "scores": decision["scores"]}
+
+
+def _scholar_profile_base(decision: dict) -> tuple:
+    """Build the scholar_profile result skeleton for the chosen candidate; returns (result, person_id)."""
+    scholar, person_id = _selected_scholar(decision)
+    candidates = decision["candidates"]
+
+    result = {
+        "source_api_chain": [
+            "person_search",
+            "person_detail",
+            "person_figure",
+            "person_paper_relation",
+            "person_patent_relation",
+            "person_project",
+        ],
+        "search_candidates": candidates[:3],
+        "selected": {
+            "id": person_id,
+            "name": scholar.get("name"),
+            "name_zh": scholar.get("name_zh"),
+            "org": scholar.get("org"),
+            "interests": scholar.get("interests"),
+            "n_citation": scholar.get("n_citation"),
+        },
+        "disambiguation": _disambiguation_summary(decision),
+    }
+    return result, person_id
+
+
+def _fill_scholar_profile(result: dict, detail: Any, figure: Any, papers: Any,
+                          patents: Any, projects: Any) -> dict:
+    if detail and detail.get("data"):
+        result["detail"] = detail["data"]
+
+    if figure and figure.get("data"):
+        result["figure"] = figure["data"]
+
+    if papers and papers.get("data"):
+        result["papers"] = papers["data"][:20]
+        result["papers_total"] = papers.get("total", len(papers["data"]))
+
+    if patents and patents.get("data"):
+        result["patents"] = patents["data"][:10]
+
+    if projects and projects.get("data"):
+        result["projects"] = projects["data"][:10]
+
+    return result
+
+
+def _deep_dive_base(search_api: str, papers: list) -> tuple:
+    """Build the paper_deep_dive result skeleton for the top search hit; returns (result, paper_id)."""
+    top_paper = papers[0]
+    paper_id = top_paper.get("id") or top_paper.get("_id")
+    print(f"      Found: {top_paper.get('title')[:60]}, ID={paper_id}", file=sys.stderr)
+
+    result = {
+        "source_api_chain": [
+            search_api,
+            "paper_detail",
+            "paper_relation",
+            "paper_info",
+        ],
+        "search_candidates": papers[:5],
+        "selected_id": paper_id,
+        "selected_title": top_paper.get("title"),
+    }
+    return result, paper_id
+
+
+def _cited_papers(relation: Any) -> list:
+    """Flatten paper_relation data into the list of cited papers."""
+    # data structure: [{"_id": "<paper_id>", "cited": [{...}, ...]}]
+    # the outer array wraps each paper; the actual citation list is in the cited field
+    all_cited = []
+    for item in relation["data"]:
+        all_cited.extend(item.get("cited") or [])
+    return all_cited
+
+
+def _org_id_from_disambiguation(disamb: Any) -> Optional[str]:
+    if disamb and disamb.get("data"):
+        data = disamb["data"]
+        if isinstance(data, list) and data:
+            first = data[0]
+            return first.get("一级ID") or first.get("二级ID")
+        elif isinstance(data, dict):
+            return data.get("一级ID") or data.get("二级ID")
+    return None
+
+
+def _org_id_from_search(search_r: Any) -> Optional[str]:
+    if search_r and search_r.get("data"):
+        orgs = search_r["data"]
+        return orgs[0].get("org_id") if orgs else None
+    return None
+
+
+def _org_analysis_base(org: str, org_id: str, disamb: Any, alias: Optional[dict] = None) -> dict:
+    print(f"      Org ID: {org_id}", file=sys.stderr)
+    return {
+        "source_api_chain": [
+            ("org_alias_index+org_search" if alias["match"] == "org_search" else "org_alias_index")
+            if alias is not None else
+            "org_disambiguate_pro" if disamb is not None else "org_search(budget)",
+            "org_detail",
+            "org_person_relation",
+            "org_paper_relation",
+            "org_patent_relation",
+        ],
+        "org_query": org,
+        "org_id": org_id,
+        "disambiguate": disamb,
+        "alias_match": alias,
+    }
+
+
+def _fill_org_analysis(result: dict, detail: Any, scholars: Any, papers: Any, patents: Any) -> dict:
+    if detail and detail.get("data"):
+        result["detail"] = detail["data"]
+
+    if scholars and scholars.get("data"):
+        result["scholars"] = scholars["data"]
+        result["scholars_total"] = scholars.get("total", len(scholars["data"]))
+
+    if papers and papers.get("data"):
+        result["papers"] = papers["data"]
+        result["papers_total"] = papers.get("total", len(papers["data"]))
+
+    if patents and patents.get("data"):
+        result["patents"] = patents["data"]
+        result["patents_total"] = patents.get("total", len(patents["data"]))
+
+    return result
+
+
+def _venue_papers_base(venues: list) -> tuple:
+    """Build the venue_papers result skeleton for the top search hit; returns (result, venue_id)."""
+    top_venue = venues[0]
+    venue_id = top_venue.get("id")
+    print(f"      Found: {top_venue.get('name_en')}, ID={venue_id}", file=sys.stderr)
+    result = {
+        "source_api_chain": [
+            "venue_search",
+            "venue_detail",
+            "venue_paper_relation",
+        ],
+        "search_candidates": venues[:3],
+        "venue_id": venue_id,
+    }
+    return result, venue_id
+
+
+def _paper_qa_fallback_result(qa_result: Any, fallback: Any) -> dict:
+    data = (fallback or {}).get("data") or []
+    return {
+        "code": 200 if data else (qa_result or {}).get("code", -1),
+        "success": bool(data),
+        "msg": "" if data else "no data",
+        "data": data,
+        "total": (fallback or {}).get("total", len(data)),
+        "route": "paper_qa_search -> paper_search_pro",
+        "source_api_chain": ["paper_qa_search", "paper_search_pro"],
+        "primary_result": qa_result,
+    }
+
+
+def _tag_paper_qa_route(qa_result: Any) -> Any:
+    if isinstance(qa_result, dict):
+        qa_result["source_api_chain"] = ["paper_qa_search"]
+        qa_result["route"] = "paper_qa_search"
+    return qa_result
+
+
+def workflow_scholar_profile(token: str, name: str,
+                             max_workers: int = WORKFLOW_MAX_WORKERS,
+                             org: Optional[str] = None, interests: Any = None,
+                             min_confidence: float = DISAMBIGUATION_MIN_CONFIDENCE) -> dict:
+    """
+    Workflow 1: Scholar Profile
+    Search + disambiguate scholar (resolve_scholar; `org` / `interests` are hints) →
+    details + portrait + papers + patents + projects (fetched concurrently)
+    """
+    return _run_steps(token, _scholar_profile_steps(name, org, interests, min_confidence), max_workers)
+
+
+def _scholar_profile_steps(name: str, org: Optional[str], interests: Any, min_confidence: float):
+    print(f"[1/6] Searching scholar: {name}", file=sys.stderr)
+    decision = yield from _resolve_scholar_steps(name, org, interests)
+    if "error" in decision:
+        return decision
+    ambiguous = _ambiguous_scholar(decision, name, min_confidence)
+    if ambiguous:
+        return ambiguous
+
+    result, person_id = _scholar_profile_base(decision)
+
+    stage_results = yield from _stage_steps([
+        ("[2/6] Fetching scholar details...", _call("person_detail", person_id)),
+        ("[3/6] Fetching scholar portrait...", _call("person_figure", person_id)),
+        ("[4/6] Fetching scholar papers...", _call("person_paper_relation", person_id)),
+        ("[5/6] Fetching scholar patents...", _call("person_patent_relation", person_id)),
+        ("[6/6] Fetching scholar projects...", _call("person_project", person_id)),
+    ])
+    return _fill_scholar_profile(result, *stage_results)
+
+
+def _search_paper_steps(title: str = None, keyword: str = None,
+                        author: str = None, order: str = "n_citation", then: tuple = ()):
+    """
+    Paper lookup shared by the paper workflows; returns (search_api, search_result).
+    `then` lists the paid stages that follow (see _use_free_alternative).
+    """
+    if (keyword or author) and _use_free_alternative("paper_search_pro", then):
+        # Title search cannot filter by author; it searches the title, else the keyword
+        search_result = yield _call("paper_search", title=title or keyword or author, size=5)
+        search_api = "paper_search(budget)"
+    elif keyword or author:
+        search_result = yield _call("paper_search_pro", title=title, keyword=keyword,
+                                    author=author, order=order, size=5)
+        search_api = "paper_search_pro"
+    else:
+        search_result = yield _call("paper_search", title=title or keyword, size=5)
+        search_api = "paper_search"
+        if not search_result or not search_result.get("data"):
+            # Fall back to pro search when title search yields no results to improve recall
+            print("      Title search returned no results; falling back to paper_search_pro...", file=sys.stderr)
+            search_result = yield _call("paper_search_pro", title=title, keyword=title,
+                                        author=author, order=order, size=5)
+            search_api = "paper_search_pro(fallback)"
+    return search_api, search_result
+
+
+def workflow_paper_deep_dive(token: str, title: str = None, keyword: str = None,
+                              author: str = None, order: str = "n_citation") -> dict:
+    """
+    Workflow 2: Paper Deep Dive
+    Search paper → details + citation chain + basic info of cited papers
+    """
+    return _run_steps(token, _paper_deep_dive_steps(title, keyword, author, order))
+
+
+def _paper_deep_dive_steps(title: str, keyword: str, author: str, order: str):
+    print(f"[1/4] Searching paper: title={title}, keyword={keyword}", file=sys.stderr)
+    search_api, search_result = yield from _search_paper_steps(title, keyword, author, order,
+                                                               then=("paper_detail", "paper_relation"))
+    if not search_result or not search_result.get("data"):
+        return {"error": "No relevant papers found"}
+
+    result, paper_id = _deep_dive_base(search_api, search_result["data"])
+
+    print("[2/4] Fetching paper details...", file=sys.stderr)
+    detail = yield _call("paper_detail", paper_id)
+    if detail and detail.get("data"):
+        result["detail"] = detail["data"]
+
+    print("[3/4] Fetching citation relationships...", file=sys.stderr)
+    relation = yield _call("paper_relation", paper_id)
+    if relation and relation.get("data"):
+        all_cited = _cited_papers(relation)
+        result["citations_count"] = len(all_cited)
+        result["citations_preview"] = all_cited[:10]
+
+        cited_ids = [c.get("_id") or c.get("id") for c in all_cited[:20]
+                     if c.get("_id") or c.get("id")]
+        if cited_ids:
+            print(f"[4/4] Batch-fetching basic info for {len(cited_ids)} cited papers...", file=sys.stderr)
+            info = yield _call("paper_info", cited_ids)
+            if info and info.get("data"):
+                result["cited_papers_info"] = info["data"]
+        else:
+            print("[4/4] Skipping (no cited IDs)", file=sys.stderr)
+    else:
+        print("[4/4] Skipping (no citation data)", file=sys.stderr)
+
+    return result
+
+
+def workflow_org_analysis(token: str, org: str,
+                          max_workers: int = WORKFLOW_MAX_WORKERS) -> dict:
+    """
+    Workflow 3: Org Analysis
+    Org disambiguation pro → details + scholars + papers + patents (fetched concurrently)
+
+    Names the org alias index already knows skip the disambiguation call; a fuzzy alias
+    candidate does so only once a free org_search returns its ID.
+    """
+    return _run_steps(token, _org_analysis_steps(org), max_workers)
+
+
+ORG_ANALYSIS_STAGES = ("org_detail", "org_person_relation", "org_paper_relation", "org_patent_relation")
+
+
+def _org_analysis_steps(org: str):
+    print(f"[1/5] Disambiguating org: {org}", file=sys.stderr)
+    alias = _org_alias_lookup(org)
+    if alias is not None and alias["match"] == "candidate":
+        if _search_confirms((yield _call("org_search", [org])), alias["org_id"]):
+            alias = {**alias, "match": "org_search"}
+        else:
+            print("      Alias candidate not among org search results; disambiguating", file=sys.stderr)
+            alias = None
+    disamb = None
+    if alias is not None:
+        org_id = alias["org_id"]
+    else:
+        if not _use_free_alternative("org_disambiguate_pro", then=ORG_ANALYSIS_STAGES):
+            disamb = yield _call("org_disambiguate_pro", org)
+        org_id = _org_id_from_disambiguation(disamb)
+
+        if not org_id:
+            if disamb is not None:
+                print("      Disambiguation pro returned no ID; trying org search...", file=sys.stderr)
+            org_id = _org_id_from_search((yield _call("org_search", [org])))
+
+    if not org_id:
+        return {"error": f"Could not find org ID: {org}"}
+
+    result = _org_analysis_base(org, org_id, disamb, alias)
+
+    stage_results = yield from _stage_steps([  # the ORG_ANALYSIS_STAGES
+        ("[2/5] Fetching org details...", _call("org_detail_batched", org_id)),
+        ("[3/5] Fetching org scholars (top 10)...", _call("org_person_relation", org_id, offset=0)),
+        ("[4/5] Fetching org papers (top 10)...", _call("org_paper_relation", org_id, offset=0)),
+        ("[5/5] Fetching org patents (up to 100)...",
+         _call("org_patent_relation", org_id, page=1, page_size=100)),
+    ])
+    return _fill_org_analysis(result, *stage_results)
+
+
+def workflow_venue_papers(token: str, venue: str, year: Optional[int] = None,
+                           limit: int = 20) -> dict:
+    """
+    Workflow 4: Venue Papers
+    Venue search → venue details + papers by year
+    """
+    return _run_steps(token, _venue_papers_steps(venue, year, limit))
+
+
+def _venue_papers_steps(venue: str, year: Optional[int], limit: int):
+    print(f"[1/3] Searching venue: {venue}", file=sys.stderr)
+    search_result = yield _call("venue_search", venue)
+    if not search_result or not search_result.get("data"):
+        return {"error": f"Venue not found: {venue}"}
+
+    result, venue_id = _venue_papers_base(search_result["data"])
+
+    print("[2/3] Fetching venue details...", file=sys.stderr)
+    detail = yield _call("venue_detail", venue_id)
+    if detail and detail.get("data"):
+        result["venue_detail"] = detail["data"]
+
+    print(f"[3/3] Fetching venue papers (year={year}, limit={limit})...", file=sys.stderr)
+    papers = yield _call("venue_paper_relation", venue_id, year=year, limit=limit)
+    if papers and papers.get("data"):
+        result["papers"] = papers["data"]
+        result["papers_total"] = papers.get("total", len(papers["data"]))
+
+    return result
+
+
+def workflow_paper_qa(token: str, query: str = None,
+                      topic_high: str = None, topic_middle: str = None,
+                      sci_flag: bool = False, sort_citation: bool = False, sort_year: bool = False,
+                      author_id: list = None, org_id: list = None, venue_ids: list = None,
+                      size: int = 10) -> dict:
+    """
+    Workflow 5: Paper QA Search
+    Use AI-powered paper Q&A search API
+    """
+    return _run_steps(token, _paper_qa_steps(query, topic_high, topic_middle, sci_flag, sort_citation,
+                                             sort_year, author_id, org_id, venue_ids, size))
+
+
+def _paper_qa_steps(query: str, topic_high: str, topic_middle: str, sci_flag: bool,
+                    sort_citation: bool, sort_year: bool, author_id: list, org_id: list,
+                    venue_ids: list, size: int):
+    use_topic = topic_high is not None
+    print(f"[1/1] Academic Q&A search: query={query}, use_topic={use_topic}", file=sys.stderr)
+    qa_result = yield _call(
+        "paper_qa_search", query=query, use_topic=use_topic,
+        topic_high=topic_high, topic_middle=topic_middle,
+        sci_flag=sci_flag, force_citation_sort=sort_citation,
+        force_year_sort=sort_year,
+        author_id=author_id, org_id=org_id, venue_ids=venue_ids,
+        size=size
+    )
+    if qa_result and qa_result.get("code") == 200 and qa_result.get("data"):
+        return _tag_paper_qa_route(qa_result)
+
+    # Fall back to pro search when query mode yields no results
+    if query:
+        print("      paper_qa_search returned no results; falling back to paper_search_pro...", file=sys.stderr)
+        fallback = yield _call("paper_search_pro", keyword=query, order="n_citation", size=size)
+        return _paper_qa_fallback_result(qa_result, fallback)
+
+    return _tag_paper_qa_route(qa_result)
+
+
+def _patent_detail_ids(patents: list, id_field: str, detail_limit: Optional[int]) -> list:
+    """IDs of the first `detail_limit` patents (all of them when None) to fetch details for."""
+    selected = patents if detail_limit is None else patents[:max(0, detail_limit)]
+    return [p.get(id_field) for p in selected if p.get(id_field)]
+
+
+def _patent_detail_label(step: str, ids: list, basic_details: bool) -> str:
+    what = "basic info" if basic_details else "details"
+    return f"{step} Fetching {what} for {len(ids)} patents..."
+
+
+def _patent_detail_steps(ids: list, basic_details: bool = False):
+    """
+    Fetch patent_detail (or the free patent_info when basic_details) for each ID
+    concurrently; returns the `data` of every successful response in ID order.
+    Under a cost budget, IDs past what the budget still covers get patent_info instead.
+    """
+    detailed = 0 if basic_details else len(ids)
+    budget = _cost_budget
+    if budget is not None and detailed:
+        detailed = budget.affordable_count("patent_detail", len(ids))
+        if detailed < len(ids):
+            budget.substitute("patent_detail", len(ids) - detailed)
+            print(f"      Budget: using free patent_info for {len(ids) - detailed} of {len(ids)} patents",
+                  file=sys.stderr)
+
+    responses = yield _Gather([(None, _call("patent_detail" if i < detailed else "patent_info", pid))
+                               for i, pid in enumerate(ids)])
+    return [d["data"] for d in responses if d and d.get("data")]
+
+
+def workflow_patent_search(token: str, query: str, page: int = 0, size: int = 10,
+                           detail_limit: Optional[int] = PATENT_DETAIL_LIMIT,
+                           basic_details: bool = False,
+                           max_workers: int = WORKFLOW_MAX_WORKERS) -> dict:
+    """
+    Workflow 6: Patent Search and Details
+    Patent search → retrieve details for the top `detail_limit` patents (None = all), concurrently.
+    basic_details uses the free patent_info instead of patent_detail.
+    """
+    return _run_steps(token, _patent_search_steps(query, page, size, detail_limit, basic_details),
+                      max_workers)
+
+
+def _patent_search_steps(query: str, page: int, size: int, detail_limit: Optional[int],
+                         basic_details: bool):
+    print(f"[1/2] Searching patents: {query}", file=sys.stderr)
+    search_result = yield _call("patent_search", query, page=page, size=size)
+    if not search_result or not search_result.get("data"):
+        return {"error": f"No patents found: {query}"}
+
+    patents = search_result["data"]
+    result = {
+        "source_api_chain": ["patent_search", "patent_info" if basic_details else "patent_detail"],
+        "search_results": patents,
+        "total": len(patents),
+    }
+
+    ids = _patent_detail_ids(patents, "id", detail_limit)
+    print(_patent_detail_label("[2/2]", ids, basic_details), file=sys.stderr)
+    result["details"] = yield from _patent_detail_steps(ids, basic_details)
+    return result
+
+
+def workflow_scholar_patents(token: str, name: str,
+                             detail_limit: Optional[int] = PATENT_DETAIL_LIMIT,
+                             basic_details: bool = False,
+                             max_workers: int = WORKFLOW_MAX_WORKERS,
+                             org: Optional[str] = None, interests: Any = None,
+                             min_confidence: float = DISAMBIGUATION_MIN_CONFIDENCE) -> dict:
+    """
+    Retrieve patent list + individual patent details for a scholar by name, disambiguated
+    like scholar_profile (top `detail_limit` patents, None = all, fetched concurrently)
+    """
+    return _run_steps(token, _scholar_patents_steps(name, detail_limit, basic_details, org, interests,
+                                                    min_confidence), max_workers)
+
+
+def _scholar_patents_steps(name: str, detail_limit: Optional[int], basic_details: bool,
+                           org: Optional[str], interests: Any, min_confidence: float):
+    print(f"[1/3] Searching scholar: {name}", file=sys.stderr)
+    decision = yield from _resolve_scholar_steps(name, org, interests)
+    if "error" in decision:
+        return decision
+    ambiguous = _ambiguous_scholar(decision, name, min_confidence)
+    if ambiguous:
+        return ambiguous
+
+    scholar, person_id = _selected_scholar(decision)
+    result = {"scholar": scholar, "disambiguation": _disambiguation_summary(decision)}
+
+    print("[2/3] Fetching scholar patent list...", file=sys.stderr)
+    patents = yield _call("person_patent_relation", person_id)
+    if not patents or not patents.get("data"):
+        return {**result, "patents": [], "error": "No patent data for this scholar"}
+    patent_list = patents["data"]
+    result["patents_list"] = patent_list
+
+    ids = _patent_detail_ids(patent_list, "patent_id", detail_limit)
+    print(_patent_detail_label("[3/3]", ids, basic_details), file=sys.stderr)
+    result["patent_details"] = yield from _patent_detail_steps(ids, basic_details)
+    return result
+
+
+def workflow_citation_graph(token: str, title: str = None, keyword: str = None,
+                            author: str = None, order: str = "n_citation",
+                            max_depth: int = CRAWL_MAX_DEPTH, max_nodes: int = CRAWL_MAX_NODES,
+                            strategy: str = "bfs", max_workers: int = WORKFLOW_MAX_WORKERS,
+                            max_cost: Optional[float] = None, edge_list: Optional[str] = None) -> dict:
+    """
+    Search paper → k-hop reference graph (paper_relation crawl) + basic info of every node.
+    edge_list additionally writes the citations as a tab-separated edge list file.
+    """
+    return _run_steps(token, _citation_graph_steps(title, keyword, author, order, max_depth, max_nodes,
+                                                   strategy, max_workers, max_cost, edge_list),
+                      max_workers)
+
+
+def _citation_graph_steps(title: str, keyword: str, author: str, order: str, max_depth: int,
+                          max_nodes: int, strategy: str, max_workers: int,
+                          max_cost: Optional[float], edge_list: Optional[str]):
+    print(f"[1/2] Searching paper: title={title}, keyword={keyword}", file=sys.stderr)
+    search_api, search_result = yield from _search_paper_steps(title, keyword, author, order,
+                                                               then=("paper_relation",))
+    if not search_result or not search_result.get("data"):
+        return {"error": "No relevant papers found"}
+
+    seed = search_result["data"][0]
+    print(f"      Found: {(seed.get('title') or '')[:60]}, ID={seed.get('id') or seed.get('_id')}",
+          file=sys.stderr)
+    print(f"[2/2] Crawling references ({strategy}, depth={max_depth}, max_nodes={max_nodes})...",
+          file=sys.stderr)
+    graph = yield _Threaded(partial(_crawl_with, [seed], max_depth=max_depth, max_nodes=max_nodes,
+                                    strategy=strategy, max_workers=max_workers, max_cost=max_cost))
+    stats = graph.stats
+    print(f"      {stats['nodes']} papers, {stats['edges']} citations, cost ¥{stats['cost']}, "
+          f"stopped: {stats['stopped']}", file=sys.stderr)
+
+    result = {
+        "source_api_chain": [search_api, "paper_relation", "paper_info"],
+        "seed": seed,
+        **graph.to_dict(),
+    }
+    if edge_list:
+        graph.write_edge_list(edge_list)
+        result["edge_list"] = edge_list
+    return result
+
+
+def _crawl_with(seeds: list, call, **options) -> CitationGraph:
+    return crawl_citation_graph(None, seeds, call=call, **options)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Incremental Venue Sync
+# ──────────────────────────────────────────────────────────────────────────────
+
+class VenueSyncState:
+    """
+    Persistent watermarks of workflow_venue_sync (SQLite): per venue, the years already
+    swept (with their paper counts and last sweep time; the latest one is the venue's
+    watermark year) and the ID of every paper already emitted, so later syncs emit only
+    papers they have not seen. new_papers() only reads; a sweep is recorded by commit()
+    once its papers are written. Safe to share between threads; never stores the token.
+    """
+
+    def __init__(self, path: str = SYNC_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS venue_years ("
+            " venue_id TEXT NOT NULL, year INTEGER NOT NULL, papers INTEGER NOT NULL,"
+            " synced REAL NOT NULL, PRIMARY KEY (venue_id, year))")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS venue_papers ("
+            " venue_id TEXT NOT NULL, paper_id TEXT NOT NULL, year INTEGER NOT NULL,"
+            " PRIMARY KEY (venue_id, paper_id))")
+
+    def watermark(self, venue_id: str) -> dict:
+        """{"last_year": latest swept year or None, "years": {year: papers seen}}."""
+        with self._lock:
+            rows = self._db.execute("SELECT year, papers FROM venue_years WHERE venue_id = ?",
+                                    (venue_id,)).fetchall()
+        years = dict(rows)
+        return {"last_year": max(years) if years else None, "years": years}
+
+    def new_papers(self, venue_id: str, papers: list) -> list:
+        """The papers whose IDs no committed sweep of the venue recorded, in order (records nothing)."""
+        fresh, ids = [], set()
+        with self._lock:
+            for paper in papers:
+                paper_id = paper.get("_id") or paper.get("id")
+                if not paper_id or paper_id in ids:
+                    continue
+                ids.add(paper_id)
+                seen = self._db.execute("SELECT 1 FROM venue_papers WHERE venue_id = ? AND paper_id = ?",
+                                        (venue_id, paper_id)).fetchone()
+                if seen is None:
+                    fresh.append(paper)
+        return fresh
+
+    def commit(self, venue_id: str, ids: dict) -> None:
+        """Record sweeps ({year: IDs of every paper the year returned}) in one transaction."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for year, paper_ids in ids.items():
+                    self._db.executemany(
+                        "INSERT OR IGNORE INTO venue_papers (venue_id, paper_id, year) VALUES (?, ?, ?)",
+                        [(venue_id, paper_id, year) for paper_id in paper_ids])
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO venue_years (venue_id, year, papers, synced) VALUES (?, ?, "
+                        "(SELECT COUNT(*) FROM venue_papers WHERE venue_id = ? AND year = ?), ?)",
+                        (venue_id, year, venue_id, year, time.time()))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def reset(self, venue_id: str) -> None:
+        """Forget a venue's watermark, so its next sync starts over."""
+        with self._lock:
+            self._db.execute("DELETE FROM venue_years WHERE venue_id = ?", (venue_id,))
+            self._db.execute("DELETE FROM venue_papers WHERE venue_id = ?", (venue_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_venue_sync_state: Optional[VenueSyncState] = None
+_venue_sync_lock = threading.Lock()
+
+
+def get_venue_sync_state() -> VenueSyncState:
+    """Return the venue sync watermarks, opening the default file (SYNC_STATE_PATH) on first use."""
+    global _venue_sync_state
+    with _venue_sync_lock:
+        if _venue_sync_state is None:
+            _venue_sync_state = VenueSyncState()
+        return _venue_sync_state
+
+
+def configure_venue_sync(path: str = SYNC_STATE_PATH) -> VenueSyncState:
+    """Keep venue sync watermarks in `path` (":memory:" for a throwaway state)."""
+    global _venue_sync_state
+    with _venue_sync_lock:
+        old, _venue_sync_state = _venue_sync_state, VenueSyncState(path)
+    if old is not None:
+        old.close()
+    return _venue_sync_state
+
+
+def _sync_years(watermark: dict, from_year: Optional[int], to_year: int, reopen_years: int) -> tuple:
+    """(years to sweep, already-synced years left closed) for one venue."""
+    last_year, synced = watermark["last_year"], watermark["years"]
+    if from_year is None:
+        from_year = to_year - SYNC_INITIAL_YEARS + 1 if last_year is None else last_year - reopen_years + 1
+    reopened_from = to_year + 1 if last_year is None else last_year - reopen_years + 1
+    years = range(from_year, to_year + 1)
+    return ([y for y in years if y not in synced or y >= reopened_from],
+            [y for y in years if y in synced and y < reopened_from])
+
+
+def workflow_venue_sync(token: str, venue: str, from_year: Optional[int] = None,
+                        to_year: Optional[int] = None, reopen_years: int = SYNC_REOPEN_YEARS,
+                        max_workers: int = WORKFLOW_MAX_WORKERS) -> dict:
+    """
+    Incremental venue sync: venue search → paper_detail_by_condition for every year of the
+    range that is not closed yet (years fetched concurrently, bypassing cached responses)
+    → only the papers no earlier sync of this venue emitted, as `data`.
+
+    Without from_year, a venue's first sync covers the latest SYNC_INITIAL_YEARS years up to
+    to_year (default: this year) and later syncs start `reopen_years` - 1 years before the
+    watermark year. An explicit from_year backfills the range's never-swept years; synced
+    years before the reopened ones stay closed either way.
+
+    Nothing is recorded until the caller has written the result and passes it to
+    commit_venue_sync() (the CLI does so after writing its output), so papers of a run whose
+    output was lost are emitted again by the next sync; a year whose call failed is retried.
+    """
+    return _run_steps(token, _venue_sync_steps(venue, from_year, to_year, reopen_years), max_workers)
+
+
+def _venue_sync_steps(venue: str, from_year: Optional[int], to_year: Optional[int], reopen_years: int):
+    print(f"[1/2] Searching venue: {venue}", file=sys.stderr)
+    search_result = yield _call("venue_search", venue)
+    if not search_result or not search_result.get("data"):
+        return {"error": f"Venue not found: {venue}"}
+    top_venue = search_result["data"][0]
+    venue_id = top_venue.get("id")
+    print(f"      Found: {top_venue.get('name_en')}, ID={venue_id}", file=sys.stderr)
+
+    state = get_venue_sync_state()
+    watermark = state.watermark(venue_id)
+    to_year = to_year or time.localtime().tm_year
+    years, closed = _sync_years(watermark, from_year, to_year, max(1, reopen_years))
+    print(f"[2/2] Sweeping {len(years)} year(s) {years[0] if years else '-'}..{years[-1] if years else '-'} "
+          f"(watermark={watermark['last_year']}, closed={len(closed)})...", file=sys.stderr)
+
+    responses = []
+    if years:
+        responses = yield _Gather([(None, _call("paper_detail_by_condition", year, venue_id=venue_id))
+                                   for year in years], fresh=True)
+
+    new_papers, swept, failed, emitted, ids = [], [], [], set(), {}
+    for year, resp in zip(years, responses):
+        if not isinstance(resp, dict) or resp.get("success") is False or resp.get("code", 200) != 200:
+            failed.append({"year": year, "error": (resp or {}).get("msg") if isinstance(resp, dict) else None})
+            continue
+        papers = resp.get("data") or []
+        ids[year] = [p.get("_id") or p.get("id") for p in papers if p.get("_id") or p.get("id")]
+        fresh = [p for p in state.new_papers(venue_id, papers) if (p.get("_id") or p.get("id")) not in emitted]
+        emitted.update(p.get("_id") or p.get("id") for p in fresh)
+        swept.append({"year": year, "papers": len(papers), "new": len(fresh)})
+        new_papers.extend(fresh)
+    print(f"      {len(new_papers)} new paper(s); {len(failed)} year(s) failed", file=sys.stderr)
+
+    return {
+        "source_api_chain": ["venue_search", "paper_detail_by_condition"],
+        "venue": {"id": venue_id, "name": top_venue.get("name_en") or top_venue.get("name")},
+        "watermark": max([y for y in ids] + ([watermark["last_year"]] if watermark["last_year"] else []),
+                         default=None),
+        "years_swept": swept,
+        "years_closed": closed,
+        "years_failed": failed,
+        "new_count": len(new_papers),
+        "data": new_papers,
+        "_sync_commit": {"venue_id": venue_id, "ids": ids},
+    }
+
+
+def commit_venue_sync(result: Any) -> None:
+    """
+    Record a workflow_venue_sync result's sweeps once its papers are safely written: removes
+    its "_sync_commit" entry and advances the venue's watermark, so the next sync skips them.
+    Results of other actions (and results already committed) are left alone.
+    """
+    pending = result.pop("_sync_commit", None) if isinstance(result, dict) else None
+    if pending is not None and pending["ids"]:
+        get_venue_sync_state().commit(pending["venue_id"], pending["ids"])
+
+
+def _hold_sync_commit(result: Any) -> Optional[dict]:
+    """Take a venue sync's pending commit out of `result` before it is written, for commit_venue_sync()."""
+    if isinstance(result, dict) and "_sync_commit" in result:
+        return {"_sync_commit": result.pop("_sync_commit")}
+    return None
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Asyncio Client
+# ──────────────────────────────────────────────────────────────────────────────
+
+API_FUNCTIONS = (
+    # Paper APIs
+    "paper_search", "paper_search_pro", "paper_qa_search", "paper_info", "paper_detail",
+    "paper_relation", "paper_list_by_search_venue", "paper_list_by_keywords",
+    "paper_detail_by_condition",
+    # Scholar APIs
+    "person_search", "person_detail", "person_figure", "person_paper_relation",
+    "person_patent_relation", "person_project",
+    # Institution APIs
+    "org_search", "org_detail", "org_person_relation", "org_paper_relation",
+    "org_patent_relation", "org_disambiguate", "org_disambiguate_pro",
+    # Journal APIs
+    "venue_search", "venue_detail", "venue_paper_relation",
+    # Patent APIs
+    "patent_search", "patent_info", "patent_detail",
+)
+
+WORKFLOW_FUNCTIONS = (
+    "workflow_scholar_profile", "workflow_paper_deep_dive", "workflow_org_analysis",
+    "workflow_venue_papers", "workflow_paper_qa", "workflow_patent_search",
+    "workflow_scholar_patents",
+)
+
+
+class AsyncConnectionPool:
+    """
+    asyncio counterpart of ConnectionPool: keep-alive HTTP/1.1 connections over
+    asyncio streams, with the same pool size / per-host limit / idle timeout knobs
+    and the same stats() counters. Must be used from a single event loop.
+    `read_timeout` bounds the whole exchange (request write + full response read).
+    Proxies and redirects are handled like ConnectionPool handles them.
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE,
+                 max_per_host: int = POOL_MAX_PER_HOST,
+                 idle_timeout: float = POOL_IDLE_TIMEOUT_SECONDS,
+                 connect_timeout: float = CONNECT_TIMEOUT_SECONDS,
+                 read_timeout: float = READ_TIMEOUT_SECONDS):
+        self.pool_size = max(0, pool_size)
+        self.max_per_host = max(1, max_per_host)
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._idle: dict = {}        # key -> deque[(reader, writer, last_used)]
+        self._idle_count = 0
+        self._host_slots: dict = {}  # key -> asyncio.Semaphore
+        self._routes: dict = {}      # key -> _proxy_route() result
+        self._ssl_context = None     # built on the first https connection
+        self._stats = {"requests": 0, "connections_created": 0,
+                       "connections_reused": 0, "connections_discarded": 0}
+
+    def _tls_context(self) -> "ssl.SSLContext":
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        return self._ssl_context
+
+    def _checkout_idle(self, key: tuple) -> Optional[tuple]:
+        now = time.monotonic()
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer, last_used = idle.pop()
+            self._idle_count -= 1
+            if now - last_used <= self.idle_timeout and not reader.at_eof() and not writer.is_closing():
+                self._stats["connections_reused"] += 1
+                return reader, writer
+            self._stats["connections_discarded"] += 1
+            writer.close()
+        return None
+
+    def _checkin(self, key: tuple, reader, writer, reusable: bool) -> None:
+        if reusable and self._idle_count < self.pool_size:
+            self._idle.setdefault(key, deque()).append((reader, writer, time.monotonic()))
+            self._idle_count += 1
+            return
+        self._stats["connections_discarded"] += 1
+        writer.close()
+
+    @staticmethod
+    async def _exchange(reader, writer, method: str, target: str, host: str,
+                        body: Optional[bytes], headers: dict) -> tuple:
+        """Write one request and read its response; returns (_HTTPResponse, reusable)."""
+        sent = time.perf_counter()
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}", "Accept-Encoding: identity"]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        if body is not None or method in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(body) if body else 0}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if body:
+            writer.write(body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise http_client.RemoteDisconnected("Remote end closed connection without response")
+        first_byte = time.perf_counter()
+        version, _, rest = status_line.decode("latin-1").strip().partition(" ")
+        status_text, _, reason = rest.partition(" ")
+        try:
+            status = int(status_text)
+        except ValueError:
+            raise http_client.BadStatusLine(status_line.decode("latin-1", errors="replace")) from None
+
+        resp_headers = http_client.HTTPMessage()
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            resp_headers[name.strip()] = value.strip()
+
+        reusable = True
+        if status < 200 or status in (204, 304):
+            data = b""
+        elif "chunked" in (resp_headers.get("Transfer-Encoding") or "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass  # skip trailers
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            data = b"".join(chunks)
+        elif resp_headers.get("Content-Length") is not None:
+            data = await reader.readexactly(int(resp_headers["Content-Length"]))
+        else:
+            data = await reader.read()
+            reusable = False
+
+        connection = (resp_headers.get("Connection") or "").lower()
+        if connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive"):
+            reusable = False
+        timings = {"ttfb": first_byte - sent, "transfer": time.perf_counter() - first_byte}
+        return _HTTPResponse(status, reason, resp_headers, data, timings), reusable
+
+    async def _connect(self, key: tuple, proxy: Optional[tuple]) -> tuple:
+        """Open (reader, writer) to `key`, through `proxy` if given (CONNECT tunnel for https)."""
+        scheme, host, port = key
+        tls = self._tls_context() if scheme == "https" else None
+        if proxy is None:
+            return await asyncio.open_connection(host, port, ssl=tls)
+        if tls is None:
+            return await asyncio.open_connection(proxy[0], proxy[1])
+        # Tunnel over a plain socket first, then hand it to asyncio for the TLS handshake
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(proxy[0], proxy[1], type=socket.SOCK_STREAM)
+        family, type_, proto, _, address = infos[0]
+        sock = socket.socket(family, type_, proto)
+        try:
+            sock.setblocking(False)
+            await loop.sock_connect(sock, address)
+            lines = [f"CONNECT {host}:{port} HTTP/1.1", f"Host: {host}:{port}"]
+            if proxy[2]:
+                lines.append(f"Proxy-Authorization: {proxy[2]}")
+            await loop.sock_sendall(sock, ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+            reply = b""
+            while b"\r\n\r\n" not in reply:
+                data = await loop.sock_recv(sock, 4096)
+                if not data:
+                    break
+                reply += data
+            status_line = reply.split(b"\r\n", 1)[0].decode("latin-1")
+            if status_line.split(" ")[1:2] != ["200"]:
+                raise OSError(f"Tunnel connection failed: {status_line or 'no response'}")
+            return await asyncio.open_connection(sock=sock, ssl=tls, server_hostname=host)
+        except BaseException:
+            sock.close()
+            raise
+
+    async def request(self, method: str, url: str, body: Optional[bytes] = None,
+                      headers: Optional[dict] = None,
+                      timeout: Optional[float] = None,
+                      connect_timeout: Optional[float] = None) -> _HTTPResponse:
+        """Send one request over a pooled connection and return the fully-read response."""
+        for _ in range(POOL_MAX_REDIRECTS):
+            resp = await self._request_once(method, url, body, headers, timeout, connect_timeout)
+            redirect = _redirect_request(method, url, body, headers, resp.status, resp.headers)
+            if redirect is None:
+                return resp
+            method, url, body, headers = redirect
+        return await self._request_once(method, url, body, headers, timeout, connect_timeout)
+
+    async def _request_once(self, method: str, url: str, body: Optional[bytes], headers: Optional[dict],
+                            timeout: Optional[float], connect_timeout: Optional[float]) -> _HTTPResponse:
+        timeout = self.read_timeout if timeout is None else timeout
+        connect_timeout = self.connect_timeout if connect_timeout is None else connect_timeout
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "https"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        headers = headers or {}
+        if key not in self._routes:
+            self._routes[key] = _proxy_route(scheme, parts.hostname)
+        proxy = self._routes[key]
+        if proxy and scheme == "http":  # forwarded by the proxy, not tunneled
+            target = f"http://{parts.netloc}{target}"
+            if proxy[2]:
+                headers = {**headers, "Proxy-Authorization": proxy[2]}
+
+        self._stats["requests"] += 1
+        slot = self._host_slots.get(key)
+        if slot is None:
+            slot = self._host_slots[key] = asyncio.Semaphore(self.max_per_host)
+
+        async with slot:
+            fresh = False
+            while True:
+                conn = None if fresh else self._checkout_idle(key)
+                reused = conn is not None
+                connect_seconds = None
+                limit = connect_timeout
+                try:
+                    if conn is None:
+                        self._stats["connections_created"] += 1
+                        start = time.perf_counter()
+                        conn = await asyncio.wait_for(self._connect(key, proxy), connect_timeout)
+                        connect_seconds = time.perf_counter() - start
+                    reader, writer = conn
+                    limit = timeout
+                    resp, reusable = await asyncio.wait_for(
+                        self._exchange(reader, writer, method, target, parts.netloc, body, headers),
+                        timeout)
+                except asyncio.TimeoutError:
+                    self._discard(conn)
+                    raise TimeoutError(f"timed out after {limit}s") from None
+                except (_stale_connection_errors() + (asyncio.IncompleteReadError,)) as e:
+                    self._discard(conn)
+                    if reused and not fresh:
+                        # The server dropped the idle socket; retry once on a new connection
+                        fresh = True
+                        continue
+                    if isinstance(e, asyncio.IncompleteReadError):
+                        raise http_client.IncompleteRead(e.partial) from None
+                    raise
+                except BaseException:
+                    self._discard(conn)
+                    raise
+                if connect_seconds is not None:
+                    # asyncio.open_connection resolves, connects and handshakes in one step
+                    resp.timings["connect"] = connect_seconds
+                self._checkin(key, reader, writer, reusable)
+                return resp
+
+    def _discard(self, conn: Optional[tuple]) -> None:
+        if conn is not None:
+            self._stats["connections_discarded"] += 1
+            conn[1].close()
+
+    async def close(self) -> None:
+        """Close every idle connection."""
+        idle, self._idle, self._idle_count = self._idle, {}, 0
+        for conns in idle.values():
+            for _, writer, _ in conns:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        """Return request/connection counters plus the connection reuse rate."""
+        stats = dict(self._stats)
+        stats["idle_connections"] = self._idle_count
+        requests = stats["connections_created"] + stats["connections_reused"]
+        stats["reuse_rate"] = round(stats["connections_reused"] / requests, 4) if requests else 0.0
+        return stats
+
+
+class AsyncAMinerClient:
+    """
+    Native asyncio client exposing every API wrapper and workflow as a coroutine.
+
+        async with AsyncAMinerClient(token) as client:
+            papers = await client.paper_search("BERT")
+            profile = await client.workflow_scholar_profile("Andrew Ng")
+
+    API methods take the same arguments as the module-level wrappers minus `token`.
+    All calls share one AsyncConnectionPool and retry exactly like `_request`.
+    Workflows run the same step generators as the module-level workflow_* functions
+    (max_workers comes from the client), so budget planning and substitution match; only
+    citation_graph's crawl runs on worker threads, with its calls sent through this client.
+    `base_url` (default BASE_URL) points the client at another gateway, e.g. a local stub.
+    """
+
+    def __init__(self, token: str, base_url: Optional[str] = None,
+                 pool_size: int = POOL_SIZE,
+                 max_per_host: int = POOL_MAX_PER_HOST,
+                 idle_timeout: float = POOL_IDLE_TIMEOUT_SECONDS,
+                 max_workers: int = WORKFLOW_MAX_WORKERS,
+                 connect_timeout: float = CONNECT_TIMEOUT_SECONDS,
+                 read_timeout: float = READ_TIMEOUT_SECONDS):
+        self.token = token
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.transport = AsyncConnectionPool(pool_size, max_per_host, idle_timeout,
+                                             connect_timeout, read_timeout)
+        self._inflight: dict = {}  # request key -> Future of (result, ok), for coalescing
+        self._org_detail_loader: Optional[AsyncBatchLoader] = None
+
+    async def __aenter__(self) -> "AsyncAMinerClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self.transport.close()
+
+    async def _request(self, method: str, path: str,
+                       params: Optional[dict] = None,
+                       body: Optional[dict] = None) -> Any:
+        """Async equivalent of the module-level _request (same memo, cache, retry, hook and export semantics)."""
+        result = await self._memoized_request(method, path, params, body)
+        _export_response(path, result)
+        return result
+
+    async def _memoized_request(self, method: str, path: str, params: Optional[dict],
+                                body: Optional[dict]) -> Any:
+        key = _request_key(method, path, params, body)
+        call = _new_call_record(method, path)
+        memo = None if _fresh_responses.get() else _request_memo
+        if memo is None:
+            result, ok = await self._fetch(key, method, path, params, body, call)
+            _emit_call(call, result, ok)
+            return result
+
+        cached = memo.get(key)
+        if cached is not None:
+            memo.record("hits")
+            _emit_call(call, cached, True)
+            return cached
+        flight = self._inflight.get(key)
+        if flight is not None:
+            # Coalesce with the identical request already running on this loop
+            memo.record("coalesced")
+            result, ok = await asyncio.shield(flight)
+            _emit_call(call, result, ok)
+            return json.loads(RequestMemo._freeze(result))
+
+        memo.record("misses")
+        flight = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result, ok = await self._fetch(key, method, path, params, body, call)
+        except BaseException as e:
+            flight.set_exception(e)
+            flight.exception()  # mark retrieved so an unawaited flight doesn't warn
+            raise
+        finally:
+            del self._inflight[key]
+        if _cacheable(result, ok):
+            memo.put(key, result)
+        flight.set_result((result, ok))
+        _emit_call(call, result, ok)
+        return result
+
+    async def _fetch(self, key: str, method: str, path: str,
+                     params: Optional[dict], body: Optional[dict],
+                     call: Optional[CallRecord] = None) -> tuple:
+        # The SQLite reads and writes run on a worker thread, never blocking the event loop
+        local_files = _local_files_configured()
+        if local_files:
+            local = await asyncio.to_thread(_local_answer, key, path, params, body, call)
+            if local is not None:
+                return local, True
+        budget = _cost_budget
+        if budget is not None and not budget.reserve(path):
+            if call is not None:
+                call.source = "budget"
+            return budget.skip(path), False
+        if call is not None:
+            call.source = "network"
+        ok = False
+        try:
+            result, ok = await self._send(method, path, params, body, call)
+        finally:
+            if budget is not None:
+                budget.settle(path, ok)
+        if ok and local_files:
+            await asyncio.to_thread(_persist_response, key, path, body, result)
+        return result, ok
+
+    async def _send_attempt(self, limiter: Optional[RateLimiter], path: str, method: str, url: str,
+                            data: Optional[bytes], headers: dict,
+                            timeout: float, connect_timeout: float) -> _HTTPResponse:
+        """Async _send_attempt: one network attempt under the rate limiter."""
+        resp = None
+        if limiter is not None:
+            wait = limiter.reserve(path)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await limiter.enter_async()
+        try:
+            resp = await self.transport.request(method, url, body=data, headers=headers,
+                                                timeout=timeout, connect_timeout=connect_timeout)
+            return resp
+        finally:
+            if limiter is not None:
+                limiter.release(resp)
+
+    async def _send(self, method: str, path: str, params: Optional[dict],
+                    body: Optional[dict], call: Optional[CallRecord]) -> tuple:
+        """
+        Async _send_request: the retry loop over the network (hedged, bounded by the
+        workflow deadline and guarded by the circuit breaker the same way).
+        """
+        method, url, headers, data = _prepare_request(self.token, method, path, params, body,
+                                                      base_url=self.base_url)
+        limiter = _rate_limiter
+        hedger = _hedger if _hedger is not None and path in _hedger.paths else None
+        breaker = _circuit_breaker
+        pool = get_token_pool(self.token)
+        attempt = 1
+        switches = 0  # immediate resends on another token after one was drained; not attempts
+        while True:
+            timeouts = _attempt_timeouts(self.transport)
+            if timeouts is None:
+                return _deadline_result(), False
+            if breaker is not None and not breaker.allow(path):
+                if call is not None and attempt == 1 and not switches:
+                    call.source = "circuit"
+                return breaker.rejection(path), False
+            slot = pool.acquire() if pool is not None else None
+            send = partial(self._send_attempt, limiter if slot is None else slot.limiter, path, method, url,
+                           data, headers if slot is None else slot.headers(headers), *timeouts)
+            resp = None
+            try:
+                resp = await (hedger.request_async(path, send) if hedger is not None else send())
+                result, ok, retryable = _attempt_outcome(resp)
+            except Exception as e:
+                result, ok, retryable = _attempt_outcome(error=e)
+            if breaker is not None:
+                breaker.record(path, _backend_failure(resp, retryable))
+            if call is not None:
+                call.add_attempt(resp)
+            if slot is not None and pool.release(slot, resp, result) and switches < len(pool):
+                switches += 1
+                continue  # that token is drained; resend at once on another one
+            if ok or not retryable or attempt >= MAX_RETRIES:
+                return result, ok
+            backoff = _retry_backoff(attempt, _retry_after_seconds(resp))
+            if backoff is None:
+                return _deadline_result(), False
+            await asyncio.sleep(backoff)
+            attempt += 1
+
+    async def _run_steps(self, steps) -> Any:
+        """Drive a workflow step generator (see _run_steps) on the event loop."""
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(await self._perform(request))
+        except StopIteration as done:
+            return done.value
+
+    async def _perform(self, request) -> Any:
+        if isinstance(request, _Call):
+            return await getattr(self, request.api)(*request.args, **request.kwargs)
+        if isinstance(request, _Gather):
+            fresh = _fresh_responses.set(True) if request.fresh else None
+            try:
+                return await self._gather(request.items)
+            finally:
+                if fresh is not None:
+                    _fresh_responses.reset(fresh)
+        # Blocking code (the citation crawler) runs on a worker thread; its calls come back here
+        loop = asyncio.get_running_loop()
+
+        def call(api, *args, **kwargs):
+            return asyncio.run_coroutine_threadsafe(getattr(self, api)(*args, **kwargs), loop).result()
+
+        return await loop.run_in_executor(None, contextvars.copy_context().run, request.fn, call)
+
+    async def _gather(self, items: list) -> list:
+        """Run [(label, _Call)] items with at most max_workers in flight; results in item order."""
+        limit = asyncio.Semaphore(max(1, self.max_workers))
+
+        async def run(label, request):
+            async with limit:
+                if label:
+                    print(f"{label}\n", end="", file=sys.stderr)
+                return await getattr(self, request.api)(*request.args, **request.kwargs)
+
+        return list(await asyncio.gather(*(run(label, request) for label, request in items)))
+
+    async def org_detail_batched(self, org_id: str) -> Any:
+        """org_detail for one ID; concurrent lookups on this client are merged into one org_detail call."""
+        if self._org_detail_loader is None:
+            self._org_detail_loader = AsyncBatchLoader(self.org_detail, ("id", "_id"))
+        return await self._org_detail_loader.load(org_id)
+
+    # ── Workflows (the same step generators as the module-level workflow_* functions) ──
+
+    async def resolve_scholar(self, name: str, org: Optional[str] = None, interests: Any = None,
+                              size: int = DISAMBIGUATION_CANDIDATES) -> dict:
+        return await self._run_steps(_resolve_scholar_steps(name, org, interests, size))
+
+    async def workflow_scholar_profile(self, name: str, org: Optional[str] = None, interests: Any = None,
+                                       min_confidence: float = DISAMBIGUATION_MIN_CONFIDENCE) -> dict:
+        return await self._run_steps(_scholar_profile_steps(name, org, interests, min_confidence))
+
+    async def workflow_paper_deep_dive(self, title: str = None, keyword: str = None,
+                                       author: str = None, order: str = "n_citation") -> dict:
+        return await self._run_steps(_paper_deep_dive_steps(title, keyword, author, order))
+
+    async def workflow_org_analysis(self, org: str) -> dict:
+        return await self._run_steps(_org_analysis_steps(org))
+
+    async def workflow_venue_papers(self, venue: str, year: Optional[int] = None,
+                                    limit: int = 20) -> dict:
+        return await self._run_steps(_venue_papers_steps(venue, year, limit))
+
+    async def workflow_paper_qa(self, query: str = None,
+                                topic_high: str = None, topic_middle: str = None,
+                                sci_flag: bool = False, sort_citation: bool = False,
+                                sort_year: bool = False,
+                                author_id: list = None, org_id: list = None, venue_ids: list = None,
+                                size: int = 10) -> dict:
+        return await self._run_steps(_paper_qa_steps(query, topic_high, topic_middle, sci_flag,
+                                                     sort_citation, sort_year, author_id, org_id,
+                                                     venue_ids, size))
+
+    async def workflow_patent_search(self, query: str, page: int = 0, size: int = 10,
+                                     detail_limit: Optional[int] = PATENT_DETAIL_LIMIT,
+                                     basic_details: bool = False) -> dict:
+        return await self._run_steps(_patent_search_steps(query, page, size, detail_limit, basic_details))
+
+    async def workflow_scholar_patents(self, name: str,
+                                       detail_limit: Optional[int] = PATENT_DETAIL_LIMIT,
+                                       basic_details: bool = False,
+                                       org: Optional[str] = None, interests: Any = None,
+                                       min_confidence: float = DISAMBIGUATION_MIN_CONFIDENCE) -> dict:
+        return await self._run_steps(_scholar_patents_steps(name, detail_limit, basic_details, org,
+                                                            interests, min_confidence))
+
+    async def workflow_citation_graph(self, title: str = None, keyword: str = None,
+                                      author: str = None, order: str = "n_citation",
+                                      max_depth: int = CRAWL_MAX_DEPTH, max_nodes: int = CRAWL_MAX_NODES,
+                                      strategy: str = "bfs", max_cost: Optional[float] = None,
+                                      edge_list: Optional[str] = None) -> dict:
+        return await self._run_steps(_citation_graph_steps(title, keyword, author, order, max_depth,
+                                                           max_nodes, strategy, self.max_workers,
+                                                           max_cost, edge_list))
+
+    async def workflow_venue_sync(self, venue: str, from_year: Optional[int] = None,
+                                  to_year: Optional[int] = None,
+                                  reopen_years: int = SYNC_REOPEN_YEARS) -> dict:
+        return await self._run_steps(_venue_sync_steps(venue, from_year, to_year, reopen_years))
+
+
+def _async_api_method(fn):
+    """Build an AsyncAMinerClient method that sends whatever request the sync wrapper `fn` would."""
+    async def method(self, *args, **kwargs):
+        return await self._request(*_describe_call(fn, *args, **kwargs))
+
+    method.__name__ = fn.__name__
+    method.__qualname__ = f"AsyncAMinerClient.{fn.__name__}"
+    method.__doc__ = fn.__doc__
+    return method
+
+
+for _name in API_FUNCTIONS:
+    setattr(AsyncAMinerClient, _name, _async_api_method(globals()[_name]))
+del _name
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Output
+# ──────────────────────────────────────────────────────────────────────────────
+
+OUTPUT_FORMATS = ("pretty", "compact", "ndjson")
+OUTPUT_FLUSH_RECORDS = 100  # records written between flushes (PageIterator records flush individually)
+
+def _dumps(value: Any, indent: bool = False) -> str:
+    """JSON-encode with orjson once it is loaded (see ORJSON_MIN_BYTES), else the json module; non-ASCII is kept as-is."""
+    backend = _orjson
+    if backend:
+        try:
+            option = backend.OPT_NON_STR_KEYS | (backend.OPT_INDENT_2 if indent else 0)
+            return backend.dumps(value, option=option).decode("utf-8")
+        except TypeError:  # e.g. integers wider than 64 bits, which the json module handles
+            pass
+    if indent:
+        return json.dumps(value, ensure_ascii=False, indent=2)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _result_items(result: Any):
+    """Top-level (key, value) pairs of a result; a PageIterator's summary is read after its records."""
+    if isinstance(result, PageIterator):
+        yield "data", result
+        yield from result.state().items()
+    else:
+        yield from result.items()
+
+
+def _materialize(result: Any) -> Any:
+    """Collect a PageIterator into the {"data": [...], **state()} dict it is printed as."""
+    if isinstance(result, PageIterator):
+        records = list(result)
+        return {"data": records, **result.state()}
+    return result
+
+
+class OutputWriter:
+    """
+    Writes a result to a text stream without first encoding the whole document.
+
+    format "pretty" (indented JSON, the default), "compact" (single-line JSON) or "ndjson"
+    (one JSON value per line: a result's `data` list becomes one line per record, and the
+    remaining fields such as total / next_cursor / error are reported on stderr).
+
+    Lists at the top level of a result, and PageIterator results, are encoded and written
+    one record at a time, so records appear as they are fetched and memory stays flat.
+    """
+
+    def __init__(self, stream=None, fmt: str = "pretty"):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(OUTPUT_FORMATS)}, got {fmt!r}")
+        self.stream = stream if stream is not None else sys.stdout
+        self.format = fmt
+        self._written = 0
+
+    def _encode(self, value: Any, level: int) -> str:
+        text = _dumps(value, indent=self.format == "pretty")
+        if self.format == "pretty" and level:
+            text = text.replace("\n", "\n" + "  " * level)
+        return text
+
+    def _record_written(self, lazy: bool) -> None:
+        # A lazy source may block on the next page fetch, so its records are flushed right away
+        self._written += 1
+        if lazy or self._written % OUTPUT_FLUSH_RECORDS == 0:
+            self.stream.flush()
+
+    def write(self, result: Any) -> None:
+        if isinstance(result, PageIterator):
+            _orjson_module()  # a harvest: enough records to be worth loading orjson
+        if self.format == "ndjson":
+            self._write_ndjson(result)
+        elif isinstance(result, (dict, PageIterator)):
+            self._write_document(result)
+        else:
+            self.stream.write(self._encode(result, 0) + "\n")
+        self.stream.flush()
+
+    def _write_ndjson(self, result: Any) -> None:
+        w = self.stream.write
+        if not (isinstance(result, PageIterator) or
+                (isinstance(result, dict) and isinstance(result.get("data"), list))):
+            w(_dumps(result) + "\n")
+            return
+        summary = {}
+        for key, value in _result_items(result):
+            if key != "data":
+                summary[key] = value
+                continue
+            for record in value:
+                w(_dumps(record) + "\n")
+                self._record_written(isinstance(value, PageIterator))
+        if summary:
+            print(f"[Result] {_dumps(summary)}", file=sys.stderr)
+
+    def _write_document(self, result: Any) -> None:
+        # Same layout as json.dumps(indent=2) for "pretty" and separators=(",", ":") for "compact"
+        w = self.stream.write
+        pretty = self.format == "pretty"
+        pad1, pad2, colon = ("\n  ", "\n    ", ": ") if pretty else ("", "", ":")
+        w("{")
+        empty = True
+        for key, value in _result_items(result):
+            w(("" if empty else ",") + pad1 + _dumps(key) + colon)
+            empty = False
+            if not isinstance(value, (list, PageIterator)):
+                w(self._encode(value, 1))
+                continue
+            w("[")
+            first = True
+            for record in value:
+                w(("" if first else ",") + pad2 + self._encode(record, 2))
+                first = False
+                self._record_written(isinstance(value, PageIterator))
+            w("]" if first else pad1 + "]")
+        w("}\n" if empty or not pretty else "\n}\n")
+
+
+def _print(data: Any) -> None:
+    """Pretty-print JSON result."""
+    OutputWriter().write(data)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Columnar Export (Parquet / Arrow / CSV)
+# ──────────────────────────────────────────────────────────────────────────────
+
+EXPORT_FORMATS = ("auto", "parquet", "arrow", "csv")   # auto = parquet with pyarrow, else csv
+EXPORT_ROW_GROUP_ROWS = 50_000   # rows buffered per table before a row group is written
+
+# Table -> (column, type); types are "str", "int" and "list" (of strings). Every table also
+# has an "api" column naming the endpoint that returned the row.
+EXPORT_TABLES = {
+    "papers": (("id", "str"), ("title", "str"), ("title_zh", "str"), ("year", "int"),
+               ("venue", "str"), ("venue_id", "str"), ("n_citation", "int"), ("doi", "str"),
+               ("authors", "list"), ("author_ids", "list"), ("author_orgs", "list"),
+               ("keywords", "list"), ("abstract", "str")),
+    "persons": (("id", "str"), ("name", "str"), ("name_zh", "str"), ("org", "str"), ("org_id", "str"),
+                ("position", "str"), ("n_citation", "int"), ("h_index", "int"), ("interests", "list")),
+    "orgs": (("id", "str"), ("name", "str"), ("name_zh", "str"), ("type", "str"), ("country", "str"),
+             ("city", "str"), ("aliases", "list")),
+    "venues": (("id", "str"), ("name", "str"), ("name_zh", "str"), ("type", "str"), ("issn", "str"),
+               ("aliases", "list")),
+    "patents": (("id", "str"), ("title", "str"), ("app_num", "str"), ("pub_num", "str"),
+                ("app_date", "str"), ("pub_date", "str"), ("country", "str"), ("inventors", "list"),
+                ("assignees", "list"), ("ipc", "list")),
+    "citations": (("citing_id", "str"), ("cited_id", "str"), ("cited_title", "str"),
+                  ("cited_n_citation", "int")),
+}
+_EXPORT_KIND_TABLES = {"paper": "papers", "person": "persons", "org": "orgs", "venue": "venues",
+                       "patent": "patents"}
+
+_pyarrow = None  # (pyarrow, pyarrow.parquet) once resolved, False when pyarrow is not installed
+
+
+def _pyarrow_modules():
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+            _pyarrow = (pyarrow, pyarrow.parquet)
+        except ImportError:
+            _pyarrow = False
+    return _pyarrow
+
+
+def _entity_id(kind: str, record: dict) -> Optional[str]:
+    return next((record[f] for f in _STORE_ID_FIELDS[kind] if isinstance(record.get(f), str) and record[f]), None)
+
+
+def _export_row(kind: str, r: dict) -> dict:
+    """Column values of one entity record (coerced to the table's types by _TableWriter)."""
+    if kind == "paper":
+        authors = [a for a in r.get("authors") or [] if isinstance(a, dict)]
+        venue = r.get("venue")
+        return {"title": r.get("title"), "title_zh": r.get("title_zh"), "year": r.get("year"),
+                "venue": venue or r.get("raw"), "n_citation": r.get("n_citation"), "doi": r.get("doi"),
+                "venue_id": venue.get("id") if isinstance(venue, dict) else r.get("venue_hhb_id"),
+                "authors": [a.get("name") or a.get("name_zh") for a in authors],
+                "author_ids": [a.get("_id") or a.get("id") for a in authors],
+                "author_orgs": [a.get("org") for a in authors],
+                "keywords": r.get("keywords"), "abstract": r.get("abstract")}
+    if kind == "person":
+        indices = r.get("indices") if isinstance(r.get("indices"), dict) else {}
+        return {"name": r.get("name"), "name_zh": r.get("name_zh"), "org": r.get("org") or r.get("orgs"),
+                "org_id": r.get("org_id"), "position": r.get("position"),
+                "n_citation": r.get("n_citation", indices.get("citations")),
+                "h_index": r.get("h_index", indices.get("hindex")),
+                "interests": r.get("interests") or r.get("domain")}
+    if kind == "org":
+        location = r.get("location") if isinstance(r.get("location"), dict) else {}
+        return {"name": r.get("name") or r.get("name_en") or r.get("org_name"), "name_zh": r.get("name_zh"),
+                "type": r.get("type"), "country": location.get("country"), "city": location.get("city"),
+                "aliases": _texts(r.get("acronyms"), r.get("aliases"))}
+    if kind == "venue":
+        return {"name": r.get("name") or r.get("name_en"), "name_zh": r.get("name_zh"), "type": r.get("type"),
+                "issn": r.get("issn"), "aliases": r.get("alias")}
+    return {"title": r.get("title") or r.get("en") or r.get("title_zh"), "app_num": r.get("app_num"),
+            "pub_num": r.get("pub_num"), "app_date": r.get("app_date"), "pub_date": r.get("pub_date"),
+            "country": r.get("country"), "inventors": r.get("inventor"), "assignees": r.get("assignee"),
+            "ipc": r.get("ipc")}
+
+
+def _export_value(value: Any, kind: str) -> Any:
+    if kind == "list":
+        return _texts(value)
+    if kind == "int":
+        try:
+            return int(value) if value not in (None, "") and not isinstance(value, bool) else None
+        except (TypeError, ValueError):
+            return None
+    texts = _texts(value) if not isinstance(value, (int, float)) else [str(value)]
+    return texts[0] if texts else None
+
+
+class _TableWriter:
+    """One table's rows, buffered and written a row group at a time; the file is created on the first one."""
+
+    def __init__(self, path: str, columns: tuple, fmt: str, row_group_rows: int):
+        self.path = path
+        self.columns = columns + (("api", "str"),)
+        self.format = fmt
+        self.row_group_rows = max(1, row_group_rows)
+        self.rows = 0
+        self.row_groups = 0
+        self._buffer: list = []
+        self._sink = None
+
+    def add(self, values: dict) -> None:
+        self._buffer.append(tuple(_export_value(values.get(name), kind) for name, kind in self.columns))
+        if len(self._buffer) >= self.row_group_rows:
+            self.flush()
+
+    def _open(self):
+        if self.format == "csv":
+            f = open(self.path, "w", encoding="utf-8", newline="")
+            writer = csv.writer(f)
+            writer.writerow([name for name, _ in self.columns])
+            return f, writer
+        pa, pq = _pyarrow_modules()
+        types = {"str": pa.string(), "int": pa.int64(), "list": pa.list_(pa.string())}
+        self._schema = pa.schema([(name, types[kind]) for name, kind in self.columns])
+        if self.format == "arrow":
+            return pa.ipc.new_file(self.path, self._schema)
+        return pq.ParquetWriter(self.path, self._schema)
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._sink is None:
+            self._sink = self._open()
+        if self.format == "csv":
+            self._sink[1].writerows(
+                ["" if v is None else " | ".join(v) if isinstance(v, list) else v for v in row]
+                for row in self._buffer)
+        else:
+            pa = _pyarrow_modules()[0]
+            columns = list(zip(*self._buffer))
+            self._sink.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+                schema=self._schema))
+        self.rows += len(self._buffer)
+        self.row_groups += 1
+        self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
+        if self._sink is not None:
+            (self._sink[0] if self.format == "csv" else self._sink).close()
+
+
+class TableExporter:
+    """
+    Flattens the entity records of API responses into typed columnar tables: papers,
+    persons, orgs, venues and patents (by the endpoint's entity kind, as in the local
+    entity store) and citation edges (from paper_relation). One row per record returned,
+    so an entity two calls returned appears twice, with the endpoint in the `api` column.
+
+    Tables are written as Parquet or Arrow IPC files when pyarrow is installed, else as CSV
+    (list columns joined with " | "). Rows are buffered per table and written in row
+    groups of `row_group_rows`, so exporting a full harvest keeps memory bounded.
+    """
+
+    def __init__(self, directory: str, fmt: str = "auto", row_group_rows: int = EXPORT_ROW_GROUP_ROWS):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}, got {fmt!r}")
+        if fmt == "auto":
+            fmt = "parquet" if _pyarrow_modules() else "csv"
+        elif fmt != "csv" and not _pyarrow_modules():
+            print(f"[Export] pyarrow is not installed; writing CSV instead of {fmt}", file=sys.stderr)
+            fmt = "csv"
+        self.directory = directory
+        self.format = fmt
+        self.row_group_rows = row_group_rows
+        self.tables: dict = {}  # filled by close()
+        self._writers: dict = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _writer_locked(self, table: str) -> _TableWriter:
+        writer = self._writers.get(table)
+        if writer is None:
+            extension = {"parquet": "parquet", "arrow": "arrow", "csv": "csv"}[self.format]
+            writer = self._writers[table] = _TableWriter(
+                os.path.join(self.directory, f"{table}.{extension}"), EXPORT_TABLES[table],
+                self.format, self.row_group_rows)
+        return writer
+
+    def add_response(self, path: str, response: Any) -> None:
+        """Export the records of one successful response (other responses are ignored)."""
+        if not isinstance(response, dict) or response.get("success") is False:
+            return
+        data = response.get("data")
+        for record in data if isinstance(data, list) else [data]:
+            self.add_record(path, record)
+
+    def add_record(self, path: str, record: Any) -> None:
+        """Export one `data` record of an API response at `path`."""
+        if not isinstance(record, dict):
+            return
+        api = _API_NAMES.get(path, path)
+        if path == API_PATHS["paper_relation"]:
+            table = "citations"
+            citing = record.get("_id") or record.get("id")
+            rows = [{"citing_id": citing, "cited_id": c.get("_id") or c.get("id"), "cited_title": c.get("title"),
+                     "cited_n_citation": c.get("n_citation"), "api": api}
+                    for c in record.get("cited") or [] if isinstance(c, dict)]
+        else:
+            kind = STORE_ENTITY_KINDS.get(path)
+            if kind is None:
+                return
+            table = _EXPORT_KIND_TABLES[kind]
+            rows = [{**_export_row(kind, record), "id": _entity_id(kind, record), "api": api}]
+        with self._lock:
+            writer = self._writer_locked(table)
+            for row in rows:
+                writer.add(row)
+
+    def close(self) -> dict:
+        """Write the remaining rows and close every file; returns {table: {path, rows, row_groups}}."""
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close()
+            self.tables = {table: {"path": w.path, "rows": w.rows, "row_groups": w.row_groups}
+                           for table, w in sorted(self._writers.items()) if w.rows}
+            return self.tables
+
+
+_export_sink: contextvars.ContextVar = contextvars.ContextVar("aminer_export_sink", default=None)
+
+
+@contextlib.contextmanager
+def export_tables(directory: str, fmt: str = "auto", row_group_rows: int = EXPORT_ROW_GROUP_ROWS):
+    """
+    Within the block (and the workflow threads and tasks it starts), the records of every
+    API response are also written to columnar tables in `directory`; yields the
+    TableExporter, whose tables are complete once the block exits.
+    """
+    exporter = TableExporter(directory, fmt, row_group_rows)
+    token = _export_sink.set(exporter)
+    try:
+        yield exporter
+    finally:
+        _export_sink.reset(token)
+        exporter.close()
+
+
+def _export_response(path: str, result: Any) -> None:
+    exporter = _export_sink.get()
+    if exporter is not None:
+        exporter.add_response(path, result)
+
+
+def _export_summary(result: Any) -> dict:
+    """
+    What an exported run prints: the result without its record lists, which are in the
+    tables. A lazy PageIterator is drained here, so call it inside export_tables().
+    """
+    summary = {}
+    for key, value in _result_items(result) if isinstance(result, (dict, PageIterator)) else ():
+        if isinstance(value, PageIterator):
+            for _ in value:  # its pages are exported as they are fetched
+                pass
+        elif not (isinstance(value, list) and value and all(isinstance(v, (dict, list)) for v in value)):
+            summary[key] = value
+    return summary
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Command-Line Entry Point
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _detail_limit(value: str) -> Optional[int]:
+    """argparse type for --detail_limit: a non-negative count or 'all' (None)."""
+    if str(value).strip().lower() == "all":
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        raise argparse.ArgumentTypeError(f"expected a non-negative number or 'all', got {value!r}")
+    return limit
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        description="AMiner Open Platform Academic Data Query Client",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Scholar profile analysis
+  python aminer_client.py --token <TOKEN> --action scholar_profile --name "Andrew Ng"
+
+  # Paper deep dive
+  python aminer_client.py --token <TOKEN> --action paper_deep_dive --title "BERT"
+  python aminer_client.py --token <TOKEN> --action paper_deep_dive --keyword "large language model" --author "Hinton"
+
+  # Institution research capability analysis
+  python aminer_client.py --token <TOKEN> --action org_analysis --org "Tsinghua University"
+  # ... with its papers/scholars/patents also written as Parquet tables for pandas
+  python aminer_client.py --token <TOKEN> --action org_analysis --org "Tsinghua University" --export tsinghua/
+
+  # Journal paper monitoring
+  python aminer_client.py --token <TOKEN> --action venue_papers --venue "NeurIPS" --year 2023
+
+  # Daily journal monitoring: only papers not returned by the previous sync, one per line
+  python aminer_client.py --token <TOKEN> --action venue_sync --venue "NeurIPS" --format ndjson
+
+  # Academic Q&A
+  python aminer_client.py --token <TOKEN> --action paper_qa --query "deep learning for protein structure"
+  python aminer_client.py --token <TOKEN> --action paper_qa \\
+    --topic_high '[["transformer","self-attention"],["protein folding"]]' \\
+    --sci_flag --sort_citation
+
+  # Patent search
+  python aminer_client.py --token <TOKEN> --action patent_search --query "quantum computing chip"
+
+  # Scholar patents
+  python aminer_client.py --token <TOKEN> --action scholar_patents --name "Shou-Cheng Zhang"
+
+  # Scholar patents: basic info for every patent, 8 requests in flight
+  python aminer_client.py --token <TOKEN> --action scholar_patents --name "Shou-Cheng Zhang" \\
+    --detail_limit all --basic_details --max_workers 8
+
+  # Two-hop reference graph of a paper, most-cited first, at most ¥5 of paper_relation calls
+  python aminer_client.py --token <TOKEN> --action citation_graph --title "Attention is all you need" \\
+    --depth 2 --strategy priority --max_cost 5 --edge_list refs.tsv
+
+  # Answer lookups from entities fetched earlier; search them offline
+  python aminer_client.py --token <TOKEN> --action paper_deep_dive --title "BERT" --local_first
+  python aminer_client.py --action local_search --title "pre-training" --year 2019
+
+  # Direct single API call
+  python aminer_client.py --token <TOKEN> --action raw \\
+    --api paper_search --params '{"title":"BERT","page":0,"size":5}'
+
+  # Batch: one scholar profile per line of names.csv (header: name), resumable
+  python aminer_client.py --token <TOKEN> --action scholar_profile \\
+    --batch names.csv --output profiles.jsonl --resume
+
+Console (Generate Token): https://open.aminer.cn/open/board?tab=control
+Docs: https://open.aminer.cn/open/docs
+        """
+    )
+    p.add_argument(
+        "--token",
+        default=None,
+        help=(
+            "AMiner API Token. If not provided, reads from the environment variable AMINER_API_KEY by default; "
+            "or go to https://open.aminer.cn/open/board?tab=control to generate one. "
+            "Several comma-separated tokens are used as a pool (see --token_strategy)."
+        ),
+    )
+    p.add_argument("--action",
+                   choices=["scholar_profile", "paper_deep_dive", "org_analysis",
+                            "venue_papers", "venue_sync", "paper_qa", "patent_search",
+                            "scholar_patents", "citation_graph", "local_search", "raw"],
+                   help="Action to perform (required unless --serve)")
+
+    # General parameters
+    p.add_argument("--name", help="Scholar name")
+    p.add_argument("--title", help="Paper title")
+    p.add_argument("--keyword", help="Keyword")
+    p.add_argument("--author", help="Author name")
+    p.add_argument("--org", help="Institution name (scholar_profile/scholar_patents: disambiguation hint)")
+    p.add_argument("--venue", help="Journal name")
+    p.add_argument("--query", help="Query string (natural language Q&A or patent search)")
+    p.add_argument("--year", type=int, help="Year filter")
+    p.add_argument("--size", type=int, default=10, help="Number of results to return")
+    p.add_argument("--page", type=int, default=0, help="Page number")
+    p.add_argument("--page_size", type=int, default=100,
+                   help="Org patent pagination size (max 10,000)")
+    p.add_argument("--detail_limit", type=_detail_limit, default=PATENT_DETAIL_LIMIT,
+                   help="[patent_search/scholar_patents] Patents to fetch details for: a number or 'all'")
+    p.add_argument("--basic_details", action="store_true",
+                   help="[patent_search/scholar_patents] Use the free patent_info (title/number/inventor) "
+                        "instead of the paid patent_detail")
+    p.add_argument("--depth", type=int, default=CRAWL_MAX_DEPTH,
+                   help="[citation_graph] Reference hops to crawl from the seed paper")
+    p.add_argument("--max_nodes", type=int, default=CRAWL_MAX_NODES,
+                   help="[citation_graph] Max papers kept in the graph")
+    p.add_argument("--strategy", default="bfs", choices=["bfs", "priority"],
+                   help="[citation_graph] Expand hop by hop, or most-cited papers first")
+    p.add_argument("--max_cost", type=float,
+                   help="[citation_graph] Stop expanding before paper_relation spend (¥0.10 each) exceeds this")
+    p.add_argument("--edge_list", help="[citation_graph] Also write citations as a TSV edge list to this file")
+    p.add_argument("--interests",
+                   help="[scholar_profile/scholar_patents] Comma-separated research interests that help "
+                        "pick the right scholar among same-name candidates")
+    p.add_argument("--min_confidence", type=float, default=DISAMBIGUATION_MIN_CONFIDENCE,
+                   help="[scholar_profile/scholar_patents] Stop before any paid call when the best "
+                        "candidate's score leads the runner-up's by less than this (0-1)")
+    p.add_argument("--from_year", type=int,
+                   help="[venue_sync] First year to sweep (default: from the venue's watermark)")
+    p.add_argument("--to_year", type=int, help="[venue_sync] Last year to sweep (default: this year)")
+    p.add_argument("--reopen_years", type=int, default=SYNC_REOPEN_YEARS,
+                   help="[venue_sync] Most recent synced years re-swept for late-indexed papers")
+    p.add_argument("--sync_state", default=SYNC_STATE_PATH,
+                   help="[venue_sync] Watermark SQLite file (default: $AMINER_CACHE_DIR/venue_sync.sqlite3)")
+    p.add_argument("--order", default="n_citation",
+                   choices=["n_citation", "year"], help="Sort order")
+
+    # Paper QA specific
+    p.add_argument("--topic_high", help="Required keyword array (JSON string; outer AND, inner OR)")
+    p.add_argument("--topic_middle", help="Strongly boosted keywords (same format as topic_high)")
+    p.add_argument("--sci_flag", action="store_true", help="Return SCI papers only")
+    p.add_argument("--sort_citation", action="store_true", help="Sort by citation count")
+    p.add_argument("--sort_year", action="store_true", help="Sort by year (most recent first)")
+    p.add_argument("--author_id", help="Author ID filter; accepts single ID or JSON array string")
+    p.add_argument("--org_id", help="Institution ID filter; accepts single ID or JSON array string")
+    p.add_argument("--venue_ids", help="Conference/journal ID filter; accepts JSON array string")
+
+    # Raw mode
+    p.add_argument("--api", help="[raw mode] API function name, e.g. paper_search")
+    p.add_argument("--params", help="[raw mode] Parameter dictionary in JSON format")
+
+    # Output
+    p.add_argument("--format", default="pretty", choices=OUTPUT_FORMATS,
+                   help="Output encoding: indented JSON, single-line JSON, or NDJSON (one record per "
+                        "line, written as records arrive); uses orjson when installed")
+
+    # Batch mode
+    p.add_argument("--batch",
+                   help="Run --action once per item of a JSONL/CSV file ('-' = stdin); each item "
+                        "supplies arguments, e.g. {\"name\": \"Andrew Ng\"} or a CSV column 'name'")
+    p.add_argument("--export",
+                   help="Also write every paper/scholar/org/venue/patent record and citation edge the "
+                        "calls return as columnar tables (papers.parquet, ...) into this directory; "
+                        "record lists are then left out of the printed JSON")
+    p.add_argument("--export_format", default="auto", choices=EXPORT_FORMATS,
+                   help="[--export] parquet or arrow (need pyarrow) or csv; auto = parquet when "
+                        "pyarrow is installed, else csv")
+    p.add_argument("--export_row_group", type=int, default=EXPORT_ROW_GROUP_ROWS,
+                   help="[--export] Rows per table buffered before a row group is written")
+    p.add_argument("--output", help="[batch mode] Write JSON lines here instead of stdout")
+    p.add_argument("--batch_workers", type=int, default=4,
+                   help="[batch mode] Items processed concurrently")
+    p.add_argument("--resume", action="store_true",
+                   help="[batch mode] Skip items with a result in --output, rerun failed ones and append")
+
+    # Transport
+    p.add_argument("--pool_size", type=int, default=POOL_SIZE,
+                   help="Max idle keep-alive connections kept open")
+    p.add_argument("--pool_max_per_host", type=int, default=POOL_MAX_PER_HOST,
+                   help="Max concurrent connections per host")
+    p.add_argument("--pool_idle_timeout", type=float, default=POOL_IDLE_TIMEOUT_SECONDS,
+                   help="Seconds an idle connection may be kept before it is closed")
+    p.add_argument("--connect_timeout", type=float, default=CONNECT_TIMEOUT_SECONDS,
+                   help="Seconds allowed to open a connection (TCP + TLS), per attempt")
+    p.add_argument("--read_timeout", type=float, default=READ_TIMEOUT_SECONDS,
+                   help="Seconds to wait for response bytes before the attempt times out")
+    p.add_argument("--deadline", type=float, metavar="SECONDS",
+                   help="Overall time limit of the action (batch: of each item); every call inside "
+                        "gets its timeouts capped by the time left and fails fast once it is over")
+    p.add_argument("--hedge", action="store_true",
+                   help="Hedge slow calls to free endpoints: send a duplicate once a call has taken "
+                        "longer than the endpoint's recent p95 latency and use whichever answers first")
+    p.add_argument("--hedge_quantile", type=float, default=HEDGE_QUANTILE,
+                   help="[--hedge] Latency quantile after which a call is hedged")
+    p.add_argument("--hedge_paid", action="store_true",
+                   help="[--hedge] Hedge paid endpoints too (every copy sent is billed)")
+    p.add_argument("--max_workers", type=int, default=WORKFLOW_MAX_WORKERS,
+                   help="Max concurrent API calls for independent workflow stages and "
+                        "per-patent detail fetches (1 = serial)")
+    p.add_argument("--no_cache", action="store_true",
+                   help="Bypass the persistent response cache (no reads, no writes)")
+    p.add_argument("--refresh_cache", action="store_true",
+                   help="Ignore cached responses but store the fresh ones")
+    p.add_argument("--cache_path", default=CACHE_PATH,
+                   help="Response cache SQLite file (default: $AMINER_CACHE_DIR/responses.sqlite3 "
+                        "or ~/.cache/aminer/responses.sqlite3)")
+    p.add_argument("--cache_max_mb", type=float, default=CACHE_MAX_BYTES / (1024 * 1024),
+                   help="Response cache size cap in MB")
+    p.add_argument("--cache_ttl", type=float,
+                   help="Override every per-endpoint cache TTL (seconds)")
+    p.add_argument("--no_store", action="store_true",
+                   help="Do not record returned papers/scholars/orgs/venues/patents in the local entity store")
+    p.add_argument("--store_path", default=STORE_PATH,
+                   help="Local entity store SQLite file (default: $AMINER_CACHE_DIR/entities.sqlite3 "
+                        "or ~/.cache/aminer/entities.sqlite3)")
+    p.add_argument("--local_first", action="store_true",
+                   help="Answer ID lookups and title searches from the local entity store; "
+                        "call the API only on a miss or a stale record")
+    p.add_argument("--store_max_age", type=float, default=STORE_MAX_AGE_SECONDS,
+                   help="[--local_first] Seconds after which a stored record is stale")
+    p.add_argument("--no_org_aliases", action="store_true",
+                   help="Do not use or grow the local org alias index (org_analysis then always "
+                        "calls org_disambiguate_pro)")
+    p.add_argument("--org_alias_path", default=ORG_ALIAS_PATH,
+                   help="Org alias index SQLite file (default: $AMINER_CACHE_DIR/org_aliases.sqlite3 "
+                        "or ~/.cache/aminer/org_aliases.sqlite3)")
+    p.add_argument("--org_alias_similarity", type=float, default=ORG_ALIAS_MIN_SIMILARITY,
+                   help="Similarity (0-1) a fuzzy org alias match needs (default 1: normalized "
+                        "exact matches only); fuzzy matches are confirmed by their words or a free org_search")
+    p.add_argument("--memo_size", type=int, default=MEMO_MAX_ENTRIES,
+                   help="In-process memo entries for identical calls (0 disables memo and coalescing)")
+    p.add_argument("--rate_limit",
+                   help='Requests/second per endpoint class, e.g. "free=10,paid=5" '
+                        '(burst = 2x rate; default free=10,paid=5)')
+    p.add_argument("--max_concurrency", type=int, default=RATE_MAX_CONCURRENCY,
+                   help="Ceiling for the adaptive (AIMD) in-flight request limit")
+    p.add_argument("--token_strategy", choices=["least_loaded", "round_robin"], default=TOKEN_POOL_STRATEGY,
+                   help="How calls are spread over several comma-separated tokens; throttled or "
+                        "out-of-balance tokens are skipped for a while either way")
+    p.add_argument("--no_rate_limit", action="store_true",
+                   help="Disable client-side rate limiting and adaptive concurrency")
+    p.add_argument("--circuit_cooldown", type=float, default=CIRCUIT_COOLDOWN_SECONDS,
+                   help="Seconds an endpoint's circuit stays open (calls fail fast) after it kept failing")
+    p.add_argument("--circuit_failure_rate", type=float, default=CIRCUIT_FAILURE_RATE,
+                   help=f"Share of an endpoint's last {CIRCUIT_WINDOW} attempts that must fail "
+                        f"(at least {CIRCUIT_MIN_CALLS}) to open its circuit")
+    p.add_argument("--no_circuit_breaker", action="store_true",
+                   help="Always send calls, even to endpoints that keep failing")
+    p.add_argument("--pool_stats", action="store_true",
+                   help="Print connection pool reuse statistics to stderr when done")
+    p.add_argument("--budget", type=float, metavar="CNY",
+                   help="Cap the documented cost of the whole run (batch: all items together); "
+                        "stages are planned by priority, paid calls that no longer fit are skipped "
+                        "or swapped for free alternatives, and spend/skips are reported on stderr")
+    p.add_argument("--stage_priority",
+                   help='[--budget] Override stage priorities (1 = essential ... 3 = optional), '
+                        'e.g. "person_project=1,person_figure=3"')
+    p.add_argument("--stats", metavar="PATH",
+                   help='Write per-endpoint call statistics (timings, retries, bytes, cost) plus '
+                        'pool/cache/memo/rate-limit counters as JSON to PATH ("-" = stderr)')
+
+    # Daemon
+    p.add_argument("--serve", action="store_true",
+                   help="Run as a warm daemon on a Unix socket: later invocations with AMINER_DAEMON_SOCKET "
+                        "set are handed to it and reuse its connections, memo and open cache/store")
+    p.add_argument("--socket", default=DAEMON_SOCKET_PATH,
+                   help="[--serve] Socket path (default: $AMINER_DAEMON_SOCKET or $AMINER_CACHE_DIR/daemon.sock)")
+    p.add_argument("--idle_timeout", type=float, default=DAEMON_IDLE_TIMEOUT_SECONDS,
+                   help="[--serve] Exit after this many seconds without a request (0 = never)")
+
+    return p
+
+
+class _UsageError(ValueError):
+    """Invalid or missing CLI arguments for an action (reported per item in batch mode)."""
+
+
+def _parse_id_filter(value: Any) -> Optional[list]:
+    if not value:
+        return None
+    if isinstance(value, list):
+        return value
+    # Accepts a single ID string or a JSON array string
+    try:
+        parsed = json.loads(value)
+        if isinstance(parsed, list):
+            return parsed
+        if isinstance(parsed, str) and parsed.strip():
+            return [parsed.strip()]
+    except Exception:
+        pass
+    return [value.strip()] if value.strip() else None
+
+
+def _run_action(token: str, args: argparse.Namespace) -> Any:
+    """Run one --action with the given arguments; raises _UsageError on invalid arguments."""
+    if args.action == "scholar_profile":
+        if not args.name:
+            raise _UsageError("--action scholar_profile requires --name")
+        return workflow_scholar_profile(token, args.name, max_workers=args.max_workers, org=args.org,
+                                        interests=args.interests, min_confidence=args.min_confidence)
+
+    elif args.action == "paper_deep_dive":
+        if not args.title and not args.keyword:
+            raise _UsageError("--action paper_deep_dive requires --title or --keyword")
+        return workflow_paper_deep_dive(
+            token, title=args.title, keyword=args.keyword,
+            author=args.author, order=args.order
+        )
+
+    elif args.action == "org_analysis":
+        if not args.org:
+            raise _UsageError("--action org_analysis requires --org")
+        return workflow_org_analysis(token, args.org, max_workers=args.max_workers)
+
+    elif args.action == "venue_papers":
+        if not args.venue:
+            raise _UsageError("--action venue_papers requires --venue")
+        return workflow_venue_papers(token, args.venue, year=args.year, limit=args.size)
+
+    elif args.action == "venue_sync":
+        if not args.venue:
+            raise _UsageError("--action venue_sync requires --venue")
+        return workflow_venue_sync(token, args.venue, from_year=args.from_year, to_year=args.to_year,
+                                   reopen_years=args.reopen_years, max_workers=args.max_workers)
+
+    elif args.action == "paper_qa":
+        if not args.query and not args.topic_high:
+            raise _UsageError("--action paper_qa requires --query or --topic_high")
+        if args.sort_citation and args.sort_year:
+            raise _UsageError("--sort_citation and --sort_year cannot both be enabled")
+        author_id_filter = _parse_id_filter(args.author_id)
+        org_id_filter = _parse_id_filter(args.org_id)
+        venue_ids_filter = _parse_id_filter(args.venue_ids)
+        return workflow_paper_qa(
+            token, query=args.query,
+            topic_high=args.topic_high, topic_middle=args.topic_middle,
+            sci_flag=args.sci_flag, sort_citation=args.sort_citation, sort_year=args.sort_year,
+            author_id=author_id_filter, org_id=org_id_filter, venue_ids=venue_ids_filter,
+            size=args.size
+        )
+
+    elif args.action == "patent_search":
+        if not args.query:
+            raise _UsageError("--action patent_search requires --query")
+        return workflow_patent_search(token, args.query, page=args.page, size=args.size,
+                                      detail_limit=args.detail_limit,
+                                      basic_details=args.basic_details,
+                                      max_workers=args.max_workers)
+
+    elif args.action == "scholar_patents":
+        if not args.name:
+            raise _UsageError("--action scholar_patents requires --name")
+        return workflow_scholar_patents(token, args.name, detail_limit=args.detail_limit,
+                                        basic_details=args.basic_details,
+                                        max_workers=args.max_workers, org=args.org,
+                                        interests=args.interests, min_confidence=args.min_confidence)
+
+    elif args.action == "citation_graph":
+        if not args.title and not args.keyword:
+            raise _UsageError("--action citation_graph requires --title or --keyword")
+        return workflow_citation_graph(
+            token, title=args.title, keyword=args.keyword, author=args.author, order=args.order,
+            max_depth=args.depth, max_nodes=args.max_nodes, strategy=args.strategy,
+            max_workers=args.max_workers, max_cost=args.max_cost, edge_list=args.edge_list
+        )
+
+    elif args.action == "raw":
+        if not args.api:
+            raise _UsageError("--action raw requires --api (API function name)")
+        fn = globals().get(args.api)
+        if fn is None or not callable(fn):
+            raise _UsageError(f"API function not found: {args.api}. See source code for available functions.")
+        if isinstance(args.params, dict):
+            kwargs = args.params
+        else:
+            try:
+                kwargs = json.loads(args.params) if args.params else {}
+            except ValueError as e:
+                raise _UsageError(f"--params is not valid JSON: {e}") from None
+        result = fn(token, **kwargs)
+        if isinstance(result, CitationGraph):
+            result = result.to_dict()
+        return result
+
+    elif args.action == "local_search":
+        store = get_store()
+        if store is None:
+            raise _UsageError("--action local_search needs the local entity store (drop --no_store)")
+        if not any((args.title, args.keyword, args.author, args.org, args.venue, args.year)):
+            raise _UsageError("--action local_search requires --title, --keyword, --author, --org, --venue or --year")
+        hits = store.search(text=args.keyword, title=args.title, author=args.author, org=args.org,
+                            venue=args.venue, year=args.year, limit=args.size)
+        return {"data": hits, "total": len(hits)}
+
+    raise _UsageError(f"Unknown action: {args.action}")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Batch Mode
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _iter_batch_items(source: str):
+    """
+    Yield one dict of CLI arguments per input item from a JSONL or CSV file ("-" = stdin).
+    JSONL lines are objects such as {"name": "Andrew Ng"}; CSV files need a header row
+    naming the arguments (e.g. "name,org"). The format is taken from the file extension,
+    or sniffed from the first character when there is none.
+    """
+    f = sys.stdin if source == "-" else open(source, encoding="utf-8", newline="")
+    try:
+        ext = os.path.splitext(source)[1].lower()
+        if ext in (".jsonl", ".ndjson", ".json"):
+            is_jsonl, lines = True, f
+        elif ext == ".csv":
+            is_jsonl, lines = False, f
+        else:
+            first_line = f.readline()
+            is_jsonl = first_line.lstrip().startswith("{")
+            lines = itertools.chain([first_line], f)
+
+        if is_jsonl:
+            for line in lines:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        yield _UsageError(f"Invalid JSON line: {e}")
+        else:
+            for row in csv.DictReader(lines):
+                yield {k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+    finally:
+        if source != "-":
+            f.close()
+
+
+def _batch_item_args(parser: argparse.ArgumentParser, base: argparse.Namespace, item: dict) -> argparse.Namespace:
+    """Overlay one batch item on the CLI arguments, coercing CSV strings to each option's type."""
+    actions = {a.dest: a for a in parser._actions}
+    args = argparse.Namespace(**vars(base))
+    for key, value in item.items():
+        if key == "token":
+            continue  # tokens come from the command line / environment only
+        action = actions.get(key)
+        if action is None or key in ("batch", "output", "resume", "batch_workers"):
+            raise _UsageError(f"Unknown batch field: {key}")
+        if isinstance(value, str):
+            if isinstance(action, argparse._StoreTrueAction):
+                value = value.strip().lower() in ("1", "true", "yes", "y")
+            elif action.type is not None:
+                try:
+                    value = action.type(value)
+                except (ValueError, argparse.ArgumentTypeError) as e:
+                    raise _UsageError(f"Invalid {key}: {e}")
+        if action.choices and value not in action.choices:
+            raise _UsageError(f"Invalid {key}: {value!r} (choose from {', '.join(action.choices)})")
+        setattr(args, key, value)
+    return args
+
+
+def _run_batch(token: str, args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    """
+    Run --action over every item of --batch on a bounded worker pool, writing one JSON line
+    per item ({"index", "input", "result"} or {"index", "input", "error"}) as soon as it
+    finishes. With --resume, items that already have a result line in --output are skipped;
+    their lines are kept and everything else (error lines, a line truncated by a crash) is
+    dropped from the file and rerun.
+    """
+
+    done_indices = set()
+    if args.resume and args.output and os.path.exists(args.output):
+        kept, dropped = [], 0
+        with open(args.output, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if "result" not in record:
+                        raise KeyError("result")
+                    done_indices.add(record["index"])
+                    kept.append(line if line.endswith("\n") else line + "\n")
+                except (ValueError, KeyError, TypeError):
+                    dropped += 1  # an error line, or a line truncated by the crash; that item is rerun
+        if dropped:
+            tmp = f"{args.output}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(kept)
+            os.replace(tmp, args.output)
+        print(f"[Batch] Resuming: {len(done_indices)} items already done, {dropped} failed or "
+              f"incomplete lines rerun", file=sys.stderr)
+
+    out = open(args.output, "a" if args.resume else "w", encoding="utf-8") if args.output else sys.stdout
+    _orjson_module()  # one line per item, for many items: worth loading orjson
+
+    def run(index: int, item: Any) -> dict:
+        if isinstance(item, _UsageError):
+            return {"index": index, "input": None, "error": str(item)}
+        if not isinstance(item, dict):
+            return {"index": index, "input": item, "error": "Batch item must be a JSON object"}
+        shown = {k: v for k, v in item.items() if k != "token"}
+        try:
+            with workflow_deadline(args.deadline):
+                result = _materialize(_run_action(token, _batch_item_args(parser, args, item)))
+            return {"index": index, "input": shown, "result": result}
+        except _UsageError as e:
+            return {"index": index, "input": shown, "error": str(e)}
+        except Exception as e:
+            return {"index": index, "input": shown, "error": f"{type(e).__name__}: {e}"}
+
+    workers = max(1, args.batch_workers)
+    counts = {"ok": 0, "failed": 0, "skipped": len(done_indices)}
+    pending = set()
+    try:
+        with futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            def drain(block_until_below: int) -> None:
+                nonlocal pending
+                while len(pending) >= block_until_below:
+                    finished, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                    for future in finished:
+                        record = future.result()
+                        counts["failed" if "error" in record else "ok"] += 1
+                        held = _hold_sync_commit(record.get("result"))
+                        out.write(_dumps(record) + "\n")
+                        out.flush()
+                        commit_venue_sync(held)  # only once the item's line is written
+
+            try:
+                for index, item in enumerate(_iter_batch_items(args.batch)):
+                    if index in done_indices:
+                        continue
+                    drain(2 * workers)  # bound queued items so huge inputs stream through
+                    pending.add(pool.submit(contextvars.copy_context().run, run, index, item))
+            except OSError as e:
+                print(f"[Batch] Stopped reading input: {e}", file=sys.stderr)
+            drain(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"[Batch] ok={counts['ok']} failed={counts['failed']} skipped={counts['skipped']}", file=sys.stderr)
+
+
+def _report_stats(args: argparse.Namespace, call_stats: Optional[CallStats] = None) -> None:
+    if call_stats is not None:
+        for line in call_stats.report():
+            print(f"[Calls] {line}", file=sys.stderr)
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"[Cache] hits={stats['hits']} misses={stats['misses']} writes={stats['writes']} "
+              f"evictions={stats['evictions']}", file=sys.stderr)
+    store = get_store()
+    if store is not None and store.local_first:
+        stats = store.stats()
+        print(f"[Store] local hits={stats['hits']} misses={stats['misses']} writes={stats['writes']}",
+              file=sys.stderr)
+    aliases = get_org_alias_index()
+    stats = aliases.stats() if aliases is not None else {}
+    if stats.get("hits") or stats.get("fuzzy_hits") or stats.get("candidates"):
+        print(f"[OrgAlias] hits={stats['hits']} fuzzy_hits={stats['fuzzy_hits']} "
+              f"candidates={stats['candidates']} misses={stats['misses']} aliases={stats['aliases']}",
+              file=sys.stderr)
+    memo = get_memo()
+    stats = memo.stats() if memo is not None else {}
+    if stats.get("hits") or stats.get("coalesced"):
+        print(f"[Memo] hits={stats['hits']} coalesced={stats['coalesced']} misses={stats['misses']}",
+              file=sys.stderr)
+    limiter = get_rate_limiter()
+    if limiter is not None and limiter.stats()["throttled"]:
+        print(f"[RateLimit] {json.dumps(limiter.stats())}", file=sys.stderr)
+    with _token_pools_lock:
+        pools = list(_token_pools.values())
+    for pool in pools:
+        for entry in pool.stats():
+            print(f"[Tokens] {entry['token']} requests={entry['requests']} throttled={entry['throttled']} "
+                  f"exhausted={entry['exhausted']} drained={entry['drained_seconds']}s", file=sys.stderr)
+    if args.pool_stats:
+        print(f"[Pool] {json.dumps(get_transport().stats())}", file=sys.stderr)
+    breaker = get_circuit_breaker()
+    if breaker is not None and breaker.stats()["opened"]:
+        stats = breaker.stats()
+        print(f"[Circuit] opened={stats['opened']} rejected={stats['rejected']} "
+              f"still_open={','.join(stats['open']) or '-'}", file=sys.stderr)
+    hedger = get_hedger()
+    if hedger is not None:
+        stats = hedger.stats()
+        print(f"[Hedge] requests={stats['requests']} hedged={stats['hedged']} "
+              f"hedge_wins={stats['hedge_wins']}", file=sys.stderr)
+    budget = get_budget()
+    if budget is not None:
+        report = budget.report()
+        print(f"[Budget] spent={report['spent']:.2f} of {report['limit']:.2f} "
+              f"remaining={report['remaining']:.2f}", file=sys.stderr)
+        for entry in report["skipped"]:
+            print(f"[Budget] skipped {entry['api']} x{entry['count']} "
+                  f"(price={entry['price']:.2f} priority={entry['priority']})", file=sys.stderr)
+        for entry in report["substituted"]:
+            print(f"[Budget] used {entry['alternative']} instead of {entry['api']} x{entry['count']}",
+                  file=sys.stderr)
+    if args.stats:
+        dump = {"calls": call_stats.summary() if call_stats is not None else None,
+                "pool": get_transport().stats(),
+                "cache": cache.stats() if cache is not None else None,
+                "store": store.stats() if store is not None else None,
+                "org_aliases": aliases.stats() if aliases is not None else None,
+                "memo": memo.stats() if memo is not None else None,
+                "rate_limiter": limiter.stats() if limiter is not None else None,
+                "token_pools": [pool.stats() for pool in pools],
+                "circuit_breaker": breaker.stats() if breaker is not None else None,
+                "hedging": hedger.stats() if hedger is not None else None,
+                "budget": budget.report() if budget is not None else None}
+        if args.stats == "-":
+            print(f"[Stats] {json.dumps(dump, ensure_ascii=False)}", file=sys.stderr)
+        else:
+            with open(args.stats, "w", encoding="utf-8") as f:
+                json.dump(dump, f, ensure_ascii=False, indent=2)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Daemon (warm process serving forwarded CLI invocations over a Unix socket)
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Options that configure process-wide state; the daemon's come from its --serve command
+# line, so a forwarded invocation that sets one differently runs locally instead
+_DAEMON_PROCESS_OPTIONS = (
+    "pool_size", "pool_max_per_host", "pool_idle_timeout", "connect_timeout", "read_timeout",
+    "hedge", "hedge_quantile", "hedge_paid", "memo_size", "rate_limit", "max_concurrency",
+    "no_rate_limit", "token_strategy", "circuit_cooldown", "circuit_failure_rate", "no_circuit_breaker",
+    "no_cache", "refresh_cache", "cache_path", "cache_max_mb", "cache_ttl",
+    "no_store", "store_path", "local_first", "store_max_age", "sync_state",
+    "no_org_aliases", "org_alias_path", "org_alias_similarity",
+)
+# File arguments resolved against the client's working directory
+_CLI_PATH_OPTIONS = ("batch", "output", "stats", "edge_list", "export")
+
+_daemon_channel: contextvars.ContextVar = contextvars.ContextVar("aminer_daemon_channel", default=None)
+
+
+class _DaemonChannel:
+    """
+    One forwarded invocation's connection. Its stdout/stderr text is buffered and sent as
+    {"stream", "data"} JSON lines (stderr a line at a time, stdout on flush or every
+    STREAM_CHUNK_BYTES), followed by {"exit": code}. A client that went away stops
+    receiving output, but the run itself completes.
+    """
+
+    def __init__(self, conn: socket.socket):
+        self._file = conn.makefile("wb")
+        self._lock = threading.Lock()
+        self._buffers = {"stdout": [], "stderr": []}
+        self.call_stats: Optional[CallStats] = None
+
+    def _send(self, frame: dict) -> None:
+        try:
+            self._file.write(json.dumps(frame, ensure_ascii=False).encode("utf-8") + b"\n")
+            self._file.flush()
+        except OSError:
+            pass
+
+    def write(self, stream: str, text: str) -> int:
+        with self._lock:
+            buffer = self._buffers[stream]
+            buffer.append(text)
+            if ("\n" in text if stream == "stderr" else sum(map(len, buffer)) >= STREAM_CHUNK_BYTES):
+                self._send({"stream": stream, "data": "".join(buffer)})
+                buffer.clear()
+        return len(text)
+
+    def flush(self, stream: str) -> None:
+        with self._lock:
+            buffer = self._buffers[stream]
+            if buffer:
+                self._send({"stream": stream, "data": "".join(buffer)})
+                buffer.clear()
+
+    def finish(self, frame: dict) -> None:
+        self.flush("stdout")
+        self.flush("stderr")
+        with self._lock:
+            self._send(frame)
+            with contextlib.suppress(OSError):
+                self._file.close()
+
+
+class _RoutedStream:
+    """
+    The daemon's sys.stdout / sys.stderr: text written in the context of a forwarded
+    invocation (including its workflow stage threads) goes to that invocation's client,
+    anything else to the daemon's own stream.
+    """
+
+    def __init__(self, name: str, fallback):
+        self.name, self._fallback = name, fallback
+
+    def write(self, text: str) -> int:
+        channel = _daemon_channel.get()
+        return channel.write(self.name, text) if channel is not None else self._fallback.write(text)
+
+    def flush(self) -> None:
+        channel = _daemon_channel.get()
+        if channel is not None:
+            channel.flush(self.name)
+        else:
+            self._fallback.flush()
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._fallback, attr)  # encoding, isatty(), fileno() ...
+
+
+def _route_call(call: CallRecord) -> None:
+    """Call hook of the daemon: each invocation's CallStats only sees its own calls."""
+    channel = _daemon_channel.get()
+    if channel is not None and channel.call_stats is not None:
+        channel.call_stats(call)
+
+
+def _daemon_local_reason(args: argparse.Namespace, serve_args: argparse.Namespace) -> Optional[str]:
+    """Why a forwarded invocation must run in the client's own process, or None."""
+    if args.serve:
+        return "--serve"
+    if args.batch == "-":
+        return "batch input on stdin"
+    if args.budget is not None or args.stage_priority:
+        return "--budget caps a single process"
+    for name in _DAEMON_PROCESS_OPTIONS:
+        if getattr(args, name) != getattr(serve_args, name):
+            return f"--{name} differs from the daemon's"
+    return None
+
+
+def _serve_request(conn: socket.socket, parser: argparse.ArgumentParser,
+                   serve_args: argparse.Namespace) -> None:
+    """Run one forwarded invocation ({"argv", "cwd", "token"}) on this thread."""
+    channel = _DaemonChannel(conn)
+    _daemon_channel.set(channel)  # a new thread starts with an empty context
+    code = 0
+    try:
+        request = json.loads(conn.makefile("rb").readline() or b"{}")
+        args = parser.parse_args(request.get("argv") or [])
+        reason = _daemon_local_reason(args, serve_args)
+        if reason is not None:
+            channel.finish({"local": reason})
+            return
+        for name in _CLI_PATH_OPTIONS:
+            value = getattr(args, name)
+            if value and value != "-":
+                setattr(args, name, os.path.join(request.get("cwd") or os.getcwd(), value))
+        token = _resolve_token(args, parser, request.get("token"))
+        channel.call_stats = CallStats()
+        _run_cli(token, args, parser, channel.call_stats)
+    except SystemExit as e:  # --help, parser.error()
+        code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except Exception as e:
+        print(f"[Daemon] {type(e).__name__}: {e}", file=sys.stderr)
+        code = 1
+    channel.finish({"exit": code})
+
+
+def serve_daemon(parser: argparse.ArgumentParser, serve_args: argparse.Namespace) -> None:
+    """
+    Serve invocations forwarded by clients with AMINER_DAEMON_SOCKET set, until no request
+    arrived for --idle_timeout seconds (or Ctrl-C). Each connection is one invocation, run
+    on its own thread against this process's connection pool, memo, rate limiter, circuit
+    breaker, cache and store, so repeated runs skip interpreter startup, imports, TCP/TLS
+    handshakes and re-opening the SQLite files. The socket is created mode 0600: requests
+    carry the caller's token.
+    """
+    path = serve_args.socket
+    if not hasattr(socket, "AF_UNIX"):
+        parser.error("--serve needs Unix domain sockets, which this platform does not provide")
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            parser.error(f"A daemon is already listening on {path}")
+        except OSError:
+            os.unlink(path)  # left behind by a daemon that did not shut down cleanly
+        finally:
+            probe.close()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(umask)
+    server.listen(16)
+    server.settimeout(1.0)  # wakes the loop up to check the idle timeout
+
+    lock = threading.Lock()
+    state = {"active": 0, "last": time.monotonic()}
+
+    def handle(conn: socket.socket) -> None:
+        try:
+            _serve_request(conn, parser, serve_args)
+        finally:
+            conn.close()
+            with lock:
+                state["active"] -= 1
+                state["last"] = time.monotonic()
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _RoutedStream("stdout", stdout), _RoutedStream("stderr", stderr)
+    add_call_hook(_route_call)
+    print(f"[Daemon] Listening on {path} (export AMINER_DAEMON_SOCKET={path} to use it)", file=sys.stderr)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                with lock:
+                    idle = not state["active"] and time.monotonic() - state["last"]
+                if serve_args.idle_timeout and idle and idle >= serve_args.idle_timeout:
+                    print(f"[Daemon] Idle for {serve_args.idle_timeout:g}s, exiting", file=sys.stderr)
+                    break
+                continue
+            with lock:
+                state["active"] += 1
+            threading.Thread(target=handle, args=(conn,), name="aminer-daemon", daemon=True).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+        remove_call_hook(_route_call)
+        sys.stdout, sys.stderr = stdout, stderr
+        _report_stats(serve_args)
+
+
+def _resolve_token(args: argparse.Namespace, parser: argparse.ArgumentParser,
+                   env_token: Optional[str]) -> str:
+    if args.action is None:
+        parser.error("the following arguments are required: --action")
+    # Token priority: command-line --token > env var AMINER_API_KEY > TEST_TOKEN
+    token = (args.token or env_token or TEST_TOKEN or "").strip()
+    if not token and args.action != "local_search":
+        parser.error(
+            "Missing --token; cannot call AMiner API. Please go to "
+            "https://open.aminer.cn/open/board?tab=control to generate a token first."
+        )
+    return token
+
+
+def _configure(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    """Apply the command line's transport, memo, rate limit, circuit, cache, budget and store settings."""
+    configure_transport(pool_size=args.pool_size, max_per_host=args.pool_max_per_host,
+                        idle_timeout=args.pool_idle_timeout, connect_timeout=args.connect_timeout,
+                        read_timeout=args.read_timeout)
+    configure_token_pool(args.token_strategy)
+    if args.hedge:
+        configure_hedging(quantile=args.hedge_quantile, include_paid=args.hedge_paid)
+    elif args.hedge_paid:
+        parser.error("--hedge_paid only applies with --hedge")
+    configure_memo(max_entries=args.memo_size)
+    rates = None
+    if args.rate_limit:
+        try:
+            rates = dict(RATE_LIMITS)
+            for item in args.rate_limit.split(","):
+                cls, _, rate = item.partition("=")
+                rates[cls.strip()] = (float(rate), 2 * float(rate))
+        except ValueError:
+            parser.error('--rate_limit expects "class=rate[,class=rate]", e.g. "free=10,paid=5"')
+    configure_rate_limiter(rates, max_concurrency=args.max_concurrency,
+                           enabled=not args.no_rate_limit)
+    configure_circuit_breaker(failure_rate=args.circuit_failure_rate, cooldown=args.circuit_cooldown,
+                              enabled=not args.no_circuit_breaker)
+    # A single --action raw call is the fast path: it opens none of the SQLite files
+    # (cache, entity store unless --local_first, org aliases); a --batch of them does
+    single_raw = args.action == "raw" and not args.batch
+    if not args.no_cache and not single_raw:
+        ttls = None if args.cache_ttl is None else {}
+        configure_cache(args.cache_path, max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                        ttls=ttls,
+                        default_ttl=CACHE_DEFAULT_TTL_SECONDS if args.cache_ttl is None else args.cache_ttl,
+                        mode="refresh" if args.refresh_cache else "use")
+    if args.budget is not None:
+        priorities = {}
+        for item in (args.stage_priority or "").split(","):
+            if not item.strip():
+                continue
+            api, _, level = item.partition("=")
+            api = api.strip()
+            if api not in API_PATHS or not level.strip().isdigit():
+                parser.error(f'--stage_priority expects "api=priority[,api=priority]" with API names, got "{item}"')
+            priorities[api] = int(level)
+        configure_budget(args.budget, priorities)
+    elif args.stage_priority:
+        parser.error("--stage_priority only applies with --budget")
+    if args.sync_state != SYNC_STATE_PATH:
+        configure_venue_sync(args.sync_state)  # the default file is opened by the first venue_sync
+    if not args.no_store:
+        if not single_raw or args.local_first:
+            configure_store(args.store_path, max_age=args.store_max_age, local_first=args.local_first)
+    elif args.local_first:
+        parser.error("--local_first needs the local entity store (drop --no_store)")
+    if not args.no_org_aliases and not single_raw:
+        configure_org_aliases(args.org_alias_path, args.org_alias_similarity)
+
+
+def _run_cli(token: str, args: argparse.Namespace, parser: argparse.ArgumentParser,
+             call_stats: CallStats) -> None:
+    """Run one parsed invocation (an action or a --batch) and report its statistics."""
+    export = export_tables(args.export, args.export_format, args.export_row_group) if args.export \
+        else contextlib.nullcontext()
+    if args.batch:
+        if args.resume and not args.output:
+            parser.error("--resume requires --output (the results file of the run being resumed)")
+        with export as exporter:
+            _run_batch(token, args, parser)
+        for table, info in (exporter.tables if exporter is not None else {}).items():
+            print(f"[Export] {table}: {info['rows']} rows -> {info['path']}", file=sys.stderr)
+    else:
+        with workflow_deadline(args.deadline), export as exporter:  # also covers records streamed while writing
+            try:
+                result = _run_action(token, args)
+            except _UsageError as e:
+                parser.error(str(e))
+            held = _hold_sync_commit(result)
+            if exporter is None:
+                OutputWriter(fmt=args.format).write(result)
+            else:
+                result = _export_summary(result)
+        if exporter is not None:
+            result["export"] = {"format": exporter.format, "directory": exporter.directory,
+                                "tables": exporter.tables}
+            OutputWriter(fmt=args.format).write(result)
+        commit_venue_sync(held)  # a venue sync's watermark advances only once its output is written
+    _report_stats(args, call_stats)
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.serve:
+        if args.budget is not None:
+            parser.error("--budget caps a single run; it cannot be combined with --serve")
+        _configure(args, parser)
+        serve_daemon(parser, args)
+        return
+    token = _resolve_token(args, parser, os.getenv("AMINER_API_KEY"))
+    _configure(args, parser)
+    _run_cli(token, args, parser, add_call_hook(CallStats()))
+
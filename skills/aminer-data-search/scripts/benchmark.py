@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks of aminer_client against the local mock gateway (mock_gateway.py).
+
+Every workflow_* function and a batch-mode run are timed end to end against a mock
+gateway started in a child process (so its allocations stay out of the memory
+numbers). Reported per scenario: throughput, p50/p99 latency, peak traced memory,
+and API calls / retries / documented cost per run. No token or network access needed.
+
+Usage:
+    python benchmark.py                                   # all scenarios, defaults
+    python benchmark.py --scenarios scholar_profile,batch --iterations 50 --concurrency 4
+    python benchmark.py --latency 0.05 --throttle_rate 0.05 --json results.json
+    python benchmark.py --baseline results.json --threshold 0.15   # exit 1 on regressions
+    python benchmark.py --stall_rate 0.05 --stall 2 --hedge        # tail latency with hedging
+    python benchmark.py --scenarios startup,startup_daemon --startup_budget_ms 150
+
+The startup scenarios time whole `aminer_client.py --action raw` processes (interpreter
+start, imports, argument parsing, one call): "startup" runs each one cold, "startup_daemon"
+hands each to a warm --serve daemon. A cold p50 above --startup_budget_ms fails the run.
+
+The response cache, local entity store and in-process memo are off (the memo stays on
+with --warm), so every iteration goes over the (mock) network like a cold production
+run. Client-side rate limiting stays off as well (the library default) unless --rate_limit
+is given, since it would otherwise dominate every number.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import aminer_client as client  # noqa: E402
+import mock_gateway  # noqa: E402
+
+BENCH_TOKEN = "mock-benchmark-token"  # the mock accepts any non-empty Authorization header
+BENCH_ITERATIONS = 20
+BENCH_BATCH_ITEMS = 50
+BENCH_REGRESSION_THRESHOLD = 0.10   # relative slowdown / growth that --baseline flags
+CLIENT_SCRIPT = os.path.join(SCRIPTS_DIR, "aminer_client.py")  # the CLI entry point (client is aminer_core)
+# Cold CLI startup: BASELINE is the pre-optimization client's cold `--help` (best of 5,
+# reference machine); a cold raw call's p50 must not take longer than that.
+BENCH_STARTUP_BASELINE_MS = 100
+BENCH_STARTUP_BUDGET_MS = BENCH_STARTUP_BASELINE_MS
+
+# name -> callable(token, max_workers) running one workflow; arguments fixed so runs are comparable
+SCENARIOS = {
+    "scholar_profile": lambda t, w: client.workflow_scholar_profile(t, "Andrew Ng", max_workers=w),
+    "paper_deep_dive": lambda t, w: client.workflow_paper_deep_dive(t, title="Attention is all you need"),
+    "org_analysis": lambda t, w: client.workflow_org_analysis(t, "Tsinghua University", max_workers=w),
+    "venue_papers": lambda t, w: client.workflow_venue_papers(t, "NeurIPS", year=2023),
+    "paper_qa": lambda t, w: client.workflow_paper_qa(t, query="protein structure prediction"),
+    "patent_search": lambda t, w: client.workflow_patent_search(t, "quantum computing chip",
+                                                                detail_limit=None, max_workers=w),
+    "scholar_patents": lambda t, w: client.workflow_scholar_patents(t, "Andrew Ng",
+                                                                    detail_limit=None, max_workers=w),
+    "citation_graph": lambda t, w: client.workflow_citation_graph(t, title="Attention is all you need",
+                                                                  max_depth=2, max_nodes=100,
+                                                                  max_workers=w),
+}
+
+
+# Scenarios built in main() rather than listed above
+EXTRA_SCENARIOS = ["batch", "startup", "startup_daemon"]
+
+
+def _batch_scenario(items: int, workers: int):
+    """One --batch run of scholar_profile over `items` distinct names, output discarded."""
+    def run(token: str, max_workers: int) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "items.jsonl")
+            with open(source, "w", encoding="utf-8") as f:
+                for i in range(items):
+                    f.write(json.dumps({"name": f"Scholar {i}"}) + "\n")
+            parser = client.build_parser()
+            args = parser.parse_args(["--action", "scholar_profile", "--batch", source,
+                                      "--output", os.path.join(tmp, "out.jsonl"),
+                                      "--batch_workers", str(workers),
+                                      "--max_workers", str(max_workers)])
+            client._run_batch(token, args, parser)
+    return run
+
+
+def _cli_scenario(base_url: str, flags: list, socket_path: str = None):
+    """One `aminer_client.py --action raw` process, forwarded to the daemon at socket_path if given."""
+    env = dict(os.environ, AMINER_BASE_URL=base_url)
+    env.pop("AMINER_DAEMON_SOCKET", None)
+    if socket_path:
+        env["AMINER_DAEMON_SOCKET"] = socket_path
+    cmd = [sys.executable, CLIENT_SCRIPT, "--action", "raw", "--api", "paper_search",
+           "--params", '{"title": "startup"}', *flags]
+
+    def run(token: str, max_workers: int) -> None:
+        subprocess.run(cmd + ["--token", token], env=env, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+    return run
+
+
+def _cli_flags(args: argparse.Namespace) -> list:
+    """aminer_client options matching the in-process setup of main() (no cache/store, ...)."""
+    flags = ["--no_cache", "--no_store", "--memo_size", str(client.MEMO_MAX_ENTRIES if args.warm else 0)]
+    if not args.rate_limit:
+        flags.append("--no_rate_limit")
+    if args.hedge:
+        flags.append("--hedge")
+    return flags
+
+
+def start_daemon(base_url: str, flags: list, socket_path: str) -> subprocess.Popen:
+    """Start `aminer_client.py --serve` on socket_path; returns once it accepts connections."""
+    proc = subprocess.Popen([sys.executable, CLIENT_SCRIPT, "--serve", "--socket", socket_path,
+                             "--idle_timeout", "0", *flags],
+                            env=dict(os.environ, AMINER_BASE_URL=base_url),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket_path):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill()
+            raise RuntimeError("aminer_client daemon failed to start")
+        time.sleep(0.02)
+    return proc
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1) + 0.5)] if values else 0.0
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Swallow the workflows' stderr progress output."""
+    with contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def start_gateway(args: argparse.Namespace) -> tuple:
+    """Start mock_gateway.py in a child process on a free port; returns (process, base_url)."""
+    cmd = [sys.executable, mock_gateway.__file__, "--port", "0",
+           "--latency", str(args.latency), "--jitter", str(args.jitter),
+           "--stall_rate", str(args.stall_rate), "--stall", str(args.stall),
+           "--error_rate", str(args.error_rate), "--throttle_rate", str(args.throttle_rate),
+           "--retry_after", str(args.retry_after), "--records", str(args.records),
+           "--text_bytes", str(args.text_bytes)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    base_url = proc.stdout.readline().strip()
+    if not base_url:
+        proc.kill()
+        raise RuntimeError("mock gateway failed to start")
+    return proc, base_url
+
+
+def run_scenario(name: str, fn, iterations: int, concurrency: int) -> dict:
+    """Time `iterations` runs of fn() (on `concurrency` threads), then one traced run for memory."""
+    latencies = []
+
+    def timed(_):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    with _quiet():
+        fn()  # warm-up: opens the pooled connections and fills lazily built state
+        calls = client.add_call_hook(client.CallStats())
+        wall = time.perf_counter()
+        if concurrency <= 1:
+            for i in range(iterations):
+                timed(i)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(timed, range(iterations)))
+        wall = time.perf_counter() - wall
+        client.remove_call_hook(calls)
+
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    total = calls.summary()["total"]
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "throughput_per_s": round(iterations / wall, 2) if wall else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "calls_per_run": round(total["calls"] / iterations, 2) if iterations else 0.0,
+        "retries": total["retries"],
+        "errors": total["errors"],
+        "cost_per_run": round(total["cost"] / iterations, 4) if iterations else 0.0,
+    }
+
+
+# Lower is better for these; throughput is compared inversely
+_REGRESSION_METRICS = ("p50_ms", "p99_ms", "peak_memory_kb")
+
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    """Return a description of every metric that regressed by more than `threshold`."""
+    previous = {r["scenario"]: r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(result["scenario"])
+        if old is None:
+            continue
+        for metric in _REGRESSION_METRICS:
+            if old.get(metric) and result[metric] > old[metric] * (1 + threshold):
+                regressions.append(f"{result['scenario']}: {metric} {old[metric]} -> {result[metric]}")
+        if old.get("throughput_per_s") and \
+                result["throughput_per_s"] < old["throughput_per_s"] * (1 - threshold):
+            regressions.append(f"{result['scenario']}: throughput_per_s "
+                               f"{old['throughput_per_s']} -> {result['throughput_per_s']}")
+    return regressions
+
+
+def _print_table(results: list) -> None:
+    columns = ("scenario", "throughput_per_s", "p50_ms", "p99_ms", "peak_memory_kb",
+               "calls_per_run", "retries", "errors", "cost_per_run")
+    widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in results:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(columns, widths)))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Benchmark aminer_client workflows against a local mock gateway")
+    p.add_argument("--scenarios", default=",".join(list(SCENARIOS) + EXTRA_SCENARIOS),
+                   help="Comma-separated scenarios: " + ", ".join(list(SCENARIOS) + EXTRA_SCENARIOS))
+    p.add_argument("--iterations", type=int, default=BENCH_ITERATIONS, help="Timed runs per scenario")
+    p.add_argument("--concurrency", type=int, default=1, help="Threads running iterations concurrently")
+    p.add_argument("--batch_items", type=int, default=BENCH_BATCH_ITEMS, help="[batch] Items per batch run")
+    p.add_argument("--batch_workers", type=int, default=4, help="[batch] --batch_workers of the batch run")
+    p.add_argument("--max_workers", type=int, default=client.WORKFLOW_MAX_WORKERS,
+                   help="Workflow stage concurrency (aminer_client's --max_workers)")
+    p.add_argument("--warm", action="store_true",
+                   help="Keep the in-process memo on (cache and store stay off)")
+    p.add_argument("--rate_limit", action="store_true",
+                   help="Turn client-side rate limiting on (off by default: it caps paid calls at 5/s)")
+    p.add_argument("--hedge", action="store_true",
+                   help="Turn on hedged requests for free endpoints (aminer_client's --hedge)")
+    # Mock gateway knobs (see mock_gateway.py)
+    p.add_argument("--latency", type=float, default=0.0)
+    p.add_argument("--jitter", type=float, default=0.0)
+    p.add_argument("--stall_rate", type=float, default=0.0)
+    p.add_argument("--stall", type=float, default=mock_gateway.MOCK_STALL_SECONDS)
+    p.add_argument("--error_rate", type=float, default=0.0)
+    p.add_argument("--throttle_rate", type=float, default=0.0)
+    p.add_argument("--retry_after", type=float, default=0)
+    p.add_argument("--records", type=int, default=mock_gateway.MOCK_RECORDS)
+    p.add_argument("--text_bytes", type=int, default=mock_gateway.MOCK_TEXT_BYTES)
+    p.add_argument("--json", metavar="PATH", help="Write the results as JSON (usable as a later --baseline)")
+    p.add_argument("--baseline", metavar="PATH", help="Compare with a previous --json file; exit 1 on regressions")
+    p.add_argument("--threshold", type=float, default=BENCH_REGRESSION_THRESHOLD,
+                   help="Relative change that counts as a regression (default 0.10 = 10%%)")
+    p.add_argument("--startup_budget_ms", type=float, default=BENCH_STARTUP_BUDGET_MS,
+                   help="[startup] Exit 1 when a cold CLI call's p50 wall time exceeds this")
+    return p
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in EXTRA_SCENARIOS and n not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    proc, base_url = start_gateway(args)
+    daemon = None
+    tmp = tempfile.TemporaryDirectory()
+    try:
+        client.BASE_URL = base_url
+        client.configure_cache(None)
+        client.configure_store(None)
+        client.configure_memo(client.MEMO_MAX_ENTRIES if args.warm else 0)
+        if args.rate_limit:
+            client.configure_rate_limiter()
+        client.configure_hedging(enabled=args.hedge)
+
+        results = []
+        for name in names:
+            if name == "batch":
+                fn = _batch_scenario(args.batch_items, args.batch_workers)
+                iterations = max(1, args.iterations // 10)
+            elif name == "startup":
+                fn, iterations = _cli_scenario(base_url, _cli_flags(args)), args.iterations
+            elif name == "startup_daemon":
+                socket_path = os.path.join(tmp.name, "daemon.sock")
+                daemon = daemon or start_daemon(base_url, _cli_flags(args), socket_path)
+                fn, iterations = _cli_scenario(base_url, _cli_flags(args), socket_path), args.iterations
+            else:
+                fn, iterations = SCENARIOS[name], args.iterations
+            print(f"[Bench] {name} x{iterations}", file=sys.stderr)
+            results.append(run_scenario(name, partial(fn, BENCH_TOKEN, args.max_workers), iterations,
+                                        1 if name == "batch" else args.concurrency))
+    finally:
+        for child in (daemon, proc):
+            if child is not None:
+                child.terminate()
+                child.wait()
+        tmp.cleanup()
+
+    _print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+                       "results": results}, f, indent=2)
+    failed = False
+    for r in results:
+        if r["scenario"] == "startup" and r["p50_ms"] > args.startup_budget_ms:
+            print(f"[Budget] startup p50 {r['p50_ms']}ms exceeds {args.startup_budget_ms:g}ms", file=sys.stderr)
+            failed = True
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        for line in regressions:
+            print(f"[Regression] {line}", file=sys.stderr)
+        failed = failed or bool(regressions)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Local mock of the AMiner Open Platform gateway, for benchmarks and offline development.
+
+Serves all 28 API paths under /gateway/open_platform with the documented response
+shapes (references/api-catalog.md) and deterministic synthetic records: the same
+query or ID always returns the same data, and paper_relation's cited papers form a
+stable citation graph. Latency, jitter, stalls (tail latency), error rate, 429
+injection, endpoints that are down and payload sizes are configurable. No real token is needed; any non-empty Authorization header passes.
+
+Usage:
+    python mock_gateway.py [--port 8765] [--latency 0.05] [--error_rate 0.01] ...
+    AMINER_BASE_URL=http://127.0.0.1:8765/gateway/open_platform \\
+        python aminer_client.py --token mock --action scholar_profile --name "Andrew Ng"
+
+From Python:
+    with MockGateway(latency=0.02).start() as gateway:
+        aminer_client.BASE_URL = gateway.base_url
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+BASE_PATH = "/gateway/open_platform"
+
+# Defaults (overridable via MockGateway(...) / CLI)
+MOCK_LATENCY_SECONDS = 0.0      # fixed delay before every response
+MOCK_JITTER_SECONDS = 0.0       # extra uniform random delay in [0, jitter]
+MOCK_STALL_RATE = 0.0           # share of requests that stall for an extra MOCK_STALL_SECONDS
+MOCK_STALL_SECONDS = 5.0
+MOCK_ERROR_RATE = 0.0           # share of requests answered with 500/502/503
+MOCK_THROTTLE_RATE = 0.0        # share of requests answered with 429 + Retry-After
+MOCK_RETRY_AFTER_SECONDS = 1
+MOCK_RECORDS = 10               # records in list responses without a size parameter
+MOCK_TOTAL = 1000               # `total` reported by searches and paginated lists
+MOCK_TEXT_BYTES = 200           # length of abstracts / bios / descriptions
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Synthetic Records
+# ──────────────────────────────────────────────────────────────────────────────
+
+_WORDS = ("learning", "graph", "neural", "network", "model", "language", "vision", "data",
+          "protein", "structure", "quantum", "optimization", "retrieval", "attention",
+          "robust", "efficient", "large", "scale", "reasoning", "representation")
+
+
+def _oid(*parts: Any) -> str:
+    """Deterministic 24-hex ID (the gateway's ObjectId format) for a kind + key."""
+    return hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:24]
+
+
+def _rng(*parts: Any) -> random.Random:
+    return random.Random(_oid(*parts))
+
+
+def _text(rng: random.Random, length: int) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(_WORDS))
+    return " ".join(words)[:length]
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 7))).capitalize()
+
+
+class Records:
+    """Builders for every entity shape the gateway returns, keyed by entity ID."""
+
+    def __init__(self, records: int = MOCK_RECORDS, total: int = MOCK_TOTAL,
+                 text_bytes: int = MOCK_TEXT_BYTES):
+        self.records, self.total, self.text_bytes = records, total, text_bytes
+
+    def venue_ref(self, venue_id: str) -> dict:
+        rng = _rng("venue", venue_id)
+        name = f"Journal of {rng.choice(_WORDS).capitalize()} {rng.choice(_WORDS).capitalize()}"
+        return {"id": venue_id, "name_en": name, "name_zh": f"{name}（中文）", "alias": [name[:12]]}
+
+    def authors(self, rng: random.Random, count: int = 3) -> list:
+        authors = []
+        for _ in range(count):
+            pid, org_id = _oid("person", rng.random()), _oid("org", rng.randint(0, 50))
+            authors.append({"_id": pid, "name": f"Author {pid[:6]}", "name_zh": f"作者{pid[:4]}",
+                            "org": f"University {org_id[:4]}", "org_zh": f"大学{org_id[:4]}",
+                            "org_id": org_id})
+        return authors
+
+    def paper_brief(self, paper_id: str) -> dict:
+        rng = _rng("paper", paper_id)
+        title = _title(rng)
+        return {"id": paper_id, "title": title, "title_zh": f"{title}（中文）",
+                "doi": f"10.{rng.randint(1000, 9999)}/{paper_id[:8]}"}
+
+    def paper_info(self, paper_id: str) -> dict:
+        rng = _rng("paper", paper_id)
+        venue_id = _oid("venue", rng.randint(0, 30))
+        return {"_id": paper_id, "title": self.paper_brief(paper_id)["title"],
+                "authors": [{"name": a["name"], "name_zh": a["name_zh"]} for a in self.authors(rng)],
+                "issue": str(rng.randint(1, 12)), "raw": self.venue_ref(venue_id)["name_en"],
+                "venue": self.venue_ref(venue_id)}
+
+    def paper_detail(self, paper_id: str) -> dict:
+        rng = _rng("paper", paper_id)
+        brief = self.paper_brief(paper_id)
+        venue_id = _oid("venue", rng.randint(0, 30))
+        keywords = rng.sample(_WORDS, 4)
+        return {**brief, "_id": paper_id,
+                "abstract": _text(rng, self.text_bytes), "abstract_zh": _text(rng, self.text_bytes // 2),
+                "authors": self.authors(rng), "issn": f"{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                "issue": str(rng.randint(1, 12)), "volume": str(rng.randint(1, 80)),
+                "year": rng.randint(2000, 2025), "n_citation": rng.randint(0, 5000),
+                "keywords": keywords, "keywords_zh": [f"{k}（中文）" for k in keywords],
+                "raw": self.venue_ref(venue_id)["name_en"], "venue": self.venue_ref(venue_id),
+                "venue_hhb_id": venue_id, "url": f"https://example.org/paper/{paper_id}"}
+
+    def cited(self, paper_id: str) -> list:
+        rng = _rng("cites", paper_id)
+        cited = []
+        for i in range(self.records):
+            cited_id = _oid("paper", paper_id, i) if rng.random() < 0.7 else _oid("paper", "hub", rng.randint(0, 99))
+            cited.append({"_id": cited_id, "title": self.paper_brief(cited_id)["title"],
+                          "n_citation": _rng("paper", cited_id).randint(0, 5000)})
+        return cited
+
+    def person(self, person_id: str) -> dict:
+        rng = _rng("person", person_id)
+        org_id = _oid("org", rng.randint(0, 50))
+        return {"id": person_id, "name": f"Scholar {person_id[:6]}", "name_zh": f"学者{person_id[:4]}",
+                "org": f"University {org_id[:4]}", "org_zh": f"大学{org_id[:4]}", "org_id": org_id,
+                "interests": rng.sample(_WORDS, 3), "n_citation": rng.randint(0, 100000)}
+
+    def person_detail(self, person_id: str) -> dict:
+        rng = _rng("person", person_id)
+        brief = self.person(person_id)
+        return {"id": person_id, "person_id": person_id, "name": brief["name"], "name_zh": brief["name_zh"],
+                "bio": _text(rng, self.text_bytes), "edu": _text(rng, self.text_bytes // 2),
+                "orgs": [brief["org"]], "org_zhs": [brief["org_zh"]],
+                "position": "Professor", "position_zh": "教授", "domain": rng.sample(_WORDS, 2),
+                "honor": [], "award": [], "year": rng.randint(1990, 2020)}
+
+    def person_figure(self, person_id: str) -> dict:
+        rng = _rng("figure", person_id)
+        return {"id": person_id, "ai_interests": rng.sample(_WORDS, 5), "ai_domain": rng.sample(_WORDS, 2),
+                "edus": [{"school": f"University {rng.randint(1, 99)}", "degree": "PhD",
+                          "start": 2000, "end": 2005}],
+                "works": [{"org": f"University {rng.randint(1, 99)}", "position": "Professor",
+                           "start": 2005, "end": None}]}
+
+    def project(self, project_id: str) -> dict:
+        rng = _rng("project", project_id)
+        start = rng.randint(2005, 2022)
+        return {"id": project_id, "titles": [_title(rng)], "country": "CN",
+                "project_source": "NSFC", "fund_amount": rng.randint(10, 500) * 10000,
+                "fund_currency": "CNY", "start_date": f"{start}-01-01", "end_date": f"{start + 3}-12-31"}
+
+    def org(self, org_id: str) -> dict:
+        rng = _rng("org", org_id)
+        name = f"University {org_id[:4]}"
+        return {"id": org_id, "name": name, "name_en": name, "name_zh": f"大学{org_id[:4]}",
+                "acronyms": [name[:3].upper()], "aliases": [name, name.lower()],
+                "details": _text(rng, self.text_bytes), "type": "university",
+                "location": {"country": "China", "city": rng.choice(("Beijing", "Shanghai", "Hangzhou"))},
+                "language": "en"}
+
+    def venue_detail(self, venue_id: str) -> dict:
+        rng = _rng("venue", venue_id)
+        ref = self.venue_ref(venue_id)
+        return {"id": venue_id, "name": ref["name_en"], "name_en": ref["name_en"], "name_zh": ref["name_zh"],
+                "issn": f"{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                "eissn": f"{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                "alias": ref["alias"], "type": rng.choice(("journal", "conference"))}
+
+    def patent_brief(self, patent_id: str) -> dict:
+        title = _title(_rng("patent", patent_id))
+        return {"id": patent_id, "title": title, "title_zh": f"{title}（中文）"}
+
+    def patent_info(self, patent_id: str) -> dict:
+        rng = _rng("patent", patent_id)
+        title = self.patent_brief(patent_id)["title"]
+        return {"id": patent_id, "title": title, "en": title,
+                "app_num": f"CN{rng.randint(10**11, 10**12)}", "pub_num": f"CN{rng.randint(10**8, 10**9)}A",
+                "pub_kind": "A", "inventor": [f"Inventor {rng.randint(1, 999)}"], "country": "CN",
+                "sequence": rng.randint(1, 10)}
+
+    def patent_detail(self, patent_id: str) -> dict:
+        rng = _rng("patent", patent_id)
+        return {**self.patent_info(patent_id), "abstract": _text(rng, self.text_bytes),
+                "app_date": "2020-01-01", "pub_date": "2021-06-01",
+                "assignee": [f"University {rng.randint(1, 50)}"], "ipc": ["G06N3/08"], "ipcr": ["G06N3/08"],
+                "cpc": ["G06N3/084"], "priority": [], "description": _text(rng, self.text_bytes * 2)}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Endpoints
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _page(args: dict, records: Records, size_key: str = "size", default_size: int = MOCK_RECORDS,
+          page_key: str = "page", first_page: int = 0) -> tuple:
+    """(first record index, count) of a page-number paginated request."""
+    size = max(0, _int(args.get(size_key), default_size))
+    start = (max(first_page, _int(args.get(page_key), first_page)) - first_page) * size
+    return start, max(0, min(size, records.total - start))
+
+
+def _offset(args: dict, records: Records, limit_key: Optional[str] = None, default_limit: int = 10) -> tuple:
+    start = max(0, _int(args.get("offset"), 0))
+    limit = max(0, _int(args.get(limit_key), default_limit)) if limit_key else default_limit
+    return start, max(0, min(limit, records.total - start))
+
+
+def _listing(kind: str, key: Any, start: int, count: int) -> list:
+    return [_oid(kind, key, i) for i in range(start, start + count)]
+
+
+def _query_key(args: dict, *names: str) -> str:
+    return json.dumps([args.get(n) for n in names], ensure_ascii=False, sort_keys=True)
+
+
+def _paper_search(r: Records, a: dict) -> tuple:
+    start, count = _page(a, r)
+    key = _query_key(a, "title", "keyword", "abstract", "author", "org", "venue", "order")
+    return [r.paper_brief(pid) for pid in _listing("search", key, start, count)], {"total": r.total}
+
+
+def _paper_qa_search(r: Records, a: dict) -> tuple:
+    start, count = max(0, _int(a.get("offset"), 0)), max(0, _int(a.get("size"), r.records))
+    key = _query_key(a, "query", "topic_high", "topic_middle", "title", "doi", "author_terms", "org_terms")
+    data = [r.paper_brief(pid) for pid in _listing("qa", key, start, min(count, r.total - start))]
+    return data, {"Total": r.total, "total": r.total}
+
+
+def _paper_list(r: Records, a: dict, kind: str, *keys: str) -> tuple:
+    start, count = _page(a, r)
+    data = [r.paper_detail(pid) for pid in _listing(kind, _query_key(a, *keys), start, count)]
+    return data, {"total": r.total}
+
+
+def _paper_by_condition(r: Records, a: dict) -> tuple:
+    if not a.get("year") or not a.get("venue_id"):
+        return None, {}  # the gateway answers null without both
+    pids = _listing("venue-year", _query_key(a, "venue_id", "year"), 0, r.records)
+    data = [{**r.paper_detail(pid), "year": _int(a["year"], 2020)} for pid in pids]
+    return data, {"total": len(data)}
+
+
+def _org_patent_relation(r: Records, a: dict) -> tuple:
+    start, count = _page(a, r, size_key="page_size", default_size=100, first_page=1)
+    return [{"id": pid} for pid in _listing("org-patent", a.get("id"), start, count)], {"total": r.total}
+
+
+def _venue_paper_relation(r: Records, a: dict) -> tuple:
+    start, count = _offset(a, r, limit_key="limit", default_limit=20)
+    data = []
+    for pid in _listing("venue-paper", _query_key(a, "id", "year"), start, count):
+        brief = r.paper_brief(pid)
+        data.append({"id": pid, "title": brief["title"],
+                     "year": _int(a.get("year"), _rng("paper", pid).randint(2000, 2025))})
+    return data, {"total": r.total, "offset": start}
+
+
+def _org_disambiguate_pro(r: Records, a: dict) -> tuple:
+    org = a.get("org") or ""
+    primary = _oid("org", org.split(",")[-1].strip().lower())
+    secondary = _oid("org", org.lower()) if "," in org else None
+    record = {"一级": r.org(primary)["name"], "一级ID": primary,
+              "二级": org.split(",")[0].strip() if secondary else None, "二级ID": secondary}
+    return [record], {"Total": 1, "total": 1}
+
+
+# path -> (HTTP method, handler(records, args) -> (data, extra top-level fields))
+ENDPOINTS = {
+    # Paper APIs
+    "/api/paper/search": ("GET", _paper_search),
+    "/api/paper/search/pro": ("GET", _paper_search),
+    "/api/paper/qa/search": ("POST", _paper_qa_search),
+    "/api/paper/info": ("POST", lambda r, a: ([r.paper_info(i) for i in a.get("ids") or []], {})),
+    "/api/paper/detail": ("GET", lambda r, a: ([r.paper_detail(a["id"])] if a.get("id") else [], {})),
+    "/api/paper/relation": ("GET", lambda r, a: (
+        [{"_id": a["id"], "title": r.paper_brief(a["id"])["title"], "cited": r.cited(a["id"]),
+          "n_citation": _rng("paper", a["id"]).randint(0, 5000)}] if a.get("id") else [], {})),
+    "/api/paper/list/by/search/venue": ("GET", lambda r, a: _paper_list(
+        r, a, "search-venue", "keyword", "venue", "author", "order")),
+    "/api/paper/list/citation/by/keywords": ("GET", lambda r, a: _paper_list(r, a, "keywords", "keywords")),
+    "/api/paper/platform/allpubs/more/detail/by/ts/org/venue": ("GET", _paper_by_condition),
+    # Scholar APIs
+    "/api/person/search": ("POST", lambda r, a: (
+        [r.person(pid) for pid in _listing("person-search", _query_key(a, "name", "org", "org_id"), 0,
+                                           min(10, max(0, _int(a.get("size"), 10))))], {"total": r.total})),
+    "/api/person/detail": ("GET", lambda r, a: (r.person_detail(a.get("id")), {})),
+    "/api/person/figure": ("GET", lambda r, a: (r.person_figure(a.get("id")), {})),
+    "/api/person/paper/relation": ("GET", lambda r, a: (
+        [{"author_id": a.get("id"), "id": pid, "title": r.paper_brief(pid)["title"]}
+         for pid in _listing("person-paper", a.get("id"), 0, r.records)], {"total": r.records})),
+    "/api/person/patent/relation": ("GET", lambda r, a: (
+        [{"patent_id": pid, "person_id": a.get("id"), "title": r.patent_brief(pid)["title"],
+          "en": r.patent_brief(pid)["title"], "zh": r.patent_brief(pid)["title_zh"]}
+         for pid in _listing("person-patent", a.get("id"), 0, r.records)], {})),
+    "/api/project/person/v3/open": ("GET", lambda r, a: (
+        [r.project(pid) for pid in _listing("person-project", a.get("id"), 0, r.records)],
+        {"total": r.records})),
+    # Institution APIs
+    "/api/organization/search": ("POST", lambda r, a: (
+        [{"org_id": _oid("org", name.lower()), "org_name": name} for name in a.get("orgs") or []],
+        {"total": len(a.get("orgs") or [])})),
+    "/api/organization/detail": ("POST", lambda r, a: ([r.org(i) for i in a.get("ids") or []],
+                                                       {"total": len(a.get("ids") or [])})),
+    "/api/organization/person/relation": ("GET", lambda r, a: (
+        [r.person(pid) for pid in _listing("org-person", a.get("org_id"), *_offset(a, r))], {"total": r.total})),
+    "/api/organization/paper/relation": ("GET", lambda r, a: (
+        [r.paper_brief(pid) for pid in _listing("org-paper", a.get("org_id"), *_offset(a, r))],
+        {"total": r.total})),
+    "/api/organization/patent/relation": ("GET", _org_patent_relation),
+    "/api/organization/na": ("POST", lambda r, a: ([{"org_name": (a.get("org") or "").strip().title()}], {})),
+    "/api/organization/na/pro": ("POST", _org_disambiguate_pro),
+    # Journal APIs
+    "/api/venue/search": ("POST", lambda r, a: (
+        [{k: v for k, v in r.venue_ref(vid).items() if k != "alias"}
+         for vid in _listing("venue-search", a.get("name"), 0, 3)], {"total": 3})),
+    "/api/venue/detail": ("POST", lambda r, a: (r.venue_detail(a.get("id")), {})),
+    "/api/venue/paper/relation": ("POST", _venue_paper_relation),
+    # Patent APIs
+    "/api/patent/search": ("POST", lambda r, a: (
+        [r.patent_brief(pid) for pid in _listing("patent-search", a.get("query"), *_page(a, r))],
+        {"total": r.total})),
+    "/api/patent/info": ("GET", lambda r, a: (r.patent_info(a.get("id")), {})),
+    "/api/patent/detail": ("GET", lambda r, a: (r.patent_detail(a.get("id")), {})),
+}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Server
+# ──────────────────────────────────────────────────────────────────────────────
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; with Nagle on, the client's delayed ACK
+    # would add ~40ms to every response and swamp what is being measured
+    disable_nagle_algorithm = True
+    server: "MockGateway"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def _send(self, status: int, payload: Any, headers: Optional[dict] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        parts = urllib.parse.urlsplit(self.path)
+        path = parts.path[len(BASE_PATH):] if parts.path.startswith(BASE_PATH) else parts.path
+        status, payload, headers = self.server.respond(method, path, parts.query, raw_body,
+                                                       self.headers.get("Authorization"))
+        self._send(status, payload, headers)
+
+
+class MockGateway(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering the 28 gateway paths. start() serves from a daemon
+    thread and returns self; base_url is what aminer_client's BASE_URL / AMINER_BASE_URL
+    should point at. stats() counts requests per path and injected failures.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = MOCK_LATENCY_SECONDS, jitter: float = MOCK_JITTER_SECONDS,
+                 stall_rate: float = MOCK_STALL_RATE, stall: float = MOCK_STALL_SECONDS,
+                 error_rate: float = MOCK_ERROR_RATE, throttle_rate: float = MOCK_THROTTLE_RATE,
+                 retry_after: float = MOCK_RETRY_AFTER_SECONDS, records: int = MOCK_RECORDS,
+                 total: int = MOCK_TOTAL, text_bytes: int = MOCK_TEXT_BYTES, seed: int = 0,
+                 down_paths: tuple = ()):
+        super().__init__((host, port), _Handler)
+        self.latency, self.jitter = latency, jitter
+        self.stall_rate, self.stall = stall_rate, stall
+        self.down_paths = set(down_paths)  # always answered with 503
+        self.error_rate, self.throttle_rate, self.retry_after = error_rate, throttle_rate, retry_after
+        self.records = Records(records, total, text_bytes)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors_injected": 0, "throttled": 0, "stalled": 0, "paths": {}}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def start(self) -> "MockGateway":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "paths": dict(self._stats["paths"])}
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients drop stalled requests (timeouts, hedging); only report real handler errors
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def respond(self, method: str, path: str, query: str, raw_body: bytes,
+                authorization: Optional[str]) -> tuple:
+        """(status, payload, extra headers) for one request, after the configured delay."""
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["paths"][path] = self._stats["paths"].get(path, 0) + 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self.stall_rate and self._random.random() < self.stall_rate:
+                self._stats["stalled"] += 1
+                delay += self.stall
+            roll = self._random.random()
+            if roll < self.throttle_rate:
+                self._stats["throttled"] += 1
+            elif roll < self.throttle_rate + self.error_rate:
+                self._stats["errors_injected"] += 1
+            failure = self._random.choice((500, 502, 503))
+        if delay:
+            time.sleep(delay)
+
+        if not authorization:
+            return 401, {"code": 401, "success": False, "msg": "unauthorized"}, None
+        endpoint = ENDPOINTS.get(path)
+        if endpoint is None:
+            return 404, {"code": 404, "success": False, "msg": f"unknown path {path}"}, None
+        if endpoint[0] != method:
+            return 405, {"code": 405, "success": False, "msg": f"{path} expects {endpoint[0]}"}, None
+        if roll < self.throttle_rate:
+            return 429, {"code": 429, "success": False, "msg": "too many requests"}, \
+                {"Retry-After": self.retry_after}
+        if roll < self.throttle_rate + self.error_rate:
+            return failure, {"code": failure, "success": False, "msg": "injected failure"}, None
+        if path in self.down_paths:
+            return 503, {"code": 503, "success": False, "msg": "service unavailable"}, None
+
+        if method == "GET":
+            args = {}
+            for key, value in urllib.parse.parse_qsl(query):
+                try:
+                    args[key] = json.loads(value) if value[:1] in "[{" else value
+                except ValueError:
+                    args[key] = value
+        else:
+            try:
+                args = json.loads(raw_body) if raw_body else {}
+            except ValueError:
+                return 400, {"code": 400, "success": False, "msg": "invalid JSON body"}, None
+        try:
+            data, extra = endpoint[1](self.records, args)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            return 400, {"code": 400, "success": False, "msg": f"bad parameters: {e}"}, None
+        return 200, {"code": 200, "success": True, "msg": "", "data": data, **extra}, None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Local mock AMiner Open Platform gateway")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765, help="Port to listen on (0 = any free port)")
+    p.add_argument("--latency", type=float, default=MOCK_LATENCY_SECONDS, help="Fixed delay per response (s)")
+    p.add_argument("--jitter", type=float, default=MOCK_JITTER_SECONDS,
+                   help="Extra uniform random delay per response, up to this many seconds")
+    p.add_argument("--stall_rate", type=float, default=MOCK_STALL_RATE,
+                   help="Share of requests that stall for an extra --stall seconds (0-1)")
+    p.add_argument("--stall", type=float, default=MOCK_STALL_SECONDS, help="Length of an injected stall (s)")
+    p.add_argument("--error_rate", type=float, default=MOCK_ERROR_RATE,
+                   help="Share of requests answered with 500/502/503 (0-1)")
+    p.add_argument("--throttle_rate", type=float, default=MOCK_THROTTLE_RATE,
+                   help="Share of requests answered with 429 (0-1)")
+    p.add_argument("--retry_after", type=float, default=MOCK_RETRY_AFTER_SECONDS,
+                   help="Retry-After seconds sent with injected 429s")
+    p.add_argument("--records", type=int, default=MOCK_RECORDS,
+                   help="Records in list responses without a size parameter (also cited papers per paper)")
+    p.add_argument("--total", type=int, default=MOCK_TOTAL,
+                   help="`total` of searches and paginated lists (pages stop there)")
+    p.add_argument("--text_bytes", type=int, default=MOCK_TEXT_BYTES,
+                   help="Length of abstracts, bios and descriptions (payload size knob)")
+    p.add_argument("--seed", type=int, default=0, help="Seed for latency jitter and failure injection")
+    p.add_argument("--down_paths", default="",
+                   help="Comma-separated API paths that always answer 503, e.g. /api/project/person/v3/open")
+    return p
+
+
+def main():
+    args = build_parser().parse_args()
+    gateway = MockGateway(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                          stall_rate=args.stall_rate, stall=args.stall,
+                          error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                          retry_after=args.retry_after, records=args.records, total=args.total,
+                          text_bytes=args.text_bytes, seed=args.seed,
+                          down_paths=tuple(p.strip() for p in args.down_paths.split(",") if p.strip()))
+    # First stdout line is the base URL, so a parent process can start this with --port 0
+    print(gateway.base_url, flush=True)
+    try:
+        gateway.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.server_close()
+        print(json.dumps(gateway.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
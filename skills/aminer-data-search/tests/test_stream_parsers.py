@@ -0,0 +1,233 @@
+"""
+Tests for the client's hand-written parsers: _JSONStreamReader (streamed `data` records)
+and AsyncConnectionPool's HTTP/1.1 exchange, against the mock gateway where a server is needed.
+
+    python -m unittest discover -s skills/aminer-data-search/tests
+"""
+
+import asyncio
+import http.client
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "scripts"))
+
+import aminer_client as client  # noqa: E402
+from mock_gateway import MockGateway  # noqa: E402
+
+
+def _chunked_reader(data: bytes, size: int):
+    """A read(n) over `data` that returns at most `size` bytes per call, then b""."""
+    pos = 0
+
+    def read(_n: int) -> bytes:
+        nonlocal pos
+        chunk = data[pos:pos + size]
+        pos += len(chunk)
+        return chunk
+    return read
+
+
+def _pieces_reader(pieces: list):
+    it = iter(pieces + [b""])
+    return lambda _n: next(it)
+
+
+class JSONStreamReaderTest(unittest.TestCase):
+    DOCUMENT = {
+        "code": 200,
+        "success": True,
+        "data": [1.5e-07, -0.25, 12345678901234567890, 0, 1e3, -7, True, None, "é ü 中文", [],
+                 {"n_citation": 42, "score": 3.25e+10, "title": "a \"quoted\", [bracketed] title"}],
+        "total": 1234,
+        "msg": "",
+    }
+
+    def parse(self, read) -> tuple:
+        reader = client._JSONStreamReader(read)
+        return list(reader), reader.meta
+
+    def test_every_chunk_boundary(self):
+        body = json.dumps(self.DOCUMENT, ensure_ascii=False).encode("utf-8")
+        meta = {k: v for k, v in self.DOCUMENT.items() if k != "data"}
+        for size in range(1, len(body) + 1):
+            with self.subTest(chunk_size=size):
+                records, got_meta = self.parse(_chunked_reader(body, size))
+                self.assertEqual(records, self.DOCUMENT["data"])
+                self.assertEqual(got_meta, meta)
+
+    def test_number_cut_at_chunk_boundary(self):
+        cases = [
+            ([b'{"data":[1.', b'5e-07]}'], [1.5e-07]),
+            ([b'{"data":[1.5', b'e-07,2]}'], [1.5e-07, 2]),
+            ([b'{"data":[1.5e', b'-07]}'], [1.5e-07]),
+            ([b'{"data":[-', b'12]}'], [-12]),
+            ([b'{"data":[12', b'34', b'56]}'], [123456]),
+            ([b'{"total":10', b'0,"data":[]}'], []),
+        ]
+        for pieces, expected in cases:
+            with self.subTest(pieces=pieces):
+                records, meta = self.parse(_pieces_reader(pieces))
+                self.assertEqual(records, expected)
+        self.assertEqual(self.parse(_pieces_reader([b'{"total":10', b'0,"data":[]}']))[1], {"total": 100})
+
+    def test_number_at_end_of_body(self):
+        records, meta = self.parse(_pieces_reader([b'{"data":[1],"total":4', b'2}']))
+        self.assertEqual((records, meta), ([1], {"total": 42}))
+
+    def test_multibyte_character_split(self):
+        body = json.dumps({"data": ["中文"]}, ensure_ascii=False).encode("utf-8")
+        split = body.index("中".encode("utf-8")) + 1
+        self.assertEqual(self.parse(_pieces_reader([body[:split], body[split:]]))[0], ["中文"])
+
+    def test_empty_and_missing_data(self):
+        self.assertEqual(self.parse(_pieces_reader([b'{}']))[0], [])
+        self.assertEqual(self.parse(_pieces_reader([b'{"data": [ ] , "code": 200}'])),
+                         ([], {"code": 200}))
+        self.assertEqual(self.parse(_pieces_reader([b'{"data": null}'])), ([], {"data": None}))
+
+    def test_malformed_body(self):
+        for body in (b'[1, 2]', b'{"data": [1 2]}', b'{"data": [1,', b'{"data": [tru'):
+            with self.subTest(body=body), self.assertRaises(ValueError):
+                self.parse(_pieces_reader([body]))
+
+    def test_gateway_response(self):
+        with MockGateway(latency=0, records=50).start() as gateway:
+            pool = client.ConnectionPool()
+            url = f"{gateway.base_url}/api/paper/search?title=bert&page=0&size=50"
+            headers = {"Authorization": "test"}
+            expected = json.loads(pool.request("GET", url, headers=headers).body)
+            for size in (1, 7, 4096):
+                with self.subTest(chunk_size=size):
+                    with pool.open("GET", url, None, headers) as resp:
+                        reader = client._JSONStreamReader(resp.read, chunk_size=size)
+                        records = list(reader)
+                    self.assertEqual(records, expected["data"])
+                    self.assertEqual(reader.meta, {k: v for k, v in expected.items() if k != "data"})
+            pool.close()
+
+
+class _Writer:
+    """Collects what _exchange writes."""
+
+    def __init__(self):
+        self.sent = b""
+
+    def write(self, data: bytes) -> None:
+        self.sent += data
+
+    async def drain(self) -> None:
+        pass
+
+
+class AsyncHTTPParserTest(unittest.TestCase):
+    def exchange(self, raw: bytes, method: str = "GET", body=None) -> tuple:
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(raw)
+            reader.feed_eof()
+            writer = _Writer()
+            resp, reusable = await client.AsyncConnectionPool._exchange(
+                reader, writer, method, "/path?q=1", "example.org", body, {"Authorization": "t"})
+            return resp, reusable, writer.sent, await reader.read()
+        return asyncio.run(run())
+
+    def test_request_line_and_headers(self):
+        _, _, sent, _ = self.exchange(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n", "POST", b"{}")
+        head, _, body = sent.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        self.assertEqual(lines[0], "POST /path?q=1 HTTP/1.1")
+        self.assertIn("Host: example.org", lines)
+        self.assertIn("Authorization: t", lines)
+        self.assertIn("Content-Length: 2", lines)
+        self.assertEqual(body, b"{}")
+
+    def test_content_length(self):
+        resp, reusable, _, rest = self.exchange(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 11\r\n\r\n"
+            b'{"code":200}NEXT')
+        self.assertEqual((resp.status, resp.reason), (200, "OK"))
+        self.assertEqual(resp.body, b'{"code":200')
+        self.assertEqual(resp.headers["Content-Type"], "application/json")
+        self.assertTrue(reusable)
+        self.assertEqual(rest, b"}NEXT")  # the next response's bytes are left unread
+
+    def test_chunked_with_extensions_and_trailers(self):
+        resp, reusable, _, rest = self.exchange(
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"5;ext=1\r\nhello\r\n1A\r\n, chunked world!!!!!!!!!!!\r\n0\r\nX-Trailer: 1\r\n\r\nNEXT")
+        self.assertEqual(resp.body, b"hello, chunked world!!!!!!!!!!!")
+        self.assertTrue(reusable)
+        self.assertEqual(rest, b"NEXT")
+
+    def test_close_delimited_body(self):
+        resp, reusable, _, _ = self.exchange(b"HTTP/1.1 200 OK\r\n\r\nuntil the end")
+        self.assertEqual(resp.body, b"until the end")
+        self.assertFalse(reusable)
+
+    def test_connection_close_and_http10(self):
+        for raw, expected in (
+                (b"HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 2\r\n\r\nok", False),
+                (b"HTTP/1.0 200 OK\r\nContent-Length: 2\r\n\r\nok", False),
+                (b"HTTP/1.0 200 OK\r\nConnection: keep-alive\r\nContent-Length: 2\r\n\r\nok", True)):
+            with self.subTest(raw=raw):
+                resp, reusable, _, _ = self.exchange(raw)
+                self.assertEqual((resp.body, reusable), (b"ok", expected))
+
+    def test_bodyless_status(self):
+        for raw in (b"HTTP/1.1 204 No Content\r\n\r\n", b"HTTP/1.1 304 Not Modified\r\nContent-Length: 9\r\n\r\n"):
+            with self.subTest(raw=raw):
+                resp, reusable, _, _ = self.exchange(raw)
+                self.assertEqual((resp.body, reusable), (b"", True))
+
+    def test_bad_responses(self):
+        with self.assertRaises(http.client.BadStatusLine):
+            self.exchange(b"garbage\r\n\r\n")
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.exchange(b"")
+        with self.assertRaises(asyncio.IncompleteReadError):
+            self.exchange(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\nshort")
+
+    def test_gateway_round_trips(self):
+        async def run(gateway):
+            pool = client.AsyncConnectionPool()
+            headers = {"Authorization": "test"}
+            try:
+                get = await pool.request("GET", f"{gateway.base_url}/api/paper/search?title=bert&size=3",
+                                         headers=headers)
+                post = await pool.request("POST", f"{gateway.base_url}/api/paper/info",
+                                          body=json.dumps({"ids": ["a1", "b2"]}).encode(),
+                                          headers=headers)
+                missing = await pool.request("GET", f"{gateway.base_url}/api/nope", headers=headers)
+                return get, post, missing, pool.stats()
+            finally:
+                await pool.close()
+
+        with MockGateway(latency=0).start() as gateway:
+            get, post, missing, stats = asyncio.run(run(gateway))
+        self.assertEqual(get.status, 200)
+        self.assertEqual(len(json.loads(get.body)["data"]), 3)
+        self.assertEqual(post.status, 200)
+        self.assertEqual(len(json.loads(post.body)["data"]), 2)
+        self.assertEqual(missing.status, 404)
+        self.assertEqual((stats["connections_created"], stats["connections_reused"]), (1, 2))
+
+    def test_gateway_throttle_headers(self):
+        async def run(gateway):
+            pool = client.AsyncConnectionPool()
+            try:
+                return await pool.request("GET", f"{gateway.base_url}/api/paper/search?title=x",
+                                          headers={"Authorization": "test"})
+            finally:
+                await pool.close()
+
+        with MockGateway(latency=0, throttle_rate=1.0, retry_after=7).start() as gateway:
+            resp = asyncio.run(run(gateway))
+        self.assertEqual(resp.status, 429)
+        self.assertEqual(client._retry_after_seconds(resp), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()